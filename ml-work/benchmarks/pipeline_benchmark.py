@@ -0,0 +1,71 @@
+"""Throughput of the pretraining input pipeline against the notebook's.
+
+Times one epoch of the notebook's ``Dataset.from_generator`` pipeline
+and of ``lexora_ml.pipeline.masked_dataset`` over in-memory windows, then
+the first (file-reading) and a cached epoch over the same windows as a
+memory-mapped ``.npy``.
+
+Usage (from the ml-work directory):
+
+    python benchmarks/pipeline_benchmark.py [--windows N] [--batch-size B]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+import _reference  # noqa: E402
+from lexora_ml.pipeline import BATCH_SIZE, MASK_FRACTION, masked_dataset  # noqa: E402
+
+
+def epoch_seconds(dataset: tf.data.Dataset) -> float:
+    start = time.perf_counter()
+    for _ in dataset:
+        pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--windows", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    windows = rng.normal(size=(args.windows, 20, 5)).astype(np.float32)
+
+    reference = _reference.masking_dataset(windows, args.batch_size, MASK_FRACTION)
+    reference_seconds = epoch_seconds(reference)
+
+    dataset = masked_dataset(windows, args.batch_size, seed=args.seed)
+    epoch_seconds(dataset)  # Trace the functions first.
+    in_memory_seconds = epoch_seconds(dataset)
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "windows.npy")
+        np.save(path, windows)
+        mapped = np.load(path, mmap_mode="r")
+        dataset = masked_dataset(mapped, args.batch_size, seed=args.seed)
+        first_epoch = epoch_seconds(dataset)
+        cached_epoch = epoch_seconds(dataset)
+        del mapped, dataset
+
+    print(f"{args.windows} windows per epoch, batches of {args.batch_size}")
+    print(f"  generator          {reference_seconds:6.2f} s")
+    print(f"  in-graph           {in_memory_seconds:6.2f} s")
+    print(f"  memory-mapped      {first_epoch:6.2f} s first epoch")
+    print(f"                     {cached_epoch:6.2f} s cached")
+
+
+if __name__ == "__main__":
+    main()
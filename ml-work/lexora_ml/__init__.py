@@ -0,0 +1,14 @@
+"""Reusable preprocessing and training code for the Lexora gaze notebooks.
+
+The notebooks under ``eye-tracker/notebooks`` and ``webcam/notebooks``
+import from here instead of redefining the same steps in every copy. Add
+the ``ml-work`` directory to the path first:
+
+    import sys
+    sys.path.append("../..")  # from a notebooks/ directory
+
+    from lexora_ml.fixations import detect_fixations_batch
+
+Its dependencies, and pytest for ``tests``, are listed in
+``requirements.txt``: ``pip install -r requirements.txt`` from ``ml-work``.
+"""
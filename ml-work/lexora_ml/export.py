@@ -0,0 +1,527 @@
+"""Export the gaze models to ONNX for CPU inference without TensorFlow.
+
+A profile classifier (``dyslexia-profile-model.h5``, the UDA classifier)
+is split the way the tobii-service scores sessions: the shared window
+encoder becomes ``encoder.onnx`` (``windows`` ``(n, 20, 5)`` ->
+``embeddings`` ``(n, 64)``) and everything after the average pooling
+becomes ``head.onnx`` (one ``(1, 64)`` input per classifier input, named
+after it -> ``risk`` ``(1, 1)``). A bare encoder (``gaze-encoder-*.h5``)
+exports ``encoder.onnx`` only. ``model.json`` describes the result.
+
+The graphs are written directly from the Keras weights rather than
+converted from a traced TensorFlow graph, so every LSTM layer becomes one
+fused ONNX ``LSTM`` node instead of a generic loop, which is what makes
+ONNX Runtime fast on these small models. Precisions:
+
+- ``fp32``: the original weights.
+- ``fp16``: weights stored as float16 and cast back when the session is
+  created; half the size, same speed and practically the same results.
+- ``int8``: dynamic int8 quantization with ``onnxruntime.quantization``;
+  a quarter of the size, at some loss of accuracy.
+
+Exporting needs TensorFlow/Keras (to read the models), ``onnx`` and, for
+``int8``, ``onnxruntime``. Run from ``ml-work``, for example:
+
+    python -m lexora_ml.export webcam/models/uda-model/dyslexia-uda-classifier.h5 \\
+        exported/uda-classifier --precision fp32 fp16 int8 --report report.json
+
+which writes ``exported/uda-classifier/<precision>/`` and prints how each
+export compares with the ``.h5`` original in accuracy, latency, load time
+and size.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import keras
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+PRECISIONS = ("fp32", "fp16", "int8")
+MANIFEST_FILE = "model.json"
+ENCODER_FILE = "encoder.onnx"
+HEAD_FILE = "head.onnx"
+FORMAT = "lexora-onnx-1"
+
+SEQUENCE_LENGTH = 20
+FEATURE_COUNT = 5
+
+OPSET = 17
+# Oldest IR version for the opset, so older ONNX Runtime releases load it.
+IR_VERSION = 8
+
+_ACTIVATIONS = {"relu": "Relu", "sigmoid": "Sigmoid", "tanh": "Tanh"}
+
+
+class _GraphBuilder:
+    """Accumulates the nodes and weights of one ONNX graph."""
+
+    def __init__(self):
+        self.nodes: List[Any] = []
+        self.initializers: List[Any] = []
+        self._count = 0
+
+    def name(self, prefix: str) -> str:
+        self._count += 1
+        return f"{prefix}_{self._count}"
+
+    def constant(self, prefix: str, value: np.ndarray) -> str:
+        name = self.name(prefix)
+        self.initializers.append(numpy_helper.from_array(np.asarray(value), name))
+        return name
+
+    def node(
+        self, op: str, inputs: Sequence[str], output: Optional[str] = None, **attrs
+    ) -> str:
+        output = output or self.name(op.lower())
+        self.nodes.append(helper.make_node(op, list(inputs), [output], **attrs))
+        return output
+
+    def lstm(self, layer, sequence: str, return_sequences: bool) -> str:
+        """Append a Keras LSTM layer reading a time-major sequence."""
+        config = layer.get_config()
+        if (
+            config["activation"] != "tanh"
+            or config["recurrent_activation"] != "sigmoid"
+            or not config["use_bias"]
+            or config.get("go_backwards")
+            or config.get("stateful")
+        ):
+            raise ValueError(f"Unsupported LSTM configuration in {layer.name}")
+
+        kernel, recurrent, bias = layer.get_weights()
+        units = layer.units
+
+        def gates(weights: np.ndarray) -> np.ndarray:
+            # Keras orders the gates i, f, c, o; ONNX expects i, o, f, c.
+            i, f, c, o = np.split(weights, 4, axis=-1)
+            return np.concatenate((i, o, f, c), axis=-1)
+
+        weights = self.constant("W", gates(kernel).T[None].astype(np.float32))
+        recurrence = self.constant("R", gates(recurrent).T[None].astype(np.float32))
+        biases = self.constant(
+            "B",
+            np.concatenate((gates(bias), np.zeros(4 * units)))[None].astype(np.float32),
+        )
+
+        all_states, last_state = self.name("lstm_y"), self.name("lstm_h")
+        self.nodes.append(
+            helper.make_node(
+                "LSTM",
+                [sequence, weights, recurrence, biases],
+                [all_states, last_state],
+                hidden_size=units,
+            )
+        )
+        if return_sequences:
+            # (steps, directions, batch, units) -> (steps, batch, units)
+            axes = self.constant("axes", np.array([1], dtype=np.int64))
+            return self.node("Squeeze", [all_states, axes])
+        # (directions, batch, units) -> (batch, units)
+        axes = self.constant("axes", np.array([0], dtype=np.int64))
+        return self.node("Squeeze", [last_state, axes])
+
+    def dense(self, layer, x: str) -> str:
+        config = layer.get_config()
+        activation = config["activation"]
+        if activation != "linear" and activation not in _ACTIVATIONS:
+            raise ValueError(f"Unsupported activation {activation!r} in {layer.name}")
+        weights = layer.get_weights()
+        kernel = self.constant("kernel", weights[0].astype(np.float32))
+        y = self.node("MatMul", [x, kernel])
+        if config["use_bias"]:
+            bias = self.constant("bias", weights[1].astype(np.float32))
+            y = self.node("Add", [y, bias])
+        if activation != "linear":
+            y = self.node(_ACTIVATIONS[activation], [y])
+        return y
+
+    def model(self, name: str, inputs: List[Any], outputs: List[Any]) -> Any:
+        graph = helper.make_graph(self.nodes, name, inputs, outputs, self.initializers)
+        return helper.make_model(
+            graph,
+            opset_imports=[helper.make_opsetid("", OPSET)],
+            ir_version=IR_VERSION,
+            producer_name="lexora_ml.export",
+        )
+
+
+def _tensor(name: str, shape: Sequence[Any]) -> Any:
+    return helper.make_tensor_value_info(name, TensorProto.FLOAT, list(shape))
+
+
+def build_encoder(encoder) -> Any:
+    """ONNX graph of a window encoder (stacked LSTMs, optional Dense layers)."""
+    builder = _GraphBuilder()
+    # LSTM nodes read time-major sequences.
+    x = builder.node("Transpose", ["windows"], perm=[1, 0, 2])
+    layers = [
+        layer
+        for layer in encoder.layers
+        if not isinstance(layer, keras.layers.InputLayer)
+    ]
+    for i, layer in enumerate(layers):
+        if isinstance(layer, keras.layers.LSTM):
+            x = builder.lstm(layer, x, layer.return_sequences)
+            if layer.return_sequences and i == len(layers) - 1:
+                raise ValueError("The encoder must end with a single embedding")
+        elif isinstance(layer, keras.layers.Dense):
+            x = builder.dense(layer, x)
+        elif isinstance(layer, keras.layers.Dropout):
+            continue
+        else:
+            raise ValueError(f"Unsupported encoder layer {layer.name}")
+    builder.node("Identity", [x], "embeddings")
+
+    embedding_size = encoder.output.shape[-1]
+    return builder.model(
+        "gaze_encoder",
+        [_tensor("windows", ["n", SEQUENCE_LENGTH, FEATURE_COUNT])],
+        [_tensor("embeddings", ["n", embedding_size])],
+    )
+
+
+def build_head(head_layers: list, input_names: List[str], embedding_size: int) -> Any:
+    """ONNX graph of the layers after the average pooling of each input."""
+    builder = _GraphBuilder()
+    # A list until a Concatenate layer joins the inputs.
+    x: Any = input_names[0] if len(input_names) == 1 else list(input_names)
+    for layer in head_layers:
+        if isinstance(layer, keras.layers.Concatenate):
+            x = builder.node("Concat", x, axis=-1)
+        elif isinstance(layer, keras.layers.Dense):
+            x = builder.dense(layer, x)
+        elif isinstance(layer, keras.layers.Dropout):
+            continue
+        else:
+            raise ValueError(f"Unsupported head layer {layer.name}")
+    if not isinstance(x, str):
+        raise ValueError("The head does not combine its inputs")
+    builder.node("Identity", [x], "risk")
+
+    return builder.model(
+        "classifier_head",
+        [_tensor(name, [1, embedding_size]) for name in input_names],
+        [_tensor("risk", [1, 1])],
+    )
+
+
+def split_model(model) -> Dict[str, Any]:
+    """Find the encoder and the classifier head of a Keras gaze model."""
+    if tuple(model.inputs[0].shape[1:]) == (SEQUENCE_LENGTH, FEATURE_COUNT):
+        return {"encoder": model, "inputs": [], "max_windows": None, "head": None}
+
+    encoders = [
+        layer
+        for layer in model.layers
+        if isinstance(layer, keras.layers.TimeDistributed)
+    ]
+    pools = [
+        layer
+        for layer in model.layers
+        if isinstance(layer, keras.layers.GlobalAveragePooling1D)
+    ]
+    if len(encoders) != 1 or len(pools) != len(model.inputs):
+        raise ValueError(
+            "Expected a shared window encoder and one pooling layer per input"
+        )
+
+    # The notebooks pool each input's embeddings in input order, and the
+    # model's layers are listed in graph order, so the head follows the
+    # last pooling layer.
+    last_pool = model.layers.index(pools[-1])
+    return {
+        "encoder": encoders[0].layer,
+        "inputs": [tensor.name for tensor in model.inputs],
+        "max_windows": model.inputs[0].shape[1],
+        "head": model.layers[last_pool + 1 :],
+    }
+
+
+def _to_fp16(onnx_model: Any) -> Any:
+    """Store float weights as float16, cast back to float32 on load.
+
+    ONNX Runtime's CPU LSTM only computes in float32; it folds the casts
+    when the session is created, so only the file size changes.
+    """
+    graph = onnx_model.graph
+    casts = []
+    for initializer in graph.initializer:
+        if initializer.data_type != TensorProto.FLOAT:
+            continue
+        values = numpy_helper.to_array(initializer).astype(np.float16)
+        name = initializer.name
+        initializer.CopyFrom(numpy_helper.from_array(values, f"{name}_fp16"))
+        casts.append(
+            helper.make_node("Cast", [f"{name}_fp16"], [name], to=TensorProto.FLOAT)
+        )
+    nodes = casts + list(graph.node)
+    del graph.node[:]
+    graph.node.extend(nodes)
+    return onnx_model
+
+
+def _save(onnx_model: Any, path: str, precision: str) -> None:
+    onnx.checker.check_model(onnx_model)
+    if precision == "fp16":
+        onnx.save(_to_fp16(onnx_model), path)
+    elif precision == "int8":
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "fp32.onnx")
+            onnx.save(onnx_model, source)
+            quantize_dynamic(source, path, weight_type=QuantType.QInt8)
+    else:
+        onnx.save(onnx_model, path)
+
+
+def export_model(
+    model_path: str, output_dir: str, precision: str = "fp32"
+) -> Dict[str, Any]:
+    """Export a Keras ``.h5`` gaze model to ``output_dir``.
+
+    Returns:
+        The manifest written to ``model.json``.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision must be one of {PRECISIONS}")
+
+    model = keras.models.load_model(model_path, compile=False)
+    parts = split_model(model)
+    encoder = parts["encoder"]
+    embedding_size = encoder.output.shape[-1]
+    os.makedirs(output_dir, exist_ok=True)
+
+    _save(build_encoder(encoder), os.path.join(output_dir, ENCODER_FILE), precision)
+    if parts["head"] is not None:
+        _save(
+            build_head(parts["head"], parts["inputs"], embedding_size),
+            os.path.join(output_dir, HEAD_FILE),
+            precision,
+        )
+
+    manifest = {
+        "format": FORMAT,
+        "source": os.path.basename(model_path),
+        "precision": precision,
+        "sequence_length": SEQUENCE_LENGTH,
+        "feature_count": FEATURE_COUNT,
+        "embedding_size": embedding_size,
+        "encoder": ENCODER_FILE,
+        "head": HEAD_FILE if parts["head"] is not None else None,
+        "inputs": parts["inputs"],
+        "max_windows": parts["max_windows"],
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _median_seconds(function, repeats: int) -> float:
+    function()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def compare(
+    model_path: str,
+    export_dirs: Dict[str, str],
+    windows: Optional[np.ndarray] = None,
+    sessions: int = 32,
+    repeats: int = 50,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Compare exports with the Keras original.
+
+    Args:
+        model_path: The ``.h5`` model the exports were made from.
+        export_dirs: Precision -> export directory.
+        windows: Scaled ``(n, 20, 5)`` windows to evaluate on, such as the
+            ``X_target.npy`` saved by the webcam notebook. Standard normal
+            windows (the scaled feature distribution) by default.
+        sessions: Number of random sessions scored, for classifiers.
+        repeats: Timing repetitions.
+
+    Returns:
+        One row per model: load time (until the first window is
+        encoded), size on disk, per-window latency at
+        batch size 1 and for a full session, the largest embedding error
+        and, for classifiers, the largest risk difference and how often the
+        decision at 0.5 agrees.
+    """
+    import onnxruntime as ort
+    import tensorflow as tf
+
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    model = keras.models.load_model(model_path, compile=False)
+    parts = split_model(model)
+
+    encoder = parts["encoder"]
+    window_spec = tf.TensorSpec((None, SEQUENCE_LENGTH, FEATURE_COUNT), tf.float32)
+    keras_encode = tf.function(
+        lambda w: encoder(w, training=False), input_signature=[window_spec]
+    )
+    max_windows = parts["max_windows"] or 82
+    window_shape = (SEQUENCE_LENGTH, FEATURE_COUNT)
+    if windows is None:
+        windows = rng.standard_normal((max(4 * max_windows, 512),) + window_shape)
+    windows = np.asarray(windows, dtype=np.float32)
+    single = windows[:1]
+    full = windows[:max_windows]
+    # Load time includes the first call, which traces the graph.
+    keras_encode(single)
+    keras_load = time.perf_counter() - start
+    reference_embeddings = keras_encode(windows).numpy()
+
+    # Sessions of 10 up to max_windows windows fed to the first input,
+    # scored by the full model on zero-padded input as in the notebooks.
+    # All sessions go through the model in one batch: eager calls of the
+    # TimeDistributed model are slow enough to dominate the comparison.
+    session_windows = []
+    reference_risk = []
+    if parts["head"] is not None:
+        shape = (sessions, max_windows) + window_shape
+        inputs = {name: np.zeros(shape, np.float32) for name in parts["inputs"]}
+        for i in range(sessions):
+            count = int(rng.integers(10, max_windows + 1))
+            chosen = windows[rng.choice(len(windows), count, replace=False)]
+            inputs[parts["inputs"][0]][i, :count] = chosen
+            session_windows.append(chosen)
+        reference_risk = model(inputs, training=False).numpy()[:, 0].tolist()
+
+    h5_size = os.path.getsize(model_path)
+    rows = [
+        {
+            "model": "keras",
+            "load_ms": keras_load * 1000,
+            "size_kb": h5_size / 1024,
+            "window_ms": _median_seconds(lambda: keras_encode(single), repeats) * 1000,
+            "session_ms": _median_seconds(lambda: keras_encode(full), repeats) * 1000,
+            "embedding_error": 0.0,
+            "risk_error": 0.0 if reference_risk else None,
+            "agreement": 1.0 if reference_risk else None,
+        }
+    ]
+
+    for precision, directory in export_dirs.items():
+        with open(os.path.join(directory, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        start = time.perf_counter()
+        encoder_session = ort.InferenceSession(
+            os.path.join(directory, manifest["encoder"]),
+            providers=["CPUExecutionProvider"],
+        )
+        head_session = None
+        if manifest["head"]:
+            head_session = ort.InferenceSession(
+                os.path.join(directory, manifest["head"]),
+                providers=["CPUExecutionProvider"],
+            )
+
+        def encode(batch: np.ndarray) -> np.ndarray:
+            return encoder_session.run(None, {"windows": batch})[0]
+
+        encode(single)
+        load = time.perf_counter() - start
+        embeddings = encode(windows)
+        row = {
+            "model": precision,
+            "load_ms": load * 1000,
+            "size_kb": sum(
+                os.path.getsize(os.path.join(directory, name))
+                for name in (manifest["encoder"], manifest["head"])
+                if name
+            )
+            / 1024,
+            "window_ms": _median_seconds(lambda: encode(single), repeats) * 1000,
+            "session_ms": _median_seconds(lambda: encode(full), repeats) * 1000,
+            "embedding_error": float(np.abs(embeddings - reference_embeddings).max()),
+            "risk_error": None,
+            "agreement": None,
+        }
+
+        if head_session is not None:
+            padding = encode(np.zeros((1,) + window_shape, np.float32))[0]
+            risks = []
+            for chosen in session_windows:
+                pooled = (
+                    encode(chosen).sum(axis=0) + (max_windows - len(chosen)) * padding
+                ) / max_windows
+                feeds = {name: padding[None] for name in manifest["inputs"]}
+                feeds[manifest["inputs"][0]] = pooled[None].astype(np.float32)
+                risks.append(float(head_session.run(None, feeds)[0][0, 0]))
+            risks = np.array(risks)
+            reference = np.array(reference_risk)
+            row["risk_error"] = float(np.abs(risks - reference).max())
+            row["agreement"] = float(np.mean((risks > 0.5) == (reference > 0.5)))
+        rows.append(row)
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    def number(value: Optional[float], digits: int) -> str:
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    lines = [
+        f"{'model':<7} {'load ms':>8} {'size KB':>8} {'1 window ms':>12} "
+        f"{'session ms':>11} {'emb err':>9} {'risk err':>9} {'agree':>6}"
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['model']:<7} {row['load_ms']:>8.1f} {row['size_kb']:>8.0f} "
+            f"{row['window_ms']:>12.3f} {row['session_ms']:>11.3f} "
+            f"{row['embedding_error']:>9.2e} {number(row['risk_error'], 4):>9} "
+            f"{number(row['agreement'], 2):>6}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("model", help="Keras .h5 model to export")
+    parser.add_argument("output", help="Directory to write the export(s) to")
+    parser.add_argument(
+        "--precision",
+        nargs="+",
+        choices=PRECISIONS,
+        default=["fp32"],
+        help="Precision(s) to export; several go to OUTPUT/<precision>",
+    )
+    parser.add_argument("--windows", help="Scaled windows (.npy) to compare on")
+    parser.add_argument("--no-compare", action="store_true", help="Skip the report")
+    parser.add_argument("--report", help="Also write the report rows as JSON")
+    args = parser.parse_args(argv)
+
+    export_dirs = {}
+    for precision in args.precision:
+        directory = args.output
+        if len(args.precision) > 1:
+            directory = os.path.join(args.output, precision)
+        export_model(args.model, directory, precision)
+        export_dirs[precision] = directory
+        print(f"Exported {precision} to {directory}")
+
+    if args.no_compare:
+        return
+    windows = np.load(args.windows) if args.windows else None
+    rows = compare(args.model, export_dirs, windows)
+    print(format_report(rows))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Vectorized I-VT fixation detection for webcam gaze.
+
+Array version of ``smooth_points`` / ``detect_fixations`` from Block 3 of
+``webcam/notebooks/2_webqam_gaze_uda.ipynb`` and of the fixation feature
+engineering in Block 4. The steps are the same:
+
+1. EMA-smooth the gaze (first point kept as is).
+2. Point-to-point velocity; the first point of a trial has velocity 0.
+3. Maximal runs of points slower than the threshold are fixations; a fast
+   point ends a run and belongs to no fixation.
+4. Keep runs lasting at least ``min_duration`` (and, as Block 4 does
+   afterwards, at most ``max_duration``).
+
+but they run on contiguous arrays: one ``lfilter`` call per trial for the
+EMA and whole-array NumPy operations for everything else. Many trials are
+processed at once by concatenating them and passing ``offsets``, where
+trial ``i`` is ``[offsets[i], offsets[i + 1])``.
+
+Timestamps are in milliseconds, as in the webgazer data.
+``tests/test_fixations.py`` checks the results against the notebook
+implementation.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.signal import lfilter
+
+FIXATION_DTYPE = np.dtype(
+    [
+        ("duration", np.float64),
+        ("x", np.float64),
+        ("y", np.float64),
+        ("start", np.float64),
+        ("end", np.float64),
+    ]
+)
+
+MODEL_FEATURE_NAMES = [
+    "CURRENT_FIX_DURATION",
+    "CURRENT_FIX_X",
+    "CURRENT_FIX_Y",
+    "PREVIOUS_SAC_AMPLITUDE",
+    "IS_REGRESSION",
+]
+
+
+def trial_offsets(lengths: Sequence[int]) -> np.ndarray:
+    """Offsets of concatenated trials with the given lengths."""
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def smooth_ema(xy: np.ndarray, alpha: float = 0.5) -> np.ndarray:
+    """Exponential moving average along axis 0, seeded with the first row.
+
+    ``out[0] = xy[0]`` and ``out[i] = alpha * xy[i] + (1 - alpha) * out[i - 1]``,
+    the recurrence of the notebook's ``smooth_points``.
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    out = xy.copy()
+    if len(xy) > 1:
+        out[1:], _ = lfilter(
+            [alpha], [1.0, alpha - 1.0], xy[1:], axis=0, zi=(1 - alpha) * xy[:1]
+        )
+    return out
+
+
+def smooth_ema_batch(
+    xy: np.ndarray, offsets: np.ndarray, alpha: float = 0.5
+) -> np.ndarray:
+    """``smooth_ema`` restarted at the beginning of every trial."""
+    xy = np.asarray(xy, dtype=np.float64)
+    out = xy.copy()
+    for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+        if stop - start > 1:
+            out[start + 1 : stop], _ = lfilter(
+                [alpha],
+                [1.0, alpha - 1.0],
+                xy[start + 1 : stop],
+                axis=0,
+                zi=(1 - alpha) * xy[start : start + 1],
+            )
+    return out
+
+
+def detect_fixations_batch(
+    x: np.ndarray,
+    y: np.ndarray,
+    t: np.ndarray,
+    offsets: np.ndarray,
+    velocity_threshold: float,
+    min_duration: float = 50,
+    max_duration: Optional[float] = None,
+    alpha: float = 0.5,
+    smoothing: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Detect fixations in many concatenated trials at once.
+
+    Args:
+        x, y: Gaze coordinates, all trials concatenated.
+        t: Timestamps in milliseconds.
+        offsets: Trial boundaries, ``len(trials) + 1`` entries.
+        velocity_threshold: Points at least this fast (coordinate units per
+            second) belong to a saccade.
+        min_duration: Shortest fixation kept (ms).
+        max_duration: Longest fixation kept (ms), or None for no limit.
+        alpha: EMA smoothing factor.
+        smoothing: Whether to smooth before measuring velocity.
+
+    Returns:
+        Tuple of (fixations, fixation_offsets): a ``FIXATION_DTYPE`` array of
+        every trial's fixations in order, and the offsets of each trial's
+        fixations within it.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    t = np.asarray(t, dtype=np.float64)
+    xy = np.column_stack((x, y)).astype(np.float64, copy=False)
+    n = len(t)
+    n_trials = len(offsets) - 1
+
+    if smoothing:
+        xy = smooth_ema_batch(xy, offsets, alpha)
+
+    trial_start = np.zeros(n + 1, dtype=bool)
+    trial_start[offsets] = True
+
+    # Velocity of each point relative to the previous one.
+    velocity = np.zeros(n)
+    if n > 1:
+        delta = np.diff(xy, axis=0)
+        distance = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+        elapsed = np.diff(t) / 1000.0
+        np.divide(distance, elapsed, out=velocity[1:], where=elapsed > 0)
+    velocity[trial_start[:n]] = 0.0
+
+    slow = velocity < velocity_threshold
+    # Like the notebook, trials with fewer than two points have no fixations.
+    lengths = np.diff(offsets)
+    short_trials = offsets[:-1][lengths == 1]
+    slow[short_trials] = False
+
+    # Runs of slow points, never crossing a trial boundary.
+    previous_slow = np.concatenate(([False], slow[:-1]))
+    next_slow = np.concatenate((slow[1:], [False]))
+    starts = np.flatnonzero(slow & (~previous_slow | trial_start[:n]))
+    ends = np.flatnonzero(slow & (~next_slow | trial_start[1:]))
+
+    duration = t[ends] - t[starts]
+    keep = duration >= min_duration
+    if max_duration is not None:
+        keep &= duration <= max_duration
+    starts, ends, duration = starts[keep], ends[keep], duration[keep]
+
+    fixations = np.empty(len(starts), dtype=FIXATION_DTYPE)
+    fixations["duration"] = duration
+    fixations["start"] = t[starts]
+    fixations["end"] = t[ends]
+    if len(starts):
+        # Sum each run with reduceat over [start, end + 1) pairs; the padding
+        # row keeps end + 1 a valid index for a run ending the last trial.
+        bounds = np.column_stack((starts, ends + 1)).ravel()
+        padded = np.concatenate((xy, np.zeros((1, 2))))
+        sums = np.add.reduceat(padded, bounds, axis=0)[::2]
+        counts = (ends - starts + 1)[:, None]
+        means = sums / counts
+        fixations["x"] = means[:, 0]
+        fixations["y"] = means[:, 1]
+
+    trial_of_fixation = np.searchsorted(offsets, starts, side="right") - 1
+    fixation_offsets = trial_offsets(np.bincount(trial_of_fixation, minlength=n_trials))
+    return fixations, fixation_offsets
+
+
+def detect_fixations(
+    x: np.ndarray,
+    y: np.ndarray,
+    t: np.ndarray,
+    velocity_threshold: float,
+    min_duration: float = 50,
+    max_duration: Optional[float] = None,
+    alpha: float = 0.5,
+    smoothing: bool = True,
+) -> np.ndarray:
+    """Detect the fixations of a single trial; see ``detect_fixations_batch``."""
+    fixations, _ = detect_fixations_batch(
+        x,
+        y,
+        t,
+        np.array([0, len(t)]),
+        velocity_threshold,
+        min_duration=min_duration,
+        max_duration=max_duration,
+        alpha=alpha,
+        smoothing=smoothing,
+    )
+    return fixations
+
+
+def fixation_features(fixations: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Model input features of each fixation, as built in Block 4.
+
+    Returns:
+        ``(len(fixations), 5)`` array with columns ``MODEL_FEATURE_NAMES``.
+        As in the notebook, the "previous" fixation of a trial's first
+        fixation is at (0, 0).
+    """
+    x = fixations["x"]
+    y = fixations["y"]
+    previous_x = np.concatenate(([0.0], x[:-1]))
+    previous_y = np.concatenate(([0.0], y[:-1]))
+    first = np.asarray(offsets[:-1])[np.diff(offsets) > 0]
+    previous_x[first] = 0.0
+    previous_y[first] = 0.0
+
+    dx = x - previous_x
+    dy = y - previous_y
+    return np.column_stack(
+        (
+            fixations["duration"],
+            x,
+            y,
+            np.sqrt(dx**2 + dy**2),
+            (x < previous_x).astype(np.float64),
+        )
+    )
+
@@ -0,0 +1,145 @@
+"""tf.data input pipelines for encoder pretraining.
+
+Block 1 of the training part of ``eye-tracker/notebooks/0_one_stop_encoder.ipynb``
+feeds the autoencoder through ``Dataset.from_generator`` over
+``tf_masking_generator``, which masks one sequence at a time in NumPy
+(``mask_sequence`` with ``np.random.choice``). Every window passes
+through the Python interpreter, so the GIL, not the model, sets the
+training speed.
+
+``masked_dataset`` builds the same ``(masked, original)`` batches without
+any per-window Python:
+
+- Windows come from an in-memory array as tensor slices, or from a
+  memory-mapped ``.npy`` (``windows.take_windows`` output, the feature
+  store) in large contiguous chunks, cached after the first epoch.
+- Shuffling and batching happen on tensors.
+- Masking runs in the graph on whole batches, in parallel: every window
+  gets ``ceil(length * mask_fraction)`` distinct random timesteps zeroed,
+  as in ``mask_sequence``, chosen with ``top_k`` over uniform noise.
+  The noise is seeded per batch, so a given ``seed`` masks the same way
+  on every run.
+- Batches are prefetched with ``AUTOTUNE``.
+
+``tests/test_pipeline.py`` checks the masking and
+``benchmarks/pipeline_benchmark.py`` compares the throughput with the
+generator pipeline.
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+import tensorflow as tf
+
+MASK_FRACTION = 0.15
+BATCH_SIZE = 256
+SHUFFLE_BUFFER = 10000
+# Windows read per call from a memory-mapped array.
+READ_CHUNK = 8192
+
+
+def mask_timesteps(
+    windows: tf.Tensor, mask_fraction: float, seed: tf.Tensor
+) -> tf.Tensor:
+    """Zero ``ceil(length * mask_fraction)`` random timesteps of every window.
+
+    Args:
+        windows: ``(batch, length, n_features)`` tensor.
+        mask_fraction: Fraction of timesteps to mask.
+        seed: Shape ``[2]`` integer seed for the stateless random noise.
+    """
+    length = windows.shape[1]
+    n_to_mask = int(math.ceil(length * mask_fraction))
+    if n_to_mask == 0:
+        return windows
+
+    noise = tf.random.stateless_uniform(tf.shape(windows)[:2], seed=seed)
+    _, masked = tf.math.top_k(noise, k=n_to_mask, sorted=False)
+    # (batch, k, length) one-hot rows summed into a (batch, length) mask.
+    mask = tf.reduce_max(tf.one_hot(masked, length, dtype=windows.dtype), axis=1)
+    return windows * (1.0 - mask)[:, :, tf.newaxis]
+
+
+def window_dataset(
+    windows: np.ndarray, read_chunk: int = READ_CHUNK
+) -> tf.data.Dataset:
+    """Unbatched dataset of the windows of an array or memory-mapped array.
+
+    An in-memory array becomes tensor slices. A ``np.memmap`` is read
+    ``read_chunk`` windows at a time, in file order, so the whole file
+    never has to be loaded into memory at once (and cannot end up as a
+    constant in the graph).
+    """
+    if not isinstance(windows, np.memmap):
+        return tf.data.Dataset.from_tensor_slices(windows)
+
+    n = len(windows)
+    shape = windows.shape[1:]
+    dtype = tf.as_dtype(windows.dtype)
+
+    def read(begin: np.int64) -> np.ndarray:
+        return np.ascontiguousarray(windows[begin : begin + read_chunk])
+
+    def read_chunk_op(begin: tf.Tensor) -> tf.Tensor:
+        chunk = tf.numpy_function(read, [begin], dtype, stateful=False)
+        return tf.ensure_shape(chunk, (None,) + shape)
+
+    return (
+        tf.data.Dataset.range(0, n, read_chunk)
+        .map(read_chunk_op, num_parallel_calls=tf.data.AUTOTUNE)
+        .unbatch()
+    )
+
+
+def masked_dataset(
+    windows: np.ndarray,
+    batch_size: int = BATCH_SIZE,
+    mask_fraction: float = MASK_FRACTION,
+    shuffle: bool = True,
+    shuffle_buffer: int = SHUFFLE_BUFFER,
+    cache: Optional[str] = "",
+    seed: Optional[int] = None,
+) -> tf.data.Dataset:
+    """``(masked, original)`` batches for masked-reconstruction pretraining.
+
+    The drop-in replacement for the notebook's ``train_dataset`` /
+    ``val_dataset`` (use ``shuffle=False`` for validation).
+
+    Args:
+        windows: ``(n, length, n_features)`` array, in memory or
+            memory-mapped.
+        batch_size: Windows per batch.
+        mask_fraction: Fraction of each window's timesteps to zero.
+        shuffle: Whether to reshuffle the windows every epoch.
+        shuffle_buffer: Size of the shuffle buffer.
+        cache: For memory-mapped windows, where to cache them after the
+            first pass: ``""`` in memory, a path for a TensorFlow cache
+            file, or None to read the file again every epoch. In-memory
+            windows are never cached again.
+        seed: Seed for shuffling and masking; None for a random one.
+    """
+    dataset = window_dataset(windows)
+    if cache is not None and isinstance(windows, np.memmap):
+        dataset = dataset.cache(cache)
+    if shuffle:
+        dataset = dataset.shuffle(
+            shuffle_buffer, seed=seed, reshuffle_each_iteration=True
+        )
+    dataset = dataset.batch(batch_size)
+
+    # One random seed per batch keeps the masking deterministic under
+    # parallel map for a fixed ``seed``. The seeds change every epoch, as
+    # the notebook's generator masks each pass afresh, but the sequence of
+    # epochs is still the same for the same ``seed``.
+    seeds = tf.data.Dataset.random(
+        seed=seed, rerandomize_each_iteration=True
+    ).batch(2)
+    dataset = tf.data.Dataset.zip((dataset, seeds)).map(
+        lambda batch, batch_seed: (
+            mask_timesteps(batch, mask_fraction, batch_seed),
+            batch,
+        ),
+        num_parallel_calls=tf.data.AUTOTUNE,
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,333 @@
+"""Streaming risk scoring and profiling of a webcam cohort.
+
+Blocks 10 and 11 of ``webcam/notebooks/2_webqam_gaze_uda.ipynb`` load the
+whole ``X_target.npy``, pack every participant into one
+``(participants, 82, 20, 5)`` array, predict it in one ``Model.predict``
+call and then loop over that array again for the per-participant
+statistics. Memory grows with the cohort, twice over.
+
+``score_windows`` produces the same table while holding only a fixed
+number of participants at a time:
+
+- The windows stay memory-mapped. Participants are grouped from
+  ``participant_codes.npy`` without reading any window: from run
+  boundaries when the codes are sorted, as ``webcam.build_target``
+  writes them, or from a stable sort of the codes otherwise.
+- Participants are packed ``chunk_size`` at a time, with the notebook's
+  rules: the first ``SEQ_PER_SUBJECT`` windows, zero padding, and
+  participants with fewer than ``MIN_SEQUENCES`` windows dropped. A
+  reader thread packs the next chunk while the current one is scored.
+- Each chunk is scored with a compiled forward pass that runs the window
+  encoder once on all windows instead of through ``TimeDistributed``
+  (see ``uda.run_classifier``).
+- The Block 11 statistics are computed on the chunk in one vectorized
+  pass and its rows are appended to the CSV straight away.
+
+Participants come out in order of first appearance, as in the notebook.
+Run from ``ml-work``:
+
+    python -m lexora_ml.scoring MODEL DATA_DIR [OUTPUT_CSV]
+
+where ``DATA_DIR`` holds the ``webcam.build_target`` files.
+``tests/test_scoring.py`` compares the results with the notebook
+implementation on a generated cohort.
+"""
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import keras
+import numpy as np
+import tensorflow as tf
+
+from lexora_ml.fixations import trial_offsets
+from lexora_ml.uda import run_classifier, split_classifier
+from lexora_ml.webcam import CODES_FILE, IDS_FILE, TARGET_FILE
+
+SEQ_PER_SUBJECT = 82
+MIN_SEQUENCES = 10
+THRESHOLD = 0.5
+BATCH_SIZE = 32
+# Participants packed, scored and written at a time.
+CHUNK_SIZE = 256
+# Codes checked at a time when testing whether they are sorted.
+CODES_CHUNK = 1 << 20
+
+PREDICTIONS_FILE = "webcam_dyslexia_predictions.csv"
+COLUMNS = [
+    "ParticipantID",
+    "Risk_Score",
+    "Prediction",
+    "Fix_Dur_Mean",
+    "Fix_Dur_Median",
+    "Sacc_Amp_Mean",
+    "Sacc_Amp_Median",
+    "Regression_Rate",
+    "Gaze_Stability_X",
+    "Gaze_Stability_Y",
+    "Valid_Sequence_Count",
+]
+
+
+class ScoringSummary(NamedTuple):
+    """Cohort totals of one scoring run (the Block 10 report)."""
+
+    participants: int
+    high_risk: int
+    dropped: int
+    seconds: float
+
+    @property
+    def prevalence(self) -> float:
+        """Percentage of scored participants flagged as high risk."""
+        return 100.0 * self.high_risk / max(self.participants, 1)
+
+
+def _is_sorted(codes: np.ndarray, chunk_size: int = CODES_CHUNK) -> bool:
+    """Whether ``codes`` never decreases, read ``chunk_size`` at a time."""
+    for begin in range(0, len(codes) - 1, chunk_size):
+        chunk = np.asarray(codes[begin : begin + chunk_size + 1])
+        if (chunk[1:] < chunk[:-1]).any():
+            return False
+    return True
+
+
+def group_participants(
+    codes: np.ndarray, n_participants: int
+) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Where each participant's windows are, without reading the windows.
+
+    Returns ``(offsets, first, order)``: the windows of participant ``p``
+    are ``order[offsets[p]:offsets[p + 1]]``, in file order, and
+    ``first`` lists the participants that have windows in order of their
+    first one. For sorted codes ``order`` is None (the windows are
+    ``offsets[p]:offsets[p + 1]`` themselves) and ``codes`` is only read
+    in chunks, so it may stay memory-mapped.
+    """
+    if _is_sorted(codes):
+        offsets = np.searchsorted(codes, np.arange(n_participants + 1))
+        first = np.flatnonzero(np.diff(offsets) > 0)
+        return offsets, first, None
+
+    order = np.argsort(codes, kind="stable")
+    offsets = trial_offsets(np.bincount(codes, minlength=n_participants))
+    present = np.flatnonzero(np.diff(offsets) > 0)
+    first = present[np.argsort(order[offsets[present]], kind="stable")]
+    return offsets, first, order
+
+
+def pack_participants(
+    windows: np.ndarray,
+    offsets: np.ndarray,
+    order: Optional[np.ndarray],
+    participants: np.ndarray,
+    max_windows: int = SEQ_PER_SUBJECT,
+) -> np.ndarray:
+    """The first ``max_windows`` windows of each participant, zero-padded.
+
+    Reads only those windows from ``windows`` (which may be memory-mapped)
+    and returns a ``(len(participants), max_windows, length, n_features)``
+    float32 array, the notebook's ``X_subjects`` rows for ``participants``.
+    """
+    counts = np.minimum(
+        offsets[participants + 1] - offsets[participants], max_windows
+    )
+    position = np.arange(counts.sum()) - np.repeat(
+        trial_offsets(counts)[:-1], counts
+    )
+    index = np.repeat(offsets[participants], counts) + position
+    if order is not None:
+        index = order[index]
+
+    out = np.zeros(
+        (len(participants), max_windows) + windows.shape[1:], dtype=np.float32
+    )
+    out[np.repeat(np.arange(len(participants)), counts), position] = windows[index]
+    return out
+
+
+def profile(packed: np.ndarray) -> List[np.ndarray]:
+    """The Block 11 statistics of packed participants, one array per column.
+
+    As in the notebook they describe exactly what the model saw: every
+    timestep of the ``max_windows`` windows, zero padding included. The
+    valid sequence count is the number of windows that are not all zero.
+    """
+    n = len(packed)
+    flat = packed.reshape(n, -1, packed.shape[-1]).astype(np.float64)
+    means = flat.mean(axis=1)
+    medians = np.median(flat[:, :, [0, 3]], axis=1)
+    stds = flat[:, :, 1:3].std(axis=1)
+    valid = packed.reshape(n, packed.shape[1], -1).any(axis=2).sum(axis=1)
+    return [
+        means[:, 0],
+        medians[:, 0],
+        means[:, 3],
+        medians[:, 1],
+        means[:, 4],
+        stds[:, 0],
+        stds[:, 1],
+        valid,
+    ]
+
+
+def _packed_chunks(
+    windows: np.ndarray,
+    offsets: np.ndarray,
+    order: Optional[np.ndarray],
+    participants: np.ndarray,
+    chunk_size: int,
+    max_windows: int,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """``(participants, packed)`` chunks, packing the next one in a thread."""
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = None
+        for begin in range(0, len(participants), chunk_size):
+            chunk = participants[begin : begin + chunk_size]
+            future = reader.submit(
+                pack_participants, windows, offsets, order, chunk, max_windows
+            )
+            if pending is not None:
+                yield pending[0], pending[1].result()
+            pending = (chunk, future)
+        if pending is not None:
+            yield pending[0], pending[1].result()
+
+
+def risk_function(
+    classifier: keras.Model, window_shape: Tuple[int, ...]
+) -> Callable[[np.ndarray], tf.Tensor]:
+    """A compiled forward pass of ``classifier`` for packed participants."""
+    encoder, head = split_classifier(classifier)
+    return tf.function(
+        lambda x: run_classifier(classifier, encoder, head, x),
+        input_signature=[tf.TensorSpec((None,) + window_shape, tf.float32)],
+    )
+
+
+def score_windows(
+    classifier: keras.Model,
+    windows: np.ndarray,
+    codes: np.ndarray,
+    ids: Sequence[str],
+    output_path: str,
+    batch_size: int = BATCH_SIZE,
+    chunk_size: int = CHUNK_SIZE,
+    max_windows: int = SEQ_PER_SUBJECT,
+    min_sequences: int = MIN_SEQUENCES,
+    threshold: float = THRESHOLD,
+) -> ScoringSummary:
+    """Score every participant and write the predictions CSV as it goes.
+
+    Args:
+        classifier: The participant-level classifier, taking
+            ``(n, max_windows, length, n_features)`` input.
+        windows: ``(n_windows, length, n_features)`` scaled windows, in
+            memory or memory-mapped.
+        codes: The participant of each window, an index into ``ids``.
+        ids: Participant ids.
+        output_path: Where to write the CSV (``COLUMNS``), one row per
+            scored participant.
+        batch_size: Participants per forward pass.
+        chunk_size: Participants packed and written at a time; with
+            ``batch_size`` this bounds the memory used.
+        max_windows: Windows per participant; longer participants are
+            truncated, shorter ones zero-padded.
+        min_sequences: Participants with fewer windows are dropped.
+        threshold: Risk score from which a participant is "High Risk".
+    """
+    start = time.perf_counter()
+    offsets, first, order = group_participants(codes, len(ids))
+    kept = first[np.diff(offsets)[first] >= min_sequences]
+    predict = risk_function(classifier, (max_windows,) + windows.shape[1:])
+
+    high_risk = 0
+    with open(output_path, "w", newline="") as output_file:
+        output = csv.writer(output_file)
+        output.writerow(COLUMNS)
+        chunks = _packed_chunks(windows, offsets, order, kept, chunk_size, max_windows)
+        for participants, packed in chunks:
+            risks = np.concatenate(
+                [
+                    predict(packed[begin : begin + batch_size]).numpy().reshape(-1)
+                    for begin in range(0, len(packed), batch_size)
+                ]
+            )
+            flagged = risks >= threshold
+            high_risk += int(flagged.sum())
+            labels = np.where(flagged, "High Risk", "Low Risk")
+            columns = [np.asarray(ids)[participants], risks, labels, *profile(packed)]
+            output.writerows(zip(*(column.tolist() for column in columns)))
+            output_file.flush()
+
+    return ScoringSummary(
+        participants=len(kept),
+        high_risk=high_risk,
+        dropped=len(first) - len(kept),
+        seconds=time.perf_counter() - start,
+    )
+
+
+def score_target(
+    classifier: keras.Model,
+    data_dir: str,
+    output_path: Optional[str] = None,
+    **kwargs,
+) -> ScoringSummary:
+    """``score_windows`` on the ``webcam.build_target`` files in ``data_dir``.
+
+    ``X_target.npy`` and ``participant_codes.npy`` are memory-mapped. The
+    CSV goes to ``output_path``, by default ``data_dir/PREDICTIONS_FILE``.
+    Keyword arguments are passed to ``score_windows``.
+    """
+    windows = np.load(os.path.join(data_dir, TARGET_FILE), mmap_mode="r")
+    codes = np.load(os.path.join(data_dir, CODES_FILE), mmap_mode="r")
+    ids = np.load(os.path.join(data_dir, IDS_FILE))
+    if output_path is None:
+        output_path = os.path.join(data_dir, PREDICTIONS_FILE)
+    return score_windows(classifier, windows, codes, ids, output_path, **kwargs)
+
+
+def format_summary(summary: ScoringSummary) -> str:
+    """The Block 10 population report."""
+    return (
+        f"Total participants: {summary.participants} "
+        f"({summary.dropped} dropped with fewer than {MIN_SEQUENCES} sequences)\n"
+        f"High risk flags:    {summary.high_risk}\n"
+        f"Estimated prevalence: {summary.prevalence:.2f}%\n"
+        f"Scored in {summary.seconds:.1f} s"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("model", help="participant classifier (.h5)")
+    parser.add_argument("data_dir", help="directory with the build_target files")
+    parser.add_argument(
+        "output", nargs="?", help=f"CSV to write (default: DATA_DIR/{PREDICTIONS_FILE})"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=CHUNK_SIZE, help="participants per chunk"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE, help="participants per batch"
+    )
+    args = parser.parse_args(argv)
+
+    classifier = keras.models.load_model(args.model, compile=False)
+    summary = score_target(
+        classifier,
+        args.data_dir,
+        args.output,
+        batch_size=args.batch_size,
+        chunk_size=args.chunk_size,
+    )
+    print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
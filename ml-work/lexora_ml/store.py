@@ -0,0 +1,589 @@
+"""Cache of preprocessed corpora, memory-mapped on reuse.
+
+Every notebook run re-reads the raw corpora and redoes the same cleaning,
+feature engineering and windowing before a model sees any data. A
+``FeatureStore`` keeps the result of such a step as plain ``.npy`` files
+(one per array, so each can be memory-mapped on its own) in a directory
+named after a hash of everything the result depends on: the
+preprocessing parameters, the feature list and the size and modification
+time of the input files. Changing any of them gives a new key, and so a
+fresh build; an unchanged configuration loads in milliseconds and pages
+in only the rows that are actually used.
+
+Three corpora have a builder on top of the store:
+
+- ``onestop_windows``: Blocks 1 to 4 of
+  ``eye-tracker/notebooks/0_one_stop_encoder.ipynb``;
+- ``etdd70_windows``: Blocks 1 and 2 of
+  ``eye-tracker/notebooks/1_the_reading_profile_model.ipynb``, the
+  per-participant ETDD70 CSVs;
+- ``webcam_windows``: the webcam JSON export, through ``lexora_ml.webcam``.
+
+For example:
+
+    store = FeatureStore("cache")
+    csv_path = "data/OneStop/precomputed_events/fixations_Paragraph.csv"
+    table = onestop_windows(csv_path, store)
+    train, val, test = split_windows(table, train_ids, val_ids, test_ids)
+    X_train = load_windows(csv_path, store)[train]
+
+Other steps use ``FeatureStore.cached`` with their own build function.
+``tests/test_store.py`` checks when the cache is reused and that it holds
+what the uncached steps compute.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lexora_ml import webcam
+from lexora_ml.fixations import MODEL_FEATURE_NAMES, trial_offsets
+from lexora_ml.windows import (
+    ONESTOP_FEATURE_NAMES,
+    SEQUENCE_LENGTH,
+    STEP,
+    WindowedTable,
+    build_windows,
+    take_windows,
+    window_starts,
+)
+
+CONFIG_FILE = "config.json"
+# Part of every key; bump it when a build function changes its output.
+STORE_VERSION = 1
+
+ETDD70_TASKS = ("Syllables", "Meaningful_Text", "Pseudo_Text")
+ETDD70_SCREEN = (1680, 1050)
+ETDD70_LABELS_FILE = "dyslexia_class_label.csv"
+ETDD70_DATA_DIR = os.path.join("data", "data")
+
+Arrays = Dict[str, np.ndarray]
+
+
+def file_fingerprint(path: str) -> Dict[str, Any]:
+    """What identifies an input file's contents cheaply: size and mtime."""
+    info = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+    }
+
+
+def config_key(config: Dict[str, Any]) -> str:
+    """Stable short hash of a JSON-serializable configuration."""
+    text = json.dumps(
+        {"version": STORE_VERSION, **config}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class FeatureStore:
+    """Arrays cached under ``root/<name>/<config key>/<array>.npy``."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, name: str, config: Dict[str, Any]) -> str:
+        """Directory holding the arrays of ``name`` built with ``config``."""
+        return os.path.join(self.root, name, config_key(config))
+
+    def load(
+        self, name: str, config: Dict[str, Any], mmap_mode: Optional[str] = "r"
+    ) -> Optional[Arrays]:
+        """The cached arrays, memory-mapped, or None if not built yet."""
+        directory = self.path(name, config)
+        if not os.path.exists(os.path.join(directory, CONFIG_FILE)):
+            return None
+        return {
+            entry[: -len(".npy")]: np.load(
+                os.path.join(directory, entry), mmap_mode=mmap_mode
+            )
+            for entry in sorted(os.listdir(directory))
+            if entry.endswith(".npy")
+        }
+
+    def save(
+        self,
+        name: str,
+        config: Dict[str, Any],
+        write: Callable[[str], None],
+    ) -> str:
+        """Build an entry by calling ``write(directory)`` and publish it.
+
+        ``write`` saves ``.npy`` files into the directory it is given,
+        which is private until it returns; the entry then appears in
+        one rename, so an interrupted build never leaves a partial cache
+        behind and concurrent builders cannot mix their files.
+        """
+        directory = self.path(name, config)
+        parent = os.path.dirname(directory)
+        os.makedirs(parent, exist_ok=True)
+
+        staging = tempfile.mkdtemp(prefix=".build-", dir=parent)
+        try:
+            write(staging)
+            with open(os.path.join(staging, CONFIG_FILE), "w") as f:
+                json.dump(config, f, indent=2, sort_keys=True, default=str)
+            try:
+                os.rename(staging, directory)
+            except OSError:
+                # Someone else published the same entry first; theirs is as good.
+                if not os.path.exists(os.path.join(directory, CONFIG_FILE)):
+                    raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return directory
+
+    def cached(
+        self,
+        name: str,
+        config: Dict[str, Any],
+        build: Callable[[], Arrays],
+    ) -> Arrays:
+        """Load ``name`` for ``config``, building and saving it first if needed.
+
+        ``build`` returns the arrays in memory; use ``save`` directly for
+        results too large for that. Either way the arrays returned are
+        the memory-mapped files.
+        """
+        arrays = self.load(name, config)
+        if arrays is None:
+            built = build()
+
+            def write(directory: str) -> None:
+                for key, array in built.items():
+                    np.save(os.path.join(directory, f"{key}.npy"), _savable(array))
+
+            self.save(name, config, write)
+            del built
+            arrays = self.load(name, config)
+        return arrays
+
+    def clear(self, name: Optional[str] = None) -> None:
+        """Delete every cached entry of ``name``, or the whole store."""
+        shutil.rmtree(
+            os.path.join(self.root, name) if name else self.root, ignore_errors=True
+        )
+
+
+def _savable(array: np.ndarray) -> np.ndarray:
+    # Object arrays would need pickling and cannot be memory-mapped; the
+    # ids stored here are strings, which have a fixed-width dtype.
+    array = np.asarray(array)
+    if array.dtype == object:
+        return array.astype(str)
+    return array
+
+
+def clean_onestop(
+    frame,
+    min_duration: float = 80,
+    max_duration: float = 1000,
+    ordinary_reading: bool = True,
+):
+    """Blocks 1 to 3 of the encoder notebook: filter, clean, select.
+
+    Keeps ordinary-reading trials (``question_preview == False``) when
+    ``ordinary_reading`` is set, drops fixations with a blink around them
+    or a duration outside ``[min_duration, max_duration]``, and fills the
+    missing saccade values of each trial's first fixation with 0.
+    """
+    import pandas as pd
+
+    keep = np.ones(len(frame), dtype=bool)
+    if ordinary_reading and "question_preview" in frame.columns:
+        keep &= (frame["question_preview"] == False).to_numpy()  # noqa: E712
+    keep &= (frame["CURRENT_FIX_BLINK_AROUND"] == "NONE").to_numpy()
+    duration = frame["CURRENT_FIX_DURATION"]
+    keep &= duration.between(min_duration, max_duration).to_numpy()
+
+    cleaned = frame.loc[keep].copy()
+    for column in ("PREVIOUS_SAC_AMPLITUDE", "PREVIOUS_SAC_AVG_VELOCITY"):
+        cleaned[column] = pd.to_numeric(cleaned[column], errors="coerce").fillna(0)
+    return cleaned
+
+
+def onestop_config(
+    csv_path: str,
+    feature_columns: Sequence[str] = ONESTOP_FEATURE_NAMES,
+    length: int = SEQUENCE_LENGTH,
+    step: int = STEP,
+    min_duration: float = 80,
+    max_duration: float = 1000,
+    ordinary_reading: bool = True,
+    dtype: str = "float32",
+) -> Dict[str, Any]:
+    """Everything the OneStop windows depend on, as hashed for the store."""
+    return {
+        "corpus": "onestop",
+        "source": file_fingerprint(csv_path),
+        "features": list(feature_columns),
+        "sequence_length": length,
+        "step": step,
+        "min_duration": min_duration,
+        "max_duration": max_duration,
+        "ordinary_reading": ordinary_reading,
+        "dtype": dtype,
+    }
+
+
+def onestop_windows(
+    csv_path: str, store: FeatureStore, **kwargs: Any
+) -> WindowedTable:
+    """The OneStop feature table and window index, from the store when possible.
+
+    Keyword arguments are those of ``onestop_config``. The first call
+    reads only the columns it needs from ``csv_path``, cleans them
+    (``clean_onestop``) and saves the per-trial feature table, the window
+    index and every window, materialized straight into the cache file.
+    Later calls with the same arguments and an unchanged CSV return
+    memory-mapped arrays without touching the CSV.
+    """
+    arrays = _load_onestop(csv_path, store, **kwargs)
+    return WindowedTable(
+        features=arrays["features"],
+        offsets=arrays["offsets"],
+        starts=arrays["starts"],
+        codes=arrays["codes"],
+        participants=arrays["participants"],
+        length=int(arrays["windows"].shape[1]),
+    )
+
+
+def load_windows(csv_path: str, store: FeatureStore, **kwargs: Any) -> np.ndarray:
+    """The memory-mapped ``(n_windows, length, n_features)`` OneStop windows.
+
+    Window ``i`` is the one starting at ``onestop_windows(...).starts[i]``,
+    so the indices from ``split_windows`` select from it directly.
+    """
+    return _load_onestop(csv_path, store, **kwargs)["windows"]
+
+
+def _load_onestop(csv_path: str, store: FeatureStore, **kwargs: Any) -> Arrays:
+    config = onestop_config(csv_path, **kwargs)
+    arrays = store.load("onestop", config)
+    if arrays is None:
+        store.save(
+            "onestop",
+            config,
+            lambda directory: _write_onestop(directory, csv_path, config),
+        )
+        arrays = store.load("onestop", config)
+    return arrays
+
+
+def _write_onestop(directory: str, csv_path: str, config: Dict[str, Any]) -> None:
+    import pandas as pd
+
+    needed = {
+        "participant_id",
+        "TRIAL_INDEX",
+        "CURRENT_FIX_BLINK_AROUND",
+        "CURRENT_FIX_DURATION",
+        "PREVIOUS_SAC_AMPLITUDE",
+        "PREVIOUS_SAC_AVG_VELOCITY",
+        *config["features"],
+    }
+    if config["ordinary_reading"]:
+        needed.add("question_preview")
+    frame = pd.read_csv(
+        csv_path, usecols=lambda column: column in needed, low_memory=False
+    )
+    frame = clean_onestop(
+        frame,
+        config["min_duration"],
+        config["max_duration"],
+        config["ordinary_reading"],
+    )
+    table = build_windows(
+        frame,
+        config["features"],
+        length=config["sequence_length"],
+        step=config["step"],
+        dtype=np.dtype(config["dtype"]),
+    )
+    del frame
+
+    for key in ("features", "offsets", "starts", "codes", "participants"):
+        np.save(os.path.join(directory, f"{key}.npy"), _savable(getattr(table, key)))
+    windows = np.lib.format.open_memmap(
+        os.path.join(directory, "windows.npy"),
+        mode="w+",
+        dtype=table.features.dtype,
+        shape=(len(table.starts), table.length) + table.features.shape[1:],
+    )
+    take_windows(table.features, table.starts, table.length, out=windows)
+    windows.flush()
+    del windows
+
+
+def etdd70_task_files(
+    base_path: str, participant_id: Any, task: str
+) -> Optional[Tuple[str, str]]:
+    """The fixation and saccade CSVs of one task, or None if either is missing."""
+    found = []
+    for kind in ("fixations", "saccades"):
+        pattern = f"Subject_{participant_id}_*_{task}_{kind}.csv"
+        matches = sorted(
+            glob.glob(os.path.join(base_path, ETDD70_DATA_DIR, pattern))
+        )
+        if not matches:
+            return None
+        found.append(matches[0])
+    return found[0], found[1]
+
+
+def etdd70_features(
+    fixations,
+    saccades,
+    min_duration: float = 80,
+    max_duration: float = 1000,
+    screen: Sequence[float] = ETDD70_SCREEN,
+) -> np.ndarray:
+    """Block 1 of the reading profile notebook for one task, up to the scaler.
+
+    Pairs each fixation with the saccade before it, fills missing values
+    with 0, drops fixations lasting outside ``[min_duration,
+    max_duration]`` and normalizes positions by the screen size and
+    amplitudes by its diagonal.
+
+    Returns:
+        ``(n, 5)`` float64 array of ``MODEL_FEATURE_NAMES``.
+    """
+    import pandas as pd
+
+    fixations = fixations.rename(columns=str.strip)
+    saccades = saccades.rename(columns=str.strip).shift(1)
+    # Built like the notebook's trial_df, so fixation and saccade tables of
+    # different lengths are aligned on their index the same way.
+    trial = pd.DataFrame(
+        {
+            "fixation_duration": fixations["duration_ms"],
+            "fixation_x": fixations["fix_x"],
+            "fixation_y": fixations["fix_y"],
+            "saccade_amplitude_in": saccades["ampl"],
+            "saccade_velocity_in": saccades["avg_vel"],
+        }
+    ).fillna(0)
+    trial = trial[trial["fixation_duration"].between(min_duration, max_duration)]
+
+    width, height = screen
+    return np.column_stack(
+        [
+            trial["fixation_duration"].to_numpy(np.float64),
+            trial["fixation_x"].to_numpy(np.float64) / width,
+            trial["fixation_y"].to_numpy(np.float64) / height,
+            trial["saccade_amplitude_in"].to_numpy(np.float64)
+            / np.sqrt(width**2 + height**2),
+            trial["saccade_velocity_in"].to_numpy(np.float64),
+        ]
+    ).reshape(-1, len(MODEL_FEATURE_NAMES))
+
+
+def etdd70_config(
+    base_path: str,
+    scaler: Any = None,
+    length: int = SEQUENCE_LENGTH,
+    step: int = STEP,
+    min_duration: float = 80,
+    max_duration: float = 1000,
+    tasks: Sequence[str] = ETDD70_TASKS,
+    screen: Sequence[float] = ETDD70_SCREEN,
+    dtype: str = "float32",
+) -> Dict[str, Any]:
+    """Everything the ETDD70 windows depend on, as hashed for the store.
+
+    ``base_path`` is the ``precomputed_events`` directory. ``scaler`` is
+    the fitted ``StandardScaler`` of Phase 1 (``scaler.pkl``), applied
+    before windowing as in the notebook, or None to keep the features
+    unscaled; its mean and scale are part of the key.
+    """
+    sources = [file_fingerprint(os.path.join(base_path, ETDD70_LABELS_FILE))]
+    for task in tasks:
+        for kind in ("fixations", "saccades"):
+            pattern = os.path.join(
+                base_path, ETDD70_DATA_DIR, f"Subject_*_{task}_{kind}.csv"
+            )
+            for path in sorted(glob.glob(pattern)):
+                sources.append(file_fingerprint(path))
+    return {
+        "corpus": "etdd70",
+        "sources": sources,
+        "scaler": None
+        if scaler is None
+        else {
+            "mean": np.asarray(scaler.mean_, dtype=np.float64).tolist(),
+            "scale": np.asarray(scaler.scale_, dtype=np.float64).tolist(),
+        },
+        "sequence_length": length,
+        "step": step,
+        "min_duration": min_duration,
+        "max_duration": max_duration,
+        "tasks": list(tasks),
+        "screen": list(screen),
+        "dtype": dtype,
+    }
+
+
+def etdd70_windows(base_path: str, store: FeatureStore, **kwargs: Any) -> Arrays:
+    """The ETDD70 windows of every participant and task, from the store when possible.
+
+    Keyword arguments are those of ``etdd70_config``. The arrays are
+    memory-mapped: ``features`` and ``offsets`` (one trial per
+    participant and task with data, participants in sorted order),
+    ``windows`` and, for each window, its ``starts`` row, participant
+    ``codes`` (indices into ``participants``) and ``tasks`` (indices into
+    the tasks); ``labels`` holds each participant's dyslexia label (1 for
+    dyslexic). The packed inputs of Block 2 are then, per task:
+
+        syllables = arrays["tasks"] == 0
+        X_syl = pad_windows(
+            arrays["features"], arrays["starts"][syllables],
+            arrays["codes"][syllables], len(arrays["participants"]),
+            SEQUENCE_LENGTH, max_len,
+        )
+    """
+    config = etdd70_config(base_path, **kwargs)
+    return store.cached("etdd70", config, lambda: _build_etdd70(base_path, config))
+
+
+def _build_etdd70(base_path: str, config: Dict[str, Any]) -> Arrays:
+    import pandas as pd
+
+    labels = pd.read_csv(os.path.join(base_path, ETDD70_LABELS_FILE))
+    labels = labels.drop_duplicates("subject_id").set_index("subject_id")["label"]
+    participants = np.array(sorted(labels.index.unique()))
+
+    tables, trial_codes, trial_tasks = [], [], []
+    for code, participant in enumerate(participants):
+        for task_index, task in enumerate(config["tasks"]):
+            files = etdd70_task_files(base_path, participant, task)
+            if files is None:
+                continue
+            fixations, saccades = (pd.read_csv(path) for path in files)
+            tables.append(
+                etdd70_features(
+                    fixations,
+                    saccades,
+                    config["min_duration"],
+                    config["max_duration"],
+                    config["screen"],
+                )
+            )
+            trial_codes.append(code)
+            trial_tasks.append(task_index)
+
+    features = np.concatenate(
+        tables or [np.zeros((0, len(MODEL_FEATURE_NAMES)))]
+    )
+    if config["scaler"] is not None:
+        features = (features - config["scaler"]["mean"]) / config["scaler"]["scale"]
+    features = features.astype(config["dtype"])
+    offsets = trial_offsets([len(table) for table in tables])
+    starts, trials = window_starts(offsets, config["sequence_length"], config["step"])
+    return {
+        "features": features,
+        "offsets": offsets,
+        "starts": starts,
+        "codes": np.asarray(trial_codes, dtype=np.int64)[trials],
+        "tasks": np.asarray(trial_tasks, dtype=np.int64)[trials],
+        "participants": participants,
+        "labels": (labels.loc[participants] != "non-dyslexic")
+        .to_numpy()
+        .astype(np.int64),
+        "windows": take_windows(features, starts, config["sequence_length"]),
+    }
+
+
+def webcam_config(
+    json_paths: Sequence[str],
+    velocity_threshold: float = webcam.VELOCITY_THRESHOLD_NORM,
+    min_duration: float = webcam.MIN_FIXATION_MS,
+    max_duration: float = webcam.MAX_FIXATION_MS,
+    length: int = SEQUENCE_LENGTH,
+    step: int = STEP,
+    conditions: Sequence[str] = webcam.INCLUDED_CONDITIONS,
+) -> Dict[str, Any]:
+    """Everything the webcam target windows depend on, as hashed for the store.
+
+    The windows follow the order of ``json_paths``, so it is part of the
+    key as well as each file's fingerprint.
+    """
+    return {
+        "corpus": "webcam",
+        "sources": [file_fingerprint(path) for path in json_paths],
+        "velocity_threshold": velocity_threshold,
+        "min_duration": min_duration,
+        "max_duration": max_duration,
+        "sequence_length": length,
+        "step": step,
+        "conditions": list(conditions),
+    }
+
+
+def webcam_windows(
+    json_paths: Sequence[str],
+    store: FeatureStore,
+    workers: Optional[int] = None,
+    **kwargs: Any,
+) -> Arrays:
+    """The scaled webcam target windows, from the store when possible.
+
+    Keyword arguments are those of ``webcam_config``. The first call runs
+    ``webcam.ingest`` with ``workers`` processes and ``webcam.build_target``
+    into the new entry, which keeps the ingestion log next to the arrays:
+    ``windows`` (``X_target.npy``), ``codes`` and ``participants`` (the
+    participant of each window and their ids) and ``mean`` and ``scale``
+    (the target scaler). Files that could not be read are left out and
+    reported in the log, as without the store.
+    """
+    config = webcam_config(json_paths, **kwargs)
+    arrays = store.load("webcam", config)
+    if arrays is None:
+        store.save(
+            "webcam",
+            config,
+            lambda directory: _write_webcam(directory, json_paths, config, workers),
+        )
+        arrays = store.load("webcam", config)
+    return arrays
+
+
+def _write_webcam(
+    directory: str,
+    json_paths: Sequence[str],
+    config: Dict[str, Any],
+    workers: Optional[int],
+) -> None:
+    scratch = os.path.join(directory, "ingest")
+    results = webcam.ingest(
+        json_paths,
+        scratch,
+        workers=workers,
+        velocity_threshold=config["velocity_threshold"],
+        min_duration=config["min_duration"],
+        max_duration=config["max_duration"],
+        length=config["sequence_length"],
+        step=config["step"],
+        conditions=tuple(config["conditions"]),
+    )
+    webcam.build_target(results, scratch, config["sequence_length"], config["step"])
+
+    for name, target in (
+        (webcam.TARGET_FILE, "windows.npy"),
+        (webcam.CODES_FILE, "codes.npy"),
+        (webcam.IDS_FILE, "participants.npy"),
+        (webcam.LOG_FILE, webcam.LOG_FILE),
+    ):
+        os.replace(os.path.join(scratch, name), os.path.join(directory, target))
+    with np.load(os.path.join(scratch, webcam.SCALER_FILE)) as scaler:
+        for key in ("mean", "scale"):
+            np.save(os.path.join(directory, f"{key}.npy"), scaler[key])
+    shutil.rmtree(scratch)
@@ -0,0 +1,478 @@
+"""Adversarial domain adaptation of the dyslexia classifier to webcam gaze.
+
+Block 8 of ``webcam/notebooks/2_webqam_gaze_uda.ipynb`` as a reusable
+trainer. The training itself is unchanged: each step first trains the
+discriminator to tell the frozen source encoder's embeddings (expert
+eye tracker) from the adapting encoder's (webcam), then trains the whole
+classifier on labelled source participants while pushing the webcam
+embeddings to fool the discriminator, weighted by ``LAMBDA``.
+
+What changes is everything around the step:
+
+- A whole epoch runs in one compiled ``tf.function``, looping over the
+  dataset iterator in the graph; the notebook ran one Python iteration,
+  a progress-bar update and a host sync (``float(d)``) per step.
+- Source and target windows are independent, reshuffled, repeating
+  ``tf.data`` streams (in-memory or memory-mapped, via
+  ``pipeline.window_dataset``) zipped with the labelled participants and
+  prefetched, with fixed batch shapes so the step is traced once.
+- The classifier's encoder runs once on all windows of a batch rather
+  than through ``TimeDistributed``, which Keras unrolls into one encoder
+  copy per window (82 LSTM stacks to trace and run): the step traces
+  in seconds instead of minutes and runs several times faster.
+- Validation uses compiled forward passes instead of ``Model.predict``.
+- ``mixed_precision=True`` rebuilds the models with the
+  ``mixed_float16`` policy and scales the losses.
+- Models, optimizers, the epoch counter and the best score are
+  checkpointed every ``checkpoint_every`` epochs; a trainer created with
+  the same ``checkpoint_dir`` resumes where the last run stopped.
+- Every epoch logs its wall time next to the losses and scores.
+
+``tests/test_uda.py`` trains briefly on generated data and resumes from
+the checkpoint.
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import keras
+import numpy as np
+import tensorflow as tf
+
+from lexora_ml.pipeline import window_dataset
+
+EPOCHS = 500
+BATCH_SIZE = 64
+LAMBDA = 0.1
+CLASSIFIER_LR = 0.001
+DISCRIMINATOR_LR = 0.002
+SHUFFLE_BUFFER = 10000
+# Notebook rule for keeping a model: F1 at least this, discriminator
+# accuracy closer to chance than any earlier epoch.
+MIN_BEST_F1 = 0.80
+VALIDATION_WINDOWS = 1000
+
+CLASSIFIER_FILE = "dyslexia_uda_classifier.h5"
+ENCODER_FILE = "dyslexia_uda_encoder.h5"
+
+
+def build_discriminator(embedding_size: int = 64) -> keras.Model:
+    """The notebook's domain discriminator over window embeddings."""
+    inputs = keras.Input(shape=(embedding_size,))
+    x = keras.layers.Dense(64)(inputs)
+    x = keras.layers.ReLU()(x)
+    x = keras.layers.Dropout(0.2)(x)
+    x = keras.layers.Dense(32)(x)
+    x = keras.layers.ReLU()(x)
+    outputs = keras.layers.Dense(1, activation="sigmoid")(x)
+    return keras.Model(inputs=inputs, outputs=outputs, name="discriminator")
+
+
+def find_encoder(classifier: keras.Model) -> keras.Model:
+    """The shared window encoder inside a profile classifier."""
+    for layer in classifier.layers:
+        if isinstance(layer, keras.layers.TimeDistributed):
+            return layer.layer
+    try:
+        return classifier.get_layer("gaze_encoder")
+    except ValueError:
+        raise ValueError(f"No window encoder found in {classifier.name}") from None
+
+
+def split_classifier(
+    classifier: keras.Model,
+) -> Tuple[keras.Model, Optional[List[keras.layers.Layer]]]:
+    """The window encoder of a classifier and, if it is a plain chain
+    ``input -> TimeDistributed(encoder) -> head...``, the head layers."""
+    layers = classifier.layers
+    if (
+        len(classifier.inputs) == 1
+        and len(layers) > 2
+        and isinstance(layers[1], keras.layers.TimeDistributed)
+        and all(len(layer._inbound_nodes) == 1 for layer in layers[2:])
+    ):
+        return layers[1].layer, layers[2:]
+    return find_encoder(classifier), None
+
+
+def run_classifier(
+    classifier: keras.Model,
+    encoder: keras.Model,
+    head: Optional[List[keras.layers.Layer]],
+    x: tf.Tensor,
+    training: bool = False,
+) -> tf.Tensor:
+    """The classifier's risk for ``(n, windows, 20, 5)`` participants.
+
+    Keras' ``TimeDistributed`` unrolls a Python loop over the windows,
+    putting one copy of the LSTM encoder per window into the graph. With
+    the ``encoder`` and ``head`` of ``split_classifier`` this runs the
+    encoder once on all windows of the batch instead, then the head layers
+    in order: the same function of the same weights, traced and run far
+    faster. Without a head it calls the classifier itself.
+    """
+    if head is None:
+        return tf.cast(classifier(x, training=training), tf.float32)
+
+    shape = tf.shape(x)
+    windows = tf.reshape(x, tf.concat([[-1], shape[2:]], axis=0))
+    embeddings = encoder(windows, training=training)
+    y = tf.reshape(embeddings, tf.concat([shape[:2], [-1]], axis=0))
+    for layer in head:
+        y = layer(y, training=training)
+    return tf.cast(y, tf.float32)
+
+
+def with_dtype_policy(model: keras.Model, policy: str) -> keras.Model:
+    """A copy of ``model`` whose layers use ``policy``, with the same weights."""
+
+    def convert(config: Any) -> Any:
+        if isinstance(config, dict):
+            if config.get("class_name") == "DTypePolicy":
+                return {**config, "config": {**config["config"], "name": policy}}
+            return {key: convert(value) for key, value in config.items()}
+        if isinstance(config, list):
+            return [convert(value) for value in config]
+        return config
+
+    copy = model.__class__.from_config(convert(model.get_config()))
+    copy.set_weights(model.get_weights())
+    return copy
+
+
+def macro_f1(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+    """Macro-averaged F1 of binary labels, as ``f1_score(average="macro")``."""
+    scores = []
+    for label in (0, 1):
+        true_positive = np.sum((y_pred == label) & (y_true == label))
+        predicted = np.sum(y_pred == label)
+        actual = np.sum(y_true == label)
+        if predicted + actual == 0:
+            continue
+        scores.append(2 * true_positive / (predicted + actual))
+    return float(np.mean(scores)) if scores else 0.0
+
+
+class UDATrainer:
+    """Adapts a profile classifier's encoder to a new gaze domain.
+
+    Args:
+        classifier: Source profile classifier (``(n, windows, 20, 5)`` ->
+            risk); trained in place, encoder included.
+        source_encoder: Frozen pretrained encoder giving the reference
+            source embeddings.
+        discriminator: Domain discriminator; built like the notebook's
+            if None.
+        lambda_: Weight of the adversarial loss.
+        classifier_lr, discriminator_lr: Adam learning rates.
+        mixed_precision: Train with the ``mixed_float16`` policy.
+        checkpoint_dir: Where to checkpoint and resume from; None to
+            train without checkpoints.
+        max_checkpoints: Checkpoints kept in ``checkpoint_dir``.
+    """
+
+    def __init__(
+        self,
+        classifier: keras.Model,
+        source_encoder: keras.Model,
+        discriminator: Optional[keras.Model] = None,
+        lambda_: float = LAMBDA,
+        classifier_lr: float = CLASSIFIER_LR,
+        discriminator_lr: float = DISCRIMINATOR_LR,
+        mixed_precision: bool = False,
+        checkpoint_dir: Optional[str] = None,
+        max_checkpoints: int = 3,
+    ):
+        self.mixed_precision = mixed_precision
+        if mixed_precision:
+            classifier = with_dtype_policy(classifier, "mixed_float16")
+            source_encoder = with_dtype_policy(source_encoder, "mixed_float16")
+            if discriminator is not None:
+                discriminator = with_dtype_policy(discriminator, "mixed_float16")
+        if discriminator is None:
+            embedding_size = source_encoder.output_shape[-1]
+            discriminator = build_discriminator(embedding_size)
+            if mixed_precision:
+                discriminator = with_dtype_policy(discriminator, "mixed_float16")
+
+        self.classifier = classifier
+        self.classifier.trainable = True
+        self.encoder, self._head = split_classifier(classifier)
+        self.encoder.trainable = True
+        self.source_encoder = source_encoder
+        self.source_encoder.trainable = False
+        self.discriminator = discriminator
+        self.lambda_ = lambda_
+
+        self.d_optimizer = keras.optimizers.Adam(
+            learning_rate=discriminator_lr, beta_1=0.5
+        )
+        self.g_optimizer = keras.optimizers.Adam(learning_rate=classifier_lr)
+        if mixed_precision:
+            self.d_optimizer = keras.optimizers.LossScaleOptimizer(self.d_optimizer)
+            self.g_optimizer = keras.optimizers.LossScaleOptimizer(self.g_optimizer)
+        # Built up front so that restoring a checkpoint fills their state
+        # immediately rather than on the first step.
+        self.d_optimizer.build(self.discriminator.trainable_variables)
+        self.g_optimizer.build(self.classifier.trainable_variables)
+        self.bce_loss = keras.losses.BinaryCrossentropy()
+
+        self.epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.best_d_diff = tf.Variable(np.inf, dtype=tf.float64, trainable=False)
+        self.manager: Optional[tf.train.CheckpointManager] = None
+        if checkpoint_dir is not None:
+            checkpoint = tf.train.Checkpoint(
+                classifier=self.classifier,
+                discriminator=self.discriminator,
+                d_optimizer=self.d_optimizer,
+                g_optimizer=self.g_optimizer,
+                epoch=self.epoch,
+                best_d_diff=self.best_d_diff,
+            )
+            self.manager = tf.train.CheckpointManager(
+                checkpoint, checkpoint_dir, max_to_keep=max_checkpoints
+            )
+            if self.manager.latest_checkpoint:
+                checkpoint.restore(self.manager.latest_checkpoint).assert_consumed()
+
+        self._run_steps = tf.function(self._run_steps_impl)
+        self._classify = tf.function(lambda x: self.classify(x, training=False))
+        self._embed_source = tf.function(
+            lambda x: self.source_encoder(x, training=False)
+        )
+        self._embed_target = tf.function(lambda x: self.encoder(x, training=False))
+        self._discriminate = tf.function(lambda x: self.discriminate(x))
+
+    def datasets(
+        self,
+        source: np.ndarray,
+        target: np.ndarray,
+        x_train: np.ndarray,
+        y_train: np.ndarray,
+        batch_size: int = BATCH_SIZE,
+        shuffle_buffer: int = SHUFFLE_BUFFER,
+        seed: Optional[int] = None,
+    ) -> Tuple[tf.data.Dataset, int]:
+        """The endless training stream and the number of steps in an epoch.
+
+        Each element is ``((source_windows, target_windows), (x, y))``.
+        An epoch is ``min(len(source), len(target)) // batch_size`` steps,
+        as in the notebook, but each domain is reshuffled and repeated on
+        its own, so every window is eventually used instead of only the
+        first ``min_len`` of the larger domain. The labelled set is
+        repeated before batching so every batch has the same shape, even
+        with fewer participants than ``batch_size``.
+        """
+        steps = min(len(source), len(target)) // batch_size
+        if steps == 0:
+            raise ValueError(f"Fewer than {batch_size} source or target windows")
+
+        def domain(windows: np.ndarray) -> tf.data.Dataset:
+            return (
+                window_dataset(windows)
+                .shuffle(min(shuffle_buffer, len(windows)), seed=seed)
+                .repeat()
+            )
+
+        adversarial = tf.data.Dataset.zip((domain(source), domain(target))).batch(
+            batch_size, drop_remainder=True
+        )
+        labels = np.asarray(y_train, dtype=np.float32).reshape(-1, 1)
+        labelled = (
+            tf.data.Dataset.from_tensor_slices((x_train, labels))
+            .shuffle(len(labels), seed=seed)
+            .repeat()
+            .batch(min(batch_size, len(labels)), drop_remainder=True)
+        )
+        dataset = tf.data.Dataset.zip((adversarial, labelled))
+        return dataset.prefetch(tf.data.AUTOTUNE), steps
+
+    def _train_step(
+        self, adversarial_batch: Tuple[tf.Tensor, tf.Tensor], labelled_batch: Tuple
+    ) -> tf.Tensor:
+        source_seq, target_seq = adversarial_batch
+        classif_x, classif_y = labelled_batch
+
+        with tf.GradientTape() as tape:
+            real_embeds = self.source_encoder(source_seq, training=False)
+            fake_embeds = self.encoder(target_seq, training=False)
+            real_pred = self.discriminate(real_embeds, training=True)
+            fake_pred = self.discriminate(fake_embeds, training=True)
+            d_loss_real = self.bce_loss(tf.ones_like(real_pred), real_pred)
+            d_loss_fake = self.bce_loss(tf.zeros_like(fake_pred), fake_pred)
+            d_loss = (d_loss_real + d_loss_fake) * 0.5
+            scaled_d_loss = self._scale(self.d_optimizer, d_loss)
+
+        d_variables = self.discriminator.trainable_variables
+        d_grads = tape.gradient(scaled_d_loss, d_variables)
+        self.d_optimizer.apply_gradients(zip(d_grads, d_variables))
+
+        with tf.GradientTape() as tape:
+            classif_pred = self.classify(classif_x, training=True)
+            c_loss = self.bce_loss(classif_y, classif_pred)
+            target_embeds = self.encoder(target_seq, training=True)
+            pred_fool = self.discriminate(target_embeds, training=False)
+            g_loss = self.bce_loss(tf.ones_like(pred_fool), pred_fool)
+            total_loss = c_loss + g_loss * self.lambda_
+            scaled_total_loss = self._scale(self.g_optimizer, total_loss)
+
+        g_variables = self.classifier.trainable_variables
+        g_grads = tape.gradient(scaled_total_loss, g_variables)
+        self.g_optimizer.apply_gradients(zip(g_grads, g_variables))
+
+        return tf.stack([d_loss, g_loss, c_loss])
+
+    def classify(self, x: tf.Tensor, training: bool = False) -> tf.Tensor:
+        """The classifier's risk for ``(n, windows, 20, 5)`` participants."""
+        return run_classifier(
+            self.classifier, self.encoder, self._head, x, training=training
+        )
+
+    def discriminate(self, embeddings: tf.Tensor, training: bool = False) -> tf.Tensor:
+        """Probability that embeddings come from the source domain."""
+        return tf.cast(self.discriminator(embeddings, training=training), tf.float32)
+
+    def _scale(
+        self, optimizer: keras.optimizers.Optimizer, loss: tf.Tensor
+    ) -> tf.Tensor:
+        if self.mixed_precision:
+            return optimizer.scale_loss(loss)
+        return loss
+
+    def _run_steps_impl(self, iterator: Any, steps: tf.Tensor) -> tf.Tensor:
+        total = tf.zeros(3)
+        for _ in tf.range(steps):
+            adversarial_batch, labelled_batch = next(iterator)
+            total += self._train_step(adversarial_batch, labelled_batch)
+        return total / tf.cast(steps, tf.float32)
+
+    def train_epoch(self, iterator: Any, steps: int) -> Dict[str, float]:
+        """Run ``steps`` training steps; mean discriminator, adversarial and
+        classification losses."""
+        d_loss, g_loss, c_loss = self._run_steps(
+            iterator, tf.constant(steps, dtype=tf.int64)
+        ).numpy()
+        return {
+            "d_loss": float(d_loss),
+            "g_loss": float(g_loss),
+            "c_loss": float(c_loss),
+        }
+
+    def validate(
+        self,
+        x_val: np.ndarray,
+        y_val: np.ndarray,
+        source: np.ndarray,
+        target: np.ndarray,
+        batch_size: int = BATCH_SIZE,
+        n_windows: int = VALIDATION_WINDOWS,
+    ) -> Tuple[float, float]:
+        """Classifier macro F1 on the validation participants, and the
+        discriminator's accuracy on the first ``n_windows`` of each domain."""
+
+        def predict(function: Callable, x: np.ndarray) -> np.ndarray:
+            return np.concatenate(
+                [
+                    function(tf.constant(x[i : i + batch_size])).numpy()
+                    for i in range(0, len(x), batch_size)
+                ]
+            )
+
+        y_pred = (predict(self._classify, x_val) > 0.5).astype(int).ravel()
+        f1 = macro_f1(np.asarray(y_val).ravel(), y_pred)
+
+        s_embeds = predict(self._embed_source, np.asarray(source[:n_windows]))
+        t_embeds = predict(self._embed_target, np.asarray(target[:n_windows]))
+        embeds = np.concatenate([s_embeds, t_embeds])
+        labels = np.concatenate([np.ones(len(s_embeds)), np.zeros(len(t_embeds))])
+        d_preds = (predict(self._discriminate, embeds) > 0.5).astype(int).ravel()
+        return f1, float(np.mean(d_preds == labels))
+
+    def fit(
+        self,
+        source: np.ndarray,
+        target: np.ndarray,
+        x_train: np.ndarray,
+        y_train: np.ndarray,
+        x_val: Optional[np.ndarray] = None,
+        y_val: Optional[np.ndarray] = None,
+        epochs: int = EPOCHS,
+        batch_size: int = BATCH_SIZE,
+        checkpoint_every: int = 1,
+        output_dir: Optional[str] = None,
+        seed: Optional[int] = None,
+        log: Callable[[str], None] = print,
+    ) -> List[Dict[str, float]]:
+        """Train until epoch ``epochs``, continuing from the checkpoint if any.
+
+        Args:
+            source: Source-domain windows ``(n, 20, 5)`` with the padding
+                removed, in memory or memory-mapped.
+            target: Target-domain (webcam) windows, likewise.
+            x_train, y_train: Labelled source participants for the
+                classification loss.
+            x_val, y_val: Validation participants; without them no
+                validation is run and no best model is saved.
+            epochs: Total number of epochs, counting resumed ones.
+            batch_size: Windows (and participants) per step.
+            checkpoint_every: Epochs between checkpoints.
+            output_dir: Where the best classifier and encoder are saved
+                (``dyslexia_uda_classifier.h5``/``dyslexia_uda_encoder.h5``).
+            seed: Shuffling seed.
+            log: Receives one line per epoch.
+
+        Returns:
+            One dict per epoch trained in this call: epoch, wall seconds,
+            mean losses and, with validation data, ``f1`` and ``d_acc``.
+        """
+        dataset, steps = self.datasets(
+            source, target, x_train, y_train, batch_size, seed=seed
+        )
+        iterator = iter(dataset)
+        history = []
+
+        start_epoch = int(self.epoch.numpy())
+        if start_epoch:
+            log(f"Resuming after epoch {start_epoch}")
+        for epoch in range(start_epoch + 1, epochs + 1):
+            start = time.perf_counter()
+            row: Dict[str, float] = {"epoch": epoch}
+            row.update(self.train_epoch(iterator, steps))
+            row["train_seconds"] = time.perf_counter() - start
+
+            line = (
+                f"Epoch {epoch}/{epochs}: {row['train_seconds']:.1f} s, "
+                f"D_loss={row['d_loss']:.4f} G_loss={row['g_loss']:.4f} "
+                f"C_loss={row['c_loss']:.4f}"
+            )
+            if x_val is not None and y_val is not None:
+                f1, d_acc = self.validate(x_val, y_val, source, target, batch_size)
+                d_diff = abs(d_acc - 0.5)
+                row.update(f1=f1, d_acc=d_acc)
+                line += f" | F1={f1:.4f} D_Acc={d_acc:.4f} (Diff={d_diff:.4f})"
+                if f1 >= MIN_BEST_F1 and d_diff < self.best_d_diff.numpy():
+                    self.best_d_diff.assign(d_diff)
+                    if output_dir is not None:
+                        self.save(output_dir)
+                        line += " - saved"
+
+            self.epoch.assign(epoch)
+            if self.manager is not None and (
+                epoch % checkpoint_every == 0 or epoch == epochs
+            ):
+                self.manager.save(checkpoint_number=epoch)
+            row["seconds"] = time.perf_counter() - start
+            log(line)
+            history.append(row)
+
+        return history
+
+    def save(self, output_dir: str) -> None:
+        """Save the adapted classifier and encoder as float32 ``.h5`` models."""
+        os.makedirs(output_dir, exist_ok=True)
+        classifier = self.classifier
+        if self.mixed_precision:
+            classifier = with_dtype_policy(classifier, "float32")
+        classifier.save(os.path.join(output_dir, CLASSIFIER_FILE))
+        find_encoder(classifier).save(os.path.join(output_dir, ENCODER_FILE))
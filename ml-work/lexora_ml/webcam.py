@@ -0,0 +1,392 @@
+"""Parallel ingestion of the webcam gaze corpus.
+
+Block 4 of ``webcam/notebooks/2_webqam_gaze_uda.ipynb`` reads one
+participant file at a time: ``json.load``, a second ``json.loads`` of the
+``webgazer_raw_data`` string, a Python dict per gaze point, a DataFrame
+per trial, and everything kept in memory until the scaler is fitted and
+the windows are built. Here the same steps are split in two:
+
+1. ``ingest`` fans the files out over a process pool. Each worker parses
+   a file's nested gaze arrays straight into NumPy (one ``np.array`` call
+   per trial, falling back to the notebook's point-by-point checks only
+   for trials with malformed points), detects the fixations of all its
+   natural-reading trials at once with ``detect_fixations_batch`` and
+   writes the participant's feature table to its own ``.npz`` file. Only
+   a small ``FileResult`` (counts, running feature statistics and
+   per-stage timings) travels back to the parent, which appends it to
+   ``ingest_log.csv`` as soon as it arrives.
+2. ``build_target`` merges the statistics into the target scaler and
+   streams the participant files, one at a time, into a memory-mapped
+   ``X_target.npy``.
+
+Peak memory is one participant per worker plus the windows' output
+pages, however large the corpus. The filtering, fixation parameters,
+scaling and window order are those of the notebook.
+
+Run from ``ml-work``:
+
+    python -m lexora_ml.webcam JSON_DIR OUT_DIR --workers 8
+
+``tests/test_webcam.py`` checks the results against the notebook
+implementation.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lexora_ml.fixations import (
+    MODEL_FEATURE_NAMES,
+    detect_fixations_batch,
+    fixation_features,
+    trial_offsets,
+)
+from lexora_ml.windows import SEQUENCE_LENGTH, STEP, take_windows, window_starts
+
+INCLUDED_CONDITIONS = ("nr",)
+VELOCITY_THRESHOLD_NORM = 0.5
+MIN_FIXATION_MS = 50
+MAX_FIXATION_MS = 1500
+
+PARTICIPANTS_DIR = "participants"
+LOG_FILE = "ingest_log.csv"
+TARGET_FILE = "X_target.npy"
+CODES_FILE = "participant_codes.npy"
+IDS_FILE = "participant_ids.npy"
+SCALER_FILE = "target_scaler.npz"
+
+STAGES = ("read", "parse", "detect", "write")
+
+
+class FileResult(NamedTuple):
+    """What a worker reports about one participant file."""
+
+    path: str
+    output: Optional[str]
+    """The participant's ``.npz`` file, or None if nothing was kept."""
+    participant_id: Optional[str]
+    trials: int
+    fixations: int
+    windows: int
+    points: int
+    points_filtered: int
+    mean: np.ndarray
+    """Per-feature mean of the kept fixations."""
+    m2: np.ndarray
+    """Per-feature sum of squared deviations from ``mean``."""
+    seconds: Dict[str, float]
+    """Time spent in each of ``STAGES``."""
+    error: Optional[str] = None
+
+
+def _parse_points(
+    points: list, width: float, height: float
+) -> Tuple[np.ndarray, int]:
+    """Normalized on-screen (x, y, t) rows of a trial, and how many were dropped.
+
+    Points that are too short or hold a None are skipped without being
+    counted, unparseable and off-screen points are counted as filtered,
+    as in the notebook.
+    """
+    try:
+        raw = np.array(points, dtype=np.float64)
+        if raw.ndim != 2 or raw.shape[1] < 3:
+            raise ValueError("not a table of points")
+        raw = raw[:, :3]
+        raw = raw[~np.isnan(raw).any(axis=1)]
+        filtered = 0
+    except (ValueError, TypeError):
+        rows = []
+        filtered = 0
+        for p in points:
+            if len(p) >= 3 and all(value is not None for value in p[:3]):
+                try:
+                    rows.append((float(p[0]), float(p[1]), float(p[2])))
+                except (ValueError, TypeError):
+                    filtered += 1
+        raw = np.array(rows, dtype=np.float64).reshape(-1, 3)
+
+    raw[:, 0] /= width
+    raw[:, 1] /= height
+    x, y = raw[:, 0], raw[:, 1]
+    on_screen = (x >= 0.0) & (x <= 1.0) & (y >= 0.0) & (y <= 1.0)
+    return raw[on_screen], filtered + int(len(raw) - on_screen.sum())
+
+
+def process_file(
+    path: str,
+    output: str,
+    velocity_threshold: float = VELOCITY_THRESHOLD_NORM,
+    min_duration: float = MIN_FIXATION_MS,
+    max_duration: float = MAX_FIXATION_MS,
+    length: int = SEQUENCE_LENGTH,
+    step: int = STEP,
+    conditions: Sequence[str] = INCLUDED_CONDITIONS,
+) -> FileResult:
+    """Turn one participant file into a feature table saved at ``output``.
+
+    The ``.npz`` holds ``features`` (``(n, 5)``, ``MODEL_FEATURE_NAMES``,
+    unscaled), ``offsets`` (trial boundaries) and ``trials`` (trial
+    names); it is only written if at least one trial has ``length``
+    fixations. Errors are reported in the result instead of raised, so
+    one bad file does not stop a whole ingestion.
+    """
+    seconds = dict.fromkeys(STAGES, 0.0)
+    empty = np.zeros(len(MODEL_FEATURE_NAMES))
+    result = FileResult(path, None, None, 0, 0, 0, 0, 0, empty, empty, seconds)
+
+    try:
+        start = time.perf_counter()
+        with open(path, "r") as f:
+            participant_data = json.load(f)
+        seconds["read"] = time.perf_counter() - start
+
+        participant_id = str(
+            participant_data.get("participant", os.path.basename(path))
+        )
+        result = result._replace(participant_id=participant_id)
+        raw_gaze_str = participant_data.get("webgazer_raw_data", None)
+        width = participant_data.get("screen_x", None)
+        height = participant_data.get("screen_y", None)
+        if not raw_gaze_str or not width or not height or width <= 0 or height <= 0:
+            return result
+
+        start = time.perf_counter()
+        trial_conditions = {}
+        for i, trial_name in enumerate(participant_data.get("set_trials", [])):
+            if f"trial_{i}_condition" in participant_data:
+                trial_conditions[trial_name] = participant_data[f"trial_{i}_condition"]
+        del participant_data
+
+        names, trials, points, filtered = [], [], 0, 0
+        for trial_name, gaze_points in json.loads(raw_gaze_str).items():
+            if trial_conditions.get(trial_name) not in conditions:
+                continue
+            if not isinstance(gaze_points, list) or len(gaze_points) < 2:
+                continue
+            rows, dropped = _parse_points(gaze_points, width, height)
+            points += len(gaze_points)
+            filtered += dropped
+            names.append(trial_name)
+            trials.append(rows)
+        seconds["parse"] = time.perf_counter() - start
+        result = result._replace(points=points, points_filtered=filtered)
+        if not trials:
+            return result
+
+        start = time.perf_counter()
+        xyt = np.concatenate(trials)
+        offsets = trial_offsets([len(rows) for rows in trials])
+        fixations, fixation_offsets = detect_fixations_batch(
+            xyt[:, 0],
+            xyt[:, 1],
+            xyt[:, 2],
+            offsets,
+            velocity_threshold,
+            min_duration,
+            max_duration,
+        )
+        features = fixation_features(fixations, fixation_offsets)
+
+        counts = np.diff(fixation_offsets)
+        kept = counts >= length
+        features = features[np.repeat(kept, counts)]
+        offsets = trial_offsets(counts[kept])
+        starts, _ = window_starts(offsets, length, step)
+        seconds["detect"] = time.perf_counter() - start
+        if not kept.any():
+            return result
+
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        np.savez(
+            output,
+            features=features,
+            offsets=offsets,
+            trials=np.array(names)[kept],
+            participant_id=np.array(participant_id),
+        )
+        seconds["write"] = time.perf_counter() - start
+
+        mean = features.mean(axis=0)
+        return result._replace(
+            output=output,
+            trials=int(kept.sum()),
+            fixations=len(features),
+            windows=len(starts),
+            mean=mean,
+            m2=((features - mean) ** 2).sum(axis=0),
+        )
+    except Exception as e:
+        return result._replace(error=f"{type(e).__name__}: {e}")
+
+
+def ingest(
+    json_paths: Sequence[str],
+    out_dir: str,
+    workers: Optional[int] = None,
+    **kwargs,
+) -> List[FileResult]:
+    """Process participant files in parallel into ``out_dir``.
+
+    Keyword arguments are passed to ``process_file``. Each finished file
+    is appended to ``out_dir/ingest_log.csv`` as it completes; the
+    results are returned in the order of ``json_paths`` (the order of
+    the windows ``build_target`` writes).
+    """
+    os.makedirs(os.path.join(out_dir, PARTICIPANTS_DIR), exist_ok=True)
+    results: List[Optional[FileResult]] = [None] * len(json_paths)
+
+    with open(os.path.join(out_dir, LOG_FILE), "w", newline="") as log_file:
+        log = csv.writer(log_file)
+        log.writerow(
+            ["file", "participant", "trials", "fixations", "windows", "points",
+             "points_filtered", *(f"{stage}_ms" for stage in STAGES), "error"]
+        )
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    process_file,
+                    path,
+                    os.path.join(out_dir, PARTICIPANTS_DIR, f"{index:06d}.npz"),
+                    **kwargs,
+                ): index
+                for index, path in enumerate(json_paths)
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                log.writerow(
+                    [os.path.basename(result.path), result.participant_id,
+                     result.trials, result.fixations, result.windows,
+                     result.points, result.points_filtered,
+                     *(f"{result.seconds[stage] * 1000:.1f}" for stage in STAGES),
+                     result.error or ""]
+                )
+                log_file.flush()
+
+    return results
+
+
+def merge_stats(results: Sequence[FileResult]) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and population standard deviation of every kept fixation.
+
+    What ``StandardScaler().fit`` finds on all the feature tables
+    concatenated, merged from the per-file statistics (Chan et al.), with
+    a scale of 1 for constant features as the scaler uses.
+    """
+    count = 0
+    mean = np.zeros(len(MODEL_FEATURE_NAMES))
+    m2 = np.zeros(len(MODEL_FEATURE_NAMES))
+    for result in results:
+        if result.output is None:
+            continue
+        n = result.fixations
+        delta = result.mean - mean
+        total = count + n
+        mean = mean + delta * n / total
+        m2 = m2 + result.m2 + delta**2 * count * n / total
+        count = total
+    if count == 0:
+        raise ValueError("No participant has enough fixations")
+
+    scale = np.sqrt(m2 / count)
+    scale[scale == 0] = 1.0
+    return mean, scale
+
+
+def build_target(
+    results: Sequence[FileResult],
+    out_dir: str,
+    length: int = SEQUENCE_LENGTH,
+    step: int = STEP,
+) -> np.ndarray:
+    """Write the scaled windows of every participant to ``X_target.npy``.
+
+    Also writes ``target_scaler.npz`` (``mean`` and ``scale``, the
+    ``StandardScaler`` attributes), ``participant_ids.npy`` and
+    ``participant_codes.npy`` (the participant of each window, an index
+    into the ids; the notebook's ``participant_map_target.pkl``).
+    Returns the memory-mapped windows.
+    """
+    kept = [result for result in results if result.output is not None]
+    mean, scale = merge_stats(kept)
+    np.savez(os.path.join(out_dir, SCALER_FILE), mean=mean, scale=scale)
+
+    total = sum(result.windows for result in kept)
+    target = np.lib.format.open_memmap(
+        os.path.join(out_dir, TARGET_FILE),
+        mode="w+",
+        dtype=np.float32,
+        shape=(total, length, len(MODEL_FEATURE_NAMES)),
+    )
+    codes = np.empty(total, dtype=np.int64)
+    ids = []
+
+    position = 0
+    for result in kept:
+        with np.load(result.output) as participant:
+            scaled = ((participant["features"] - mean) / scale).astype(np.float32)
+            starts, _ = window_starts(participant["offsets"], length, step)
+        end = position + len(starts)
+        take_windows(scaled, starts, length, out=target[position:end])
+        codes[position:end] = len(ids)
+        ids.append(result.participant_id)
+        position = end
+
+    target.flush()
+    np.save(os.path.join(out_dir, CODES_FILE), codes)
+    np.save(os.path.join(out_dir, IDS_FILE), np.array(ids, dtype=str))
+    return target
+
+
+def format_timings(
+    results: Sequence[FileResult], wall_seconds: float, slowest: int = 5
+) -> str:
+    """Summary of where the ingestion time went, and the slowest files."""
+    errors = [result for result in results if result.error]
+    busy = {stage: sum(result.seconds[stage] for result in results) for stage in STAGES}
+    per_file = sorted(results, key=lambda result: -sum(result.seconds.values()))
+    lines = [
+        f"{len(results)} files in {wall_seconds:.1f} s "
+        f"({sum(busy.values()):.1f} s of worker time); "
+        f"{sum(result.windows for result in results)} windows, {len(errors)} errors",
+        "  " + ", ".join(f"{stage} {seconds:.1f} s" for stage, seconds in busy.items()),
+        "  slowest:",
+    ]
+    for result in per_file[:slowest]:
+        lines.append(
+            f"    {os.path.basename(result.path)}: "
+            f"{sum(result.seconds.values()) * 1000:.0f} ms, {result.points} points"
+        )
+    for result in errors[:slowest]:
+        lines.append(f"  error in {os.path.basename(result.path)}: {result.error}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("json_dir", help="directory of participant .json files")
+    parser.add_argument("out_dir", help="where to write the results")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="processes (default: CPUs)"
+    )
+    args = parser.parse_args(argv)
+
+    paths = sorted(glob.glob(os.path.join(args.json_dir, "*.json")))
+    start = time.perf_counter()
+    results = ingest(paths, args.out_dir, workers=args.workers)
+    target = build_target(results, args.out_dir)
+    print(format_timings(results, time.perf_counter() - start))
+    print(f"Wrote {target.shape} to {os.path.join(args.out_dir, TARGET_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Sliding-window datasets built from strided views.
+
+Array version of Blocks 4 and 5 of ``eye-tracker/notebooks/0_one_stop_encoder.ipynb``
+(and of the per-task sequencing in ``1_the_reading_profile_model.ipynb``).
+The notebook loops over ``groupby`` groups appending every window to a
+list, builds ``participant_map`` the same way and then selects each split
+with ``pid in train_participants``, one linear search per window. Here:
+
+1. The fixation table is ordered by trial once and kept as a single
+   ``(n_rows, n_features)`` array; trial ``i`` is
+   ``[offsets[i], offsets[i + 1])``.
+2. Every window of every trial is described by the row it starts on
+   (``window_starts``), computed for all trials at once.
+3. ``window_view`` is a read-only strided view of *all* windows of the
+   table, ``(n_rows - length + 1, length, n_features)``, without copying.
+4. Participants are integer codes (``np.unique(..., return_inverse=True)``)
+   carried alongside the windows, so a split is a boolean lookup table
+   indexed by code instead of a search.
+5. Only the selected windows are copied, once, into the final array
+   (``take_windows``), optionally in chunks into a preallocated or
+   memory-mapped ``out``.
+
+Scaling commutes with windowing, so ``window_stats`` computes the
+``StandardScaler`` statistics of the training windows from the row table
+(each row weighted by the number of windows containing it) and the rows
+are scaled before the windows are taken, not after.
+``tests/test_windows.py`` checks the results against the notebook
+implementation.
+"""
+
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lexora_ml.fixations import trial_offsets
+
+SEQUENCE_LENGTH = 20
+STEP = 5
+
+ONESTOP_FEATURE_NAMES = [
+    "CURRENT_FIX_DURATION",
+    "CURRENT_FIX_X",
+    "CURRENT_FIX_Y",
+    "PREVIOUS_SAC_AMPLITUDE",
+    "PREVIOUS_SAC_AVG_VELOCITY",
+]
+
+
+class WindowedTable(NamedTuple):
+    """A feature table and the windows over it, before any copy is made."""
+
+    features: np.ndarray
+    """``(n_rows, n_features)`` rows ordered by trial."""
+    offsets: np.ndarray
+    """Trial boundaries in ``features``, ``n_trials + 1`` entries."""
+    starts: np.ndarray
+    """Row each window starts on, in trial order."""
+    codes: np.ndarray
+    """Participant code of each window, an index into ``participants``."""
+    participants: np.ndarray
+    """Sorted unique participant ids."""
+    length: int
+    """Rows per window."""
+
+
+def window_starts(
+    offsets: np.ndarray, length: int, step: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """First row of every window of every trial.
+
+    A trial of ``n`` rows has ``(n - length) // step + 1`` windows if
+    ``n >= length`` and none otherwise, starting at rows ``0, step, ...``
+    of the trial, exactly like the notebook's ``range`` loop.
+
+    Returns:
+        Tuple of (starts, trial): the starting row of each window and the
+        trial it belongs to.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    lengths = np.diff(offsets)
+    counts = np.where(lengths >= length, (lengths - length) // step + 1, 0)
+    trial = np.repeat(np.arange(len(lengths)), counts)
+    # Position of each window within its trial: 0, 1, ... restarting per trial.
+    first = trial_offsets(counts)[:-1]
+    position = np.arange(len(trial)) - np.repeat(first, counts)
+    return offsets[:-1][trial] + position * step, trial
+
+
+def window_view(features: np.ndarray, length: int) -> np.ndarray:
+    """Read-only view of every ``length``-row window of ``features``.
+
+    Window ``i`` is ``features[i : i + length]``; the result has shape
+    ``(max(n_rows - length + 1, 0), length, n_features)`` and shares
+    memory with ``features``.
+    """
+    if len(features) < length:
+        return np.empty((0, length) + features.shape[1:], dtype=features.dtype)
+    view = np.lib.stride_tricks.sliding_window_view(
+        features, (length,) + features.shape[1:]
+    )
+    return view.reshape(view.shape[0], length, *features.shape[1:])
+
+
+def take_windows(
+    features: np.ndarray,
+    starts: np.ndarray,
+    length: int,
+    out: Optional[np.ndarray] = None,
+    chunk_size: int = 65536,
+) -> np.ndarray:
+    """Copy the windows starting at ``starts`` into one contiguous array.
+
+    This is the only place windows are materialized. ``out`` may be any
+    writable ``(len(starts), length, n_features)`` array of the same
+    dtype as ``features``, including an ``np.lib.format.open_memmap``; it
+    is filled ``chunk_size`` windows at a time so the copy never needs
+    more than the output itself.
+    """
+    view = window_view(features, length)
+    if out is None:
+        out = np.empty((len(starts), length) + features.shape[1:], features.dtype)
+    for begin in range(0, len(starts), chunk_size):
+        end = min(begin + chunk_size, len(starts))
+        np.take(view, starts[begin:end], axis=0, out=out[begin:end])
+    return out
+
+
+def window_stats(
+    features: np.ndarray, starts: np.ndarray, length: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-feature mean and standard deviation over the given windows.
+
+    The same values ``StandardScaler().fit(windows.reshape(-1, n_features))``
+    finds (population standard deviation, 1 where it is 0), computed from
+    the rows without materializing the windows: overlapping windows count
+    a row once per window it is in.
+    """
+    # Coverage of each row: +1 where a window starts, -1 after it ends.
+    cover = np.zeros(len(features) + 1, dtype=np.int64)
+    np.add.at(cover, starts, 1)
+    np.add.at(cover, starts + length, -1)
+    weight = np.cumsum(cover[:-1]).astype(np.float64)
+    total = weight.sum()
+    if total == 0:
+        raise ValueError("No windows to compute statistics from")
+
+    mean = weight @ features / total
+    variance = weight @ (features - mean) ** 2 / total
+    std = np.sqrt(variance)
+    std[std == 0] = 1.0
+    return mean, std
+
+
+def build_windows(
+    frame,
+    feature_columns: Sequence[str] = ONESTOP_FEATURE_NAMES,
+    participant_column: str = "participant_id",
+    trial_column: str = "TRIAL_INDEX",
+    length: int = SEQUENCE_LENGTH,
+    step: int = STEP,
+    dtype=np.float32,
+) -> WindowedTable:
+    """Index the windows of a fixation table, as Block 4 would build them.
+
+    Rows are grouped by (participant, trial) in sorted key order, keeping
+    their order within a trial, the order ``DataFrame.groupby`` iterates
+    in. ``frame`` is read once into a ``(n_rows, n_features)`` array of
+    ``dtype``; nothing else is copied until ``take_windows``.
+
+    Args:
+        frame: ``pandas.DataFrame`` of fixations, like ``df_features``.
+        feature_columns: Columns forming each window's features.
+        participant_column, trial_column: Columns identifying a trial.
+        length: Fixations per window (``SEQUENCE_LENGTH``).
+        step: Fixations between window starts (``STEP``).
+        dtype: Dtype of the feature table and so of the windows.
+    """
+    participants, participant_codes = np.unique(
+        frame[participant_column].to_numpy(), return_inverse=True
+    )
+    participant_codes = participant_codes.reshape(-1)
+    _, trial_codes = np.unique(frame[trial_column].to_numpy(), return_inverse=True)
+    trial_codes = trial_codes.reshape(-1)
+
+    order = np.lexsort((trial_codes, participant_codes))
+    features = frame[list(feature_columns)].to_numpy(dtype=dtype)
+    if np.any(order != np.arange(len(order))):
+        features = features[order]
+        participant_codes = participant_codes[order]
+        trial_codes = trial_codes[order]
+
+    boundary = np.flatnonzero(
+        (np.diff(participant_codes) != 0) | (np.diff(trial_codes) != 0)
+    )
+    offsets = np.concatenate(([0], boundary + 1, [len(features)])).astype(np.int64)
+    if len(features) == 0:
+        offsets = offsets[:1]
+
+    starts, _ = window_starts(offsets, length, step)
+    return WindowedTable(
+        features=features,
+        offsets=offsets,
+        starts=starts,
+        codes=participant_codes[starts],
+        participants=participants,
+        length=length,
+    )
+
+
+def split_windows(
+    table: WindowedTable, *participant_groups: Sequence
+) -> List[np.ndarray]:
+    """Window indices belonging to each group of participant ids.
+
+    ``split_windows(table, train_participants, val_participants,
+    test_participants)`` returns the train, validation and test indices
+    of Block 5, in window order.
+    """
+    indices = []
+    for group in participant_groups:
+        selected = np.isin(table.participants, np.asarray(group))
+        indices.append(np.flatnonzero(selected[table.codes]))
+    return indices
+
+
+def pad_windows(
+    features: np.ndarray,
+    starts: np.ndarray,
+    groups: np.ndarray,
+    n_groups: int,
+    length: int,
+    max_windows: int,
+) -> np.ndarray:
+    """Windows of each group, truncated or zero-padded to ``max_windows``.
+
+    The packing of Block 2 of the reading profile notebook: the result is
+    ``(n_groups, max_windows, length, n_features)``, where group ``g``
+    holds its first ``max_windows`` windows (``groups`` must list the
+    windows of a group in order) followed by zeros.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    counts = np.bincount(groups, minlength=n_groups)
+    order = np.argsort(groups, kind="stable")
+    position = np.empty(len(groups), dtype=np.int64)
+    position[order] = np.arange(len(groups)) - np.repeat(
+        trial_offsets(counts)[:-1], counts
+    )
+    keep = position < max_windows
+
+    out = np.zeros(
+        (n_groups, max_windows, length) + features.shape[1:], dtype=features.dtype
+    )
+    out[groups[keep], position[keep]] = take_windows(features, starts[keep], length)
+    return out
+
@@ -0,0 +1,462 @@
+"""Original notebook implementations, kept to check the vectorized versions.
+
+The code below is copied from the notebooks with only the progress prints
+removed. Do not optimize it: its whole purpose is to be the baseline that
+the faster implementations are compared against.
+"""
+
+import numpy as np
+
+
+# --- webcam/notebooks/2_webqam_gaze_uda.ipynb, Block 3 ---
+
+
+def get_euclidean_distance(p1, p2):
+    """Euclidean distance between two (x, y) tuples."""
+    return np.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+
+
+def smooth_points(points, alpha=0.5):
+    if not points:
+        return []
+
+    smoothed = []
+    prev_x = points[0]['x']
+    prev_y = points[0]['y']
+
+    smoothed.append(points[0])
+
+    for i in range(1, len(points)):
+        curr = points[i]
+        new_x = alpha * curr['x'] + (1 - alpha) * prev_x
+        new_y = alpha * curr['y'] + (1 - alpha) * prev_y
+
+        smoothed.append({'x': new_x, 'y': new_y, 't': curr['t']})
+
+        prev_x = new_x
+        prev_y = new_y
+
+    return smoothed
+
+
+def detect_fixations(gaze_points_list, velocity_threshold_px_per_sec=1000, min_duration_ms=50, do_smoothing=True):
+    if len(gaze_points_list) < 2:
+        return []
+
+    if do_smoothing:
+        process_points = smooth_points(gaze_points_list, alpha=0.5)
+    else:
+        process_points = gaze_points_list
+
+    fixations = []
+    velocities = [0.0]
+
+    for i in range(1, len(process_points)):
+        p1, p2 = process_points[i-1], process_points[i]
+
+        if any(k not in p1 or k not in p2 for k in ('x','y','t')):
+            velocities.append(0.0)
+            continue
+
+        dist_px = get_euclidean_distance((p1['x'], p1['y']), (p2['x'], p2['y']))
+        time_diff_sec = (p2['t'] - p1['t']) / 1000.0
+
+        if time_diff_sec > 0:
+            velocity = dist_px / time_diff_sec
+        else:
+            velocity = 0.0
+
+        velocities.append(velocity)
+
+    current_fixation_points = []
+
+    for i, point in enumerate(process_points):
+        velocity = velocities[i]
+
+        if velocity < velocity_threshold_px_per_sec:
+            current_fixation_points.append(point)
+        else:
+            if current_fixation_points:
+                dur = current_fixation_points[-1]['t'] - current_fixation_points[0]['t']
+                if dur >= min_duration_ms:
+                    mean_x = np.mean([p['x'] for p in current_fixation_points])
+                    mean_y = np.mean([p['y'] for p in current_fixation_points])
+                    fixations.append({'duration': dur, 'x': mean_x, 'y': mean_y})
+                current_fixation_points = []
+
+    if current_fixation_points:
+        dur = current_fixation_points[-1]['t'] - current_fixation_points[0]['t']
+        if dur >= min_duration_ms:
+            mean_x = np.mean([p['x'] for p in current_fixation_points])
+            mean_y = np.mean([p['y'] for p in current_fixation_points])
+            fixations.append({'duration': dur, 'x': mean_x, 'y': mean_y})
+
+    return fixations
+
+
+# --- webcam/notebooks/2_webqam_gaze_uda.ipynb, Block 4 (feature engineering) ---
+
+
+def fixation_features(fixations):
+    import pandas as pd
+
+    fix_df = pd.DataFrame(fixations)
+
+    fix_df["CURRENT_FIX_X"] = fix_df["x"]
+    fix_df["CURRENT_FIX_Y"] = fix_df["y"]
+    fix_df["CURRENT_FIX_DURATION"] = fix_df["duration"]
+
+    fix_df["PREV_X"] = fix_df["CURRENT_FIX_X"].shift(1)
+    fix_df["PREV_Y"] = fix_df["CURRENT_FIX_Y"].shift(1)
+    fix_df.fillna(0, inplace=True)
+
+    dx = fix_df["CURRENT_FIX_X"] - fix_df["PREV_X"]
+    dy = fix_df["CURRENT_FIX_Y"] - fix_df["PREV_Y"]
+    fix_df["PREVIOUS_SAC_AMPLITUDE"] = np.sqrt(dx**2 + dy**2)
+
+    fix_df["IS_REGRESSION"] = np.where(
+        fix_df["CURRENT_FIX_X"] < fix_df["PREV_X"], 1, 0
+    )
+
+    return fix_df[[
+        "CURRENT_FIX_DURATION",
+        "CURRENT_FIX_X",
+        "CURRENT_FIX_Y",
+        "PREVIOUS_SAC_AMPLITUDE",
+        "IS_REGRESSION"
+    ]].to_numpy(dtype=np.float64)
+
+
+# --- eye-tracker/notebooks/0_one_stop_encoder.ipynb, Blocks 4 and 5 (up to scaling) ---
+
+
+def build_sequences(df_features, SEQUENCE_LENGTH, STEP, train_participants, val_participants, test_participants):
+    grouped = df_features.groupby(['participant_id', 'TRIAL_INDEX'])
+
+    all_sequences = []
+
+    model_feature_names = [
+        'CURRENT_FIX_DURATION', 'CURRENT_FIX_X', 'CURRENT_FIX_Y',
+        'PREVIOUS_SAC_AMPLITUDE', 'PREVIOUS_SAC_AVG_VELOCITY'
+    ]
+
+    for name, group in grouped:
+        trial_features = group[model_feature_names].values
+
+        if len(trial_features) >= SEQUENCE_LENGTH:
+            for i in range(0, len(trial_features) - SEQUENCE_LENGTH + 1, STEP):
+                sequence = trial_features[i:i + SEQUENCE_LENGTH]
+                all_sequences.append(sequence)
+
+    X = np.array(all_sequences)
+
+    participant_map = []
+    for name, group in grouped:
+        trial_len = len(group)
+        if trial_len >= SEQUENCE_LENGTH:
+            num_sequences_in_trial = (trial_len - SEQUENCE_LENGTH) // STEP + 1
+            participant_map.extend([name[0]] * num_sequences_in_trial)
+
+    train_indices = [i for i, pid in enumerate(participant_map) if pid in train_participants]
+    val_indices = [i for i, pid in enumerate(participant_map) if pid in val_participants]
+    test_indices = [i for i, pid in enumerate(participant_map) if pid in test_participants]
+
+    X_train = X[train_indices]
+    X_val = X[val_indices]
+    X_test = X[test_indices]
+
+    return X_train, X_val, X_test
+
+
+# --- webcam/notebooks/2_webqam_gaze_uda.ipynb, Block 4 (feature extraction loop) ---
+
+
+def webcam_trial_features(json_file_paths, SEQUENCE_LENGTH=20, VELOCITY_THRESHOLD_NORM=0.5, MIN_FIXATION_MS=50, MAX_FIXATION_MS=1500):
+    import json
+    import os
+    import warnings
+
+    import pandas as pd
+
+    MODEL_FEATURE_NAMES = [
+        "CURRENT_FIX_DURATION",
+        "CURRENT_FIX_X",
+        "CURRENT_FIX_Y",
+        "PREVIOUS_SAC_AMPLITUDE",
+        "IS_REGRESSION"
+    ]
+
+    raw_trial_data = []
+
+    total_points_processed = 0
+    total_points_filtered = 0
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+
+        for file_path in json_file_paths:
+            try:
+                with open(file_path, "r") as f:
+                    participant_data = json.load(f)
+
+                participant_id = participant_data.get("participant", os.path.basename(file_path))
+                raw_gaze_str = participant_data.get("webgazer_raw_data", None)
+
+                if not raw_gaze_str:
+                    continue
+
+                webcam_width = participant_data.get("screen_x", None)
+                webcam_height = participant_data.get("screen_y", None)
+
+                if not webcam_width or not webcam_height or webcam_width <= 0 or webcam_height <= 0:
+                    continue
+
+                trial_conditions = {}
+                if 'set_trials' in participant_data:
+                    for i, t_name in enumerate(participant_data['set_trials']):
+                        cond_key = f"trial_{i}_condition"
+                        if cond_key in participant_data:
+                            trial_conditions[t_name] = participant_data[cond_key]
+
+                raw_gaze_dict = json.loads(raw_gaze_str)
+
+                for trial_name, gaze_points_list in raw_gaze_dict.items():
+                    if trial_conditions.get(trial_name) != 'nr':
+                        continue
+
+                    if not isinstance(gaze_points_list, list) or len(gaze_points_list) < 2:
+                        continue
+
+                    points = []
+                    for p in gaze_points_list:
+                        total_points_processed += 1
+                        if len(p) >= 3 and p[0] is not None and p[1] is not None and p[2] is not None:
+                            try:
+                                px, py, pt = float(p[0]), float(p[1]), float(p[2])
+
+                                px_norm = px / webcam_width
+                                py_norm = py / webcam_height
+
+                                if (px_norm < 0.0) or (px_norm > 1.0) or (py_norm < 0.0) or (py_norm > 1.0):
+                                    total_points_filtered += 1
+                                    continue
+
+                                points.append({'x': px_norm, 'y': py_norm, 't': pt})
+                            except (ValueError, TypeError):
+                                total_points_filtered += 1
+                                continue
+
+                    if len(points) < 2:
+                        continue
+
+                    fixations = detect_fixations(points,
+                                                 velocity_threshold_px_per_sec=VELOCITY_THRESHOLD_NORM,
+                                                 min_duration_ms=MIN_FIXATION_MS,
+                                                 do_smoothing=True)
+
+                    if not fixations:
+                        continue
+
+                    fixations = [f for f in fixations if f["duration"] <= MAX_FIXATION_MS]
+
+                    if len(fixations) < SEQUENCE_LENGTH:
+                        continue
+
+                    # Block 4 keeps the DataFrame; the array is easier to compare.
+                    raw_trial_data.append((participant_id, fixation_features(fixations)))
+
+            except Exception as e:
+                continue
+
+    return raw_trial_data, total_points_processed, total_points_filtered
+
+
+# --- eye-tracker/notebooks/1_the_reading_profile_model.ipynb, Block 1 ---
+
+
+def process_task_for_participant(participant_id, task_name, DATA_PATH, scaler, SEQUENCE_LENGTH=20, STEP=5):
+    import glob
+    import os
+
+    import pandas as pd
+
+    SCREEN_WIDTH_PX = 1680
+    SCREEN_HEIGHT_PX = 1050
+    SCREEN_DIAGONAL_PX = np.sqrt(SCREEN_WIDTH_PX**2 + SCREEN_HEIGHT_PX**2)
+
+    # Find the relevant fixation and saccade files
+    fix_file_pattern = os.path.join(DATA_PATH, f'Subject_{participant_id}_*_{task_name}_fixations.csv')
+    sacc_file_pattern = os.path.join(DATA_PATH, f'Subject_{participant_id}_*_{task_name}_saccades.csv')
+
+    fix_file = glob.glob(fix_file_pattern)
+    sacc_file = glob.glob(sacc_file_pattern)
+
+    if not fix_file or not sacc_file:
+        return np.array([]) # Return empty array if data is missing for this task
+
+    # Load data and strip whitespace from column names to prevent KeyErrors
+    fix_df = pd.read_csv(fix_file[0])
+    fix_df.columns = fix_df.columns.str.strip()
+    sacc_df = pd.read_csv(sacc_file[0])
+    sacc_df.columns = sacc_df.columns.str.strip()
+
+    # Align saccade data with the FOLLOWING fixation
+    sacc_df_shifted = sacc_df.shift(1)
+
+    # Combine the necessary columns into a new DataFrame
+    trial_df = pd.DataFrame({
+        'fixation_duration': fix_df['duration_ms'],
+        'fixation_x': fix_df['fix_x'],
+        'fixation_y': fix_df['fix_y'],
+        'saccade_amplitude_in': sacc_df_shifted['ampl'],
+        'saccade_velocity_in': sacc_df_shifted['avg_vel']
+    })
+
+    # Clean and Normalize
+    trial_df.fillna(0, inplace=True)
+    trial_df = trial_df[trial_df['fixation_duration'].between(80, 1000)].copy()
+
+    # Perform spatial normalization
+    trial_df['x_norm'] = trial_df['fixation_x'] / SCREEN_WIDTH_PX
+    trial_df['y_norm'] = trial_df['fixation_y'] / SCREEN_HEIGHT_PX
+    trial_df['amp_norm'] = trial_df['saccade_amplitude_in'] / SCREEN_DIAGONAL_PX
+
+    # **CRITICAL FIX**: Apply the Phase 1 scaler to the FINAL harmonized features
+    kinematic_features = ['fixation_duration', 'x_norm', 'y_norm', 'amp_norm', 'saccade_velocity_in']
+
+    # Ensure the dataframe has the columns in the correct order for the scaler
+    feature_df = trial_df[kinematic_features]
+    scaled_features = scaler.transform(feature_df)
+
+    # Create sequences from the SCALED features
+    sequences = []
+    for i in range(0, len(scaled_features) - SEQUENCE_LENGTH + 1, STEP):
+        sequences.append(scaled_features[i:i+SEQUENCE_LENGTH])
+
+    return np.array(sequences)
+
+
+# --- eye-tracker/notebooks/0_one_stop_encoder.ipynb, training Block 1 ---
+
+
+def masking_dataset(X_train, BATCH_SIZE=256, MASK_FRACTION=0.15):
+    import tensorflow as tf
+
+    def mask_sequence(sequence):
+        masked_sequence = sequence.copy()
+        seq_len, n_features = sequence.shape
+
+        n_to_mask = int(np.ceil(seq_len * MASK_FRACTION))
+
+        mask_indices = np.random.choice(seq_len, n_to_mask, replace=False)
+
+        masked_sequence[mask_indices] = 0.0
+
+        return masked_sequence, sequence
+
+    def tf_masking_generator(dataset):
+        for sequence in dataset:
+            yield mask_sequence(sequence)
+
+    output_signature = (
+        tf.TensorSpec(shape=(X_train.shape[1], X_train.shape[2]), dtype=tf.float32),
+        tf.TensorSpec(shape=(X_train.shape[1], X_train.shape[2]), dtype=tf.float32)
+    )
+
+    train_dataset = tf.data.Dataset.from_generator(
+        lambda: tf_masking_generator(X_train),
+        output_signature=output_signature
+    )
+
+    train_dataset = train_dataset.shuffle(buffer_size=10000).batch(BATCH_SIZE).prefetch(tf.data.AUTOTUNE)
+
+    return train_dataset
+
+
+# --- webcam/notebooks/2_webqam_gaze_uda.ipynb, Blocks 10 and 11 (without plots) ---
+
+
+def population_analysis(model, X_flat, p_map):
+    import pandas as pd
+
+    p_dict = {}
+    for idx, p_id in enumerate(p_map):
+        if p_id not in p_dict:
+            p_dict[p_id] = []
+        p_dict[p_id].append(idx)
+
+    SEQ_PER_SUBJECT = 82
+    SEQ_LEN = 20
+    N_FEATURES = 5
+
+    X_subjects = []
+    subject_ids = []
+    dropped_subjects = 0
+
+    for p_id, indices in p_dict.items():
+        person_seqs = X_flat[indices]
+
+        if len(person_seqs) < SEQ_PER_SUBJECT:
+            padding = np.zeros((SEQ_PER_SUBJECT - len(person_seqs), SEQ_LEN, N_FEATURES))
+            person_block = np.vstack([person_seqs, padding])
+
+            if len(person_seqs) < 10:
+                dropped_subjects += 1
+                continue
+
+        elif len(person_seqs) > SEQ_PER_SUBJECT:
+            person_block = person_seqs[:SEQ_PER_SUBJECT]
+
+        else:
+            person_block = person_seqs
+
+        X_subjects.append(person_block)
+        subject_ids.append(p_id)
+
+    X_subjects = np.array(X_subjects)
+
+    predictions = model.predict(X_subjects, batch_size=32, verbose=0)
+
+    results_df = pd.DataFrame({
+        'ParticipantID': subject_ids,
+        'Risk_Score': predictions.flatten()
+    })
+
+    results_df['Prediction'] = results_df['Risk_Score'].apply(
+        lambda x: 'High Risk' if x >= 0.5 else 'Low Risk'
+    )
+
+    df_scores = results_df.copy()
+    profile_data = []
+
+    for idx, row in df_scores.iterrows():
+        pid = row['ParticipantID']
+        pred_class = row['Prediction']
+
+        person_data = X_subjects[idx]
+
+        person_flat = person_data.reshape(-1, 5)
+
+        stats_dict = {
+            'ParticipantID': pid,
+            'Group': pred_class,
+            'Fix_Dur_Mean': np.mean(person_flat[:, 0]),
+            'Fix_Dur_Median': np.median(person_flat[:, 0]),
+            'Sacc_Amp_Mean': np.mean(person_flat[:, 3]),
+            'Sacc_Amp_Median': np.median(person_flat[:, 3]),
+            'Regression_Rate': np.mean(person_flat[:, 4]),
+            'Gaze_Stability_X': np.std(person_flat[:, 1]),
+            'Gaze_Stability_Y': np.std(person_flat[:, 2])
+        }
+        profile_data.append(stats_dict)
+
+    df_stats = pd.DataFrame(profile_data)
+
+    valid_counts = []
+    for idx in range(len(X_subjects)):
+        non_zeros = np.sum(np.abs(X_subjects[idx].reshape(82, -1)), axis=1) > 0
+        valid_counts.append(np.sum(non_zeros))
+
+    df_stats['Valid_Sequence_Count'] = valid_counts
+
+    return results_df, df_stats, dropped_subjects
@@ -0,0 +1,45 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+
+def write_webcam_files(root, n_files=24, seed=0):
+    """Participant JSON files shaped like the webcam export, with bad points."""
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(n_files):
+        width, height = 1600, 900
+        trial_names = [f"trial_{k}" for k in range(6)]
+        data = {
+            "participant": f"p{i:03d}",
+            "screen_x": width,
+            "screen_y": height,
+            "set_trials": trial_names,
+        }
+        gaze = {}
+        for k, name in enumerate(trial_names):
+            data[f"trial_{k}_condition"] = str(rng.choice(["nr", "nr", "is"]))
+            n = int(rng.integers(0, 1500))
+            target = np.cumsum(rng.random(n) < 0.08)
+            xy = rng.uniform(-0.05, 1.0, (n + 1, 2))[target]
+            xy += rng.normal(0, 0.004, (n, 2))
+            t = np.cumsum(rng.choice([25, 33, 34, 40], n)).astype(np.float64)
+            points = [[a * width, b * height, c] for (a, b), c in zip(xy, t)]
+            if k == 5 and n > 3:
+                points[1] = [None, 1.0, 2.0]
+                points[2] = ["bad", 1.0, 2.0]
+                points[3] = [1.0]
+            gaze[name] = points
+        data["webgazer_raw_data"] = json.dumps(gaze)
+        path = os.path.join(root, f"participant_{i:03d}.json")
+        with open(path, "w") as f:
+            json.dump(data, f)
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture(scope="session")
+def webcam_files(tmp_path_factory):
+    return write_webcam_files(str(tmp_path_factory.mktemp("webcam")))
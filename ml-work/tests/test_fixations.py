@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import _reference
+from lexora_ml.fixations import (
+    detect_fixations_batch,
+    fixation_features,
+    trial_offsets,
+)
+
+THRESHOLD, MIN_DURATION, MAX_DURATION = 0.5, 50, 1500
+
+
+@pytest.fixture(scope="module")
+def trials():
+    rng = np.random.default_rng(0)
+    trials = []
+    for _ in range(300):
+        n = int(rng.choice([0, 1, 2, 3, int(rng.integers(4, 600))]))
+        # Reading-like gaze at ~30 Hz: jitter around a target that jumps
+        # every dozen samples or so, and some repeated timestamps.
+        target = np.cumsum(rng.random(n) < 0.08)
+        xy = rng.uniform(0.1, 0.9, (n + 1, 2))[target] + rng.normal(0, 0.004, (n, 2))
+        t = np.cumsum(rng.choice([0, 25, 33, 34, 40], n)).astype(np.float64)
+        trials.append((xy[:, 0], xy[:, 1], t))
+    return trials
+
+
+def notebook_fixations(x, y, t):
+    points = [{"x": a, "y": b, "t": c} for a, b, c in zip(x, y, t)]
+    found = _reference.detect_fixations(points, THRESHOLD, MIN_DURATION)
+    return [f for f in found if f["duration"] <= MAX_DURATION]
+
+
+def test_batch_detection_matches_notebook(trials):
+    x = np.concatenate([trial[0] for trial in trials])
+    y = np.concatenate([trial[1] for trial in trials])
+    t = np.concatenate([trial[2] for trial in trials])
+    offsets = trial_offsets([len(trial[2]) for trial in trials])
+
+    fixations, fixation_offsets = detect_fixations_batch(
+        x, y, t, offsets, THRESHOLD, MIN_DURATION, MAX_DURATION
+    )
+    features = fixation_features(fixations, fixation_offsets)
+
+    assert len(fixations) > 0
+    for i, trial in enumerate(trials):
+        expected = notebook_fixations(*trial)
+        got = fixations[fixation_offsets[i] : fixation_offsets[i + 1]]
+        assert len(got) == len(expected), f"trial {i}"
+        if not expected:
+            continue
+        for name in ("duration", "x", "y"):
+            np.testing.assert_allclose(
+                got[name], [f[name] for f in expected], rtol=1e-12, atol=1e-12
+            )
+        np.testing.assert_allclose(
+            features[fixation_offsets[i] : fixation_offsets[i + 1]],
+            _reference.fixation_features(expected),
+            rtol=1e-12,
+            atol=1e-12,
+        )
@@ -0,0 +1,88 @@
+import math
+
+import numpy as np
+import pytest
+import tensorflow as tf
+
+import _reference
+from lexora_ml.pipeline import MASK_FRACTION, mask_timesteps, masked_dataset
+
+N_TO_MASK = int(math.ceil(20 * MASK_FRACTION))
+
+
+@pytest.fixture(scope="module")
+def windows():
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(2000, 20, 5)).astype(np.float32)
+
+
+def collect(dataset):
+    masked, original = zip(*((m.numpy(), o.numpy()) for m, o in dataset))
+    return np.concatenate(masked), np.concatenate(original)
+
+
+def assert_masked(masked, original):
+    zeroed = ~masked.any(axis=-1)
+    assert (zeroed.sum(axis=1) == N_TO_MASK).all()
+    np.testing.assert_array_equal(masked[~zeroed], original[~zeroed])
+
+
+def test_masking_matches_generator(windows):
+    expected = collect(_reference.masking_dataset(windows, 256, MASK_FRACTION))
+    got = collect(masked_dataset(windows, 256, seed=0))
+
+    for masked, original in (expected, got):
+        assert masked.shape == original.shape == windows.shape
+        assert masked.dtype == original.dtype == np.float32
+        assert_masked(masked, original)
+    # Both shuffle, so compare the windows as a set.
+    order = np.lexsort(windows.reshape(len(windows), -1).T)
+    for _, original in (expected, got):
+        np.testing.assert_array_equal(
+            original[np.lexsort(original.reshape(len(original), -1).T)],
+            windows[order],
+        )
+
+
+def test_unshuffled_batches_keep_window_order(windows):
+    masked, original = collect(masked_dataset(windows, 256, shuffle=False, seed=0))
+    np.testing.assert_array_equal(original, windows)
+    assert_masked(masked, original)
+
+
+def test_same_seed_masks_the_same_way(windows):
+    first, _ = collect(masked_dataset(windows, seed=1))
+    again, _ = collect(masked_dataset(windows, seed=1))
+    other, _ = collect(masked_dataset(windows, seed=2))
+    np.testing.assert_array_equal(first, again)
+    assert not np.array_equal(first, other)
+
+
+def test_masks_change_every_epoch_but_repeat_per_seed(windows):
+    def epochs(seed):
+        dataset = masked_dataset(windows, 256, shuffle=False, seed=seed)
+        return [collect(dataset)[0] for _ in range(2)]
+
+    first, second = epochs(1)
+    assert not np.array_equal(first, second)
+    again = epochs(1)
+    np.testing.assert_array_equal(again[0], first)
+    np.testing.assert_array_equal(again[1], second)
+
+
+def test_memory_mapped_windows_are_read_in_order(windows, tmp_path):
+    path = str(tmp_path / "windows.npy")
+    np.save(path, windows)
+    mapped = np.load(path, mmap_mode="r")
+
+    dataset = masked_dataset(mapped, 256, shuffle=False, seed=0)
+    for _ in range(2):  # The second epoch comes from the cache.
+        masked, original = collect(dataset)
+        np.testing.assert_array_equal(original, windows)
+        assert_masked(masked, original)
+
+
+def test_nothing_to_mask_returns_the_windows(windows):
+    batch = tf.constant(windows[:8])
+    masked = mask_timesteps(batch, 0.0, tf.constant([1, 2], dtype=tf.int64))
+    np.testing.assert_array_equal(masked.numpy(), windows[:8])
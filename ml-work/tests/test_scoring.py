@@ -0,0 +1,149 @@
+import os
+import tracemalloc
+
+import keras
+import numpy as np
+import pandas as pd
+import pytest
+
+import _reference
+from lexora_ml.scoring import (
+    COLUMNS,
+    PREDICTIONS_FILE,
+    group_participants,
+    score_target,
+    score_windows,
+)
+from lexora_ml.webcam import CODES_FILE, IDS_FILE, TARGET_FILE
+
+MODEL = os.path.join(
+    os.path.dirname(__file__), "..", "webcam", "models", "dyslexia-profile-model.h5"
+)
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return keras.models.load_model(MODEL, compile=False)
+
+
+class EagerModel:
+    """The classifier behind the notebook's ``model.predict``.
+
+    ``Model.predict`` spends minutes tracing the 82 unrolled encoders of
+    the ``TimeDistributed`` layer; calling the model eagerly gives the
+    same risks.
+    """
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+
+    def predict(self, x, **kwargs):
+        return np.concatenate(
+            [
+                self.classifier([x[i : i + 32]], training=False).numpy()
+                for i in range(0, len(x), 32)
+            ]
+        )
+
+
+def cohort(n, seed=0):
+    # Dropped, padded, exact and truncated participants, plus some without
+    # any window.
+    rng = np.random.default_rng(seed)
+    counts = rng.choice([0, 3, 9, 10, 40, 81, 82, 83, 150], size=n)
+    codes = np.repeat(np.arange(n), counts)
+    windows = rng.normal(size=(len(codes), 20, 5)).astype(np.float32)
+    ids = np.array([f"p{code:05d}" for code in range(n)])
+    return windows, codes, ids
+
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    root = str(tmp_path_factory.mktemp("target"))
+    windows, codes, ids = cohort(30)
+    np.save(os.path.join(root, TARGET_FILE), windows)
+    np.save(os.path.join(root, CODES_FILE), codes)
+    np.save(os.path.join(root, IDS_FILE), ids)
+    return root
+
+
+def assert_matches_notebook(classifier, path, summary, windows, codes, ids):
+    results, stats, dropped = _reference.population_analysis(
+        EagerModel(classifier), np.asarray(windows), ids[codes]
+    )
+    got = pd.read_csv(path)
+    assert list(got.columns) == COLUMNS
+    assert list(got["ParticipantID"]) == list(results["ParticipantID"])
+    assert list(got["Prediction"]) == list(results["Prediction"])
+    np.testing.assert_allclose(
+        got["Risk_Score"], results["Risk_Score"], rtol=1e-4, atol=1e-5
+    )
+    for column in COLUMNS[3:]:
+        np.testing.assert_allclose(
+            got[column], stats[column], rtol=1e-5, atol=1e-6, err_msg=column
+        )
+    assert summary.dropped == dropped
+    assert summary.participants == len(results)
+    assert summary.high_risk == int((results["Prediction"] == "High Risk").sum())
+
+
+def test_score_target_matches_notebook(classifier, data_dir):
+    summary = score_target(classifier, data_dir, batch_size=4, chunk_size=7)
+
+    windows = np.load(os.path.join(data_dir, TARGET_FILE))
+    codes = np.load(os.path.join(data_dir, CODES_FILE))
+    ids = np.load(os.path.join(data_dir, IDS_FILE))
+    path = os.path.join(data_dir, PREDICTIONS_FILE)
+    assert_matches_notebook(classifier, path, summary, windows, codes, ids)
+
+
+def test_shuffled_codes_match_notebook(classifier, data_dir, tmp_path):
+    windows = np.load(os.path.join(data_dir, TARGET_FILE))
+    codes = np.load(os.path.join(data_dir, CODES_FILE))
+    ids = np.load(os.path.join(data_dir, IDS_FILE))
+    shuffled = np.random.default_rng(1).permutation(len(codes))
+    windows, codes = windows[shuffled], codes[shuffled]
+
+    path = str(tmp_path / "shuffled.csv")
+    summary = score_windows(
+        classifier, windows, codes, ids, path, batch_size=4, chunk_size=7
+    )
+    assert_matches_notebook(classifier, path, summary, windows, codes, ids)
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_group_participants(shuffle):
+    _, codes, ids = cohort(50)
+    if shuffle:
+        codes = codes[np.random.default_rng(2).permutation(len(codes))]
+    offsets, first, order = group_participants(codes, len(ids))
+
+    assert (order is None) == (not shuffle)
+    _, first_index = np.unique(codes, return_index=True)
+    np.testing.assert_array_equal(first, np.unique(codes)[np.argsort(first_index)])
+    for participant in range(len(ids)):
+        rows = np.arange(offsets[participant], offsets[participant + 1])
+        if order is not None:
+            rows = order[rows]
+        np.testing.assert_array_equal(rows, np.flatnonzero(codes == participant))
+
+
+def test_memory_does_not_grow_with_the_cohort(classifier, tmp_path):
+    peaks = []
+    for n in (100, 400):
+        windows, codes, ids = cohort(n, seed=n)
+        path = str(tmp_path / f"{n}.npy")
+        np.save(path, windows)
+        del windows
+        mapped = np.load(path, mmap_mode="r")
+        tracemalloc.start()
+        try:
+            score_windows(
+                classifier, mapped, codes, ids, str(tmp_path / f"{n}.csv"),
+                chunk_size=32,
+            )
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        del mapped
+    assert peaks[1] < 1.5 * peaks[0]
@@ -0,0 +1,262 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import _reference
+from lexora_ml import store as store_module
+from lexora_ml.fixations import MODEL_FEATURE_NAMES
+from lexora_ml.store import (
+    ETDD70_DATA_DIR,
+    ETDD70_LABELS_FILE,
+    ETDD70_TASKS,
+    FeatureStore,
+    clean_onestop,
+    config_key,
+    etdd70_windows,
+    load_windows,
+    onestop_config,
+    onestop_windows,
+    webcam_windows,
+)
+from lexora_ml.webcam import CODES_FILE, IDS_FILE, SCALER_FILE, build_target, ingest
+from lexora_ml.windows import (
+    ONESTOP_FEATURE_NAMES,
+    build_windows,
+    take_windows,
+)
+
+CLEAN_ARGUMENTS = ("min_duration", "max_duration", "ordinary_reading")
+
+
+def write_onestop(path, n=20_000, n_participants=20, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame(
+        {
+            "participant_id": rng.integers(0, n_participants, n).astype(str),
+            "TRIAL_INDEX": rng.integers(1, 30, n),
+            "question_preview": rng.random(n) < 0.5,
+            "CURRENT_FIX_BLINK_AROUND": rng.choice(["NONE", "BEFORE"], n, p=[0.9, 0.1]),
+            "CURRENT_FIX_DURATION": rng.integers(40, 1200, n),
+            "CURRENT_FIX_X": rng.uniform(0, 1920, n),
+            "CURRENT_FIX_Y": rng.uniform(0, 1080, n),
+            "PREVIOUS_SAC_AMPLITUDE": np.where(rng.random(n) < 0.05, ".", "1.5"),
+            "PREVIOUS_SAC_AVG_VELOCITY": rng.uniform(0, 300, n),
+            "UNUSED_COLUMN": "x" * 20,
+        }
+    ).sort_values(["participant_id", "TRIAL_INDEX"], kind="stable")
+    frame.to_csv(path, index=False)
+    return path
+
+
+def uncached_onestop(csv_path, **kwargs):
+    clean = {key: kwargs.pop(key) for key in CLEAN_ARGUMENTS if key in kwargs}
+    return build_windows(clean_onestop(pd.read_csv(csv_path), **clean), **kwargs)
+
+
+def entries(root, name):
+    return os.listdir(os.path.join(root, name))
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("rebuilt a cached entry")
+
+
+@pytest.fixture(scope="module")
+def csv_path(tmp_path_factory):
+    return write_onestop(str(tmp_path_factory.mktemp("onestop") / "fixations.csv"))
+
+
+def test_cached_table_matches_clean_onestop(csv_path, tmp_path):
+    store = FeatureStore(str(tmp_path))
+    table = onestop_windows(csv_path, store)
+    windows = load_windows(csv_path, store)
+
+    expected = uncached_onestop(csv_path)
+    np.testing.assert_array_equal(table.features, expected.features)
+    np.testing.assert_array_equal(table.offsets, expected.offsets)
+    np.testing.assert_array_equal(table.starts, expected.starts)
+    np.testing.assert_array_equal(table.codes, expected.codes)
+    assert table.participants.tolist() == expected.participants.tolist()
+    np.testing.assert_array_equal(
+        windows, take_windows(expected.features, expected.starts, expected.length)
+    )
+
+
+def test_same_config_is_a_cache_hit(csv_path, tmp_path, monkeypatch):
+    store = FeatureStore(str(tmp_path))
+    cold = np.array(load_windows(csv_path, store))
+    assert config_key(onestop_config(csv_path)) == config_key(
+        onestop_config(csv_path)
+    )
+
+    monkeypatch.setattr(store_module, "_write_onestop", fail)
+    warm = load_windows(csv_path, store)
+    assert isinstance(warm, np.memmap)
+    np.testing.assert_array_equal(warm, cold)
+    assert len(entries(tmp_path, "onestop")) == 1
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"length": 10},
+        {"step": 10},
+        {"min_duration": 100},
+        {"max_duration": 900},
+        {"ordinary_reading": False},
+        {"feature_columns": ONESTOP_FEATURE_NAMES[:3]},
+    ],
+)
+def test_changed_config_is_a_cache_miss(csv_path, tmp_path, change):
+    store = FeatureStore(str(tmp_path))
+    onestop_windows(csv_path, store)
+    assert config_key(onestop_config(csv_path, **change)) != config_key(
+        onestop_config(csv_path)
+    )
+
+    changed = onestop_windows(csv_path, store, **change)
+    assert len(entries(tmp_path, "onestop")) == 2
+    expected = uncached_onestop(csv_path, **change)
+    np.testing.assert_array_equal(changed.features, expected.features)
+    np.testing.assert_array_equal(changed.starts, expected.starts)
+    assert changed.length == expected.length
+
+
+def test_modified_csv_is_a_cache_miss(tmp_path):
+    csv_path = write_onestop(str(tmp_path / "fixations.csv"))
+    store = FeatureStore(str(tmp_path / "cache"))
+    before = onestop_windows(csv_path, store)
+
+    write_onestop(csv_path, n=10_000)
+    after = onestop_windows(csv_path, store)
+    assert len(entries(tmp_path / "cache", "onestop")) == 2
+    assert len(after.features) < len(before.features)
+    np.testing.assert_array_equal(after.features, uncached_onestop(csv_path).features)
+
+
+def test_cached_builds_once_and_saves_strings(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"ids": np.array(["a", "b"], dtype=object)}
+
+    for _ in range(2):
+        ids = store.cached("ids", {"n": 2}, build)["ids"]
+    assert calls == [1]
+    assert ids.tolist() == ["a", "b"]
+
+
+class Scaler:
+    """The part of a fitted ``StandardScaler`` the ETDD70 windows use."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+
+    def transform(self, frame):
+        return (np.asarray(frame, dtype=np.float64) - self.mean_) / self.scale_
+
+
+@pytest.fixture(scope="module")
+def etdd70_path(tmp_path_factory):
+    base_path = tmp_path_factory.mktemp("etdd70")
+    data_path = base_path / ETDD70_DATA_DIR
+    data_path.mkdir(parents=True)
+    rng = np.random.default_rng(0)
+
+    subjects = np.arange(1001, 1013)
+    pd.DataFrame(
+        {
+            "subject_id": rng.permutation(subjects),
+            "label": rng.choice(["dyslexic", "non-dyslexic"], len(subjects)),
+        }
+    ).to_csv(base_path / ETDD70_LABELS_FILE, index=False)
+
+    for subject in subjects:
+        for task in ETDD70_TASKS:
+            if rng.random() < 0.1:
+                continue
+            n = int(rng.choice([5, int(rng.integers(20, 200))]))
+            prefix = f"Subject_{subject}_T{int(rng.integers(1, 4))}_{task}"
+            durations = rng.integers(40, 1200, n).astype(float)
+            durations[rng.random(n) < 0.05] = np.nan
+            pd.DataFrame(
+                {
+                    " duration_ms": durations,
+                    " fix_x": rng.uniform(0, 1680, n),
+                    " fix_y": rng.uniform(0, 1050, n),
+                }
+            ).to_csv(data_path / f"{prefix}_fixations.csv", index=False)
+            # One saccade fewer or more than fixations, as between recordings.
+            m = n + int(rng.choice([-1, 0, 1]))
+            pd.DataFrame(
+                {
+                    "ampl ": rng.uniform(0, 15, m),
+                    "avg_vel ": rng.uniform(0, 400, m),
+                }
+            ).to_csv(data_path / f"{prefix}_saccades.csv", index=False)
+    return str(base_path)
+
+
+def test_etdd70_windows_match_notebook(etdd70_path, tmp_path, monkeypatch):
+    scaler = Scaler([250, 0.5, 0.5, 0.005, 120], [150, 0.3, 0.3, 0.003, 80])
+    store = FeatureStore(str(tmp_path))
+    arrays = etdd70_windows(etdd70_path, store, scaler=scaler)
+
+    labels = pd.read_csv(os.path.join(etdd70_path, ETDD70_LABELS_FILE))
+    labels = labels.set_index("subject_id")["label"]
+    assert arrays["participants"].tolist() == sorted(labels.index)
+    data_path = os.path.join(etdd70_path, ETDD70_DATA_DIR)
+    for code, participant in enumerate(arrays["participants"]):
+        assert arrays["labels"][code] == (labels[participant] == "dyslexic")
+        for task_index, task in enumerate(ETDD70_TASKS):
+            expected = _reference.process_task_for_participant(
+                participant, task, data_path, scaler
+            )
+            selected = (arrays["codes"] == code) & (arrays["tasks"] == task_index)
+            got = arrays["windows"][selected]
+            assert len(got) == len(expected)
+            if len(expected):
+                # The notebook packs the windows into float32 arrays.
+                np.testing.assert_array_equal(got, expected.astype(np.float32))
+
+    monkeypatch.setattr(store_module, "_build_etdd70", fail)
+    again = etdd70_windows(etdd70_path, store, scaler=scaler)
+    np.testing.assert_array_equal(again["windows"], arrays["windows"])
+
+    monkeypatch.undo()
+    other = etdd70_windows(etdd70_path, store, scaler=Scaler(np.zeros(5), np.ones(5)))
+    assert len(entries(tmp_path, "etdd70")) == 2
+    assert other["windows"].shape == arrays["windows"].shape
+    assert not np.array_equal(other["windows"], arrays["windows"])
+
+
+def test_webcam_windows_match_ingestion(webcam_files, tmp_path, monkeypatch):
+    store = FeatureStore(str(tmp_path / "cache"))
+    arrays = webcam_windows(webcam_files, store, workers=1)
+
+    out_dir = str(tmp_path / "out")
+    target = build_target(ingest(webcam_files, out_dir, workers=1), out_dir)
+    np.testing.assert_array_equal(arrays["windows"], target)
+    np.testing.assert_array_equal(
+        arrays["codes"], np.load(os.path.join(out_dir, CODES_FILE))
+    )
+    np.testing.assert_array_equal(
+        arrays["participants"], np.load(os.path.join(out_dir, IDS_FILE))
+    )
+    with np.load(os.path.join(out_dir, SCALER_FILE)) as scaler:
+        np.testing.assert_array_equal(arrays["mean"], scaler["mean"])
+        np.testing.assert_array_equal(arrays["scale"], scaler["scale"])
+
+    monkeypatch.setattr(store_module, "_write_webcam", fail)
+    again = webcam_windows(webcam_files, store)
+    np.testing.assert_array_equal(again["windows"], arrays["windows"])
+
+    monkeypatch.undo()
+    shorter = webcam_windows(webcam_files, store, workers=1, length=10)
+    assert len(entries(tmp_path / "cache", "webcam")) == 2
+    assert shorter["windows"].shape[1:] == (10, len(MODEL_FEATURE_NAMES))
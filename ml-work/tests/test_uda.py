@@ -0,0 +1,89 @@
+import os
+
+import keras
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from lexora_ml.uda import CLASSIFIER_FILE, UDATrainer
+
+MODELS = os.path.join(os.path.dirname(__file__), "..", "webcam", "models")
+
+
+def load():
+    return (
+        keras.models.load_model(
+            os.path.join(MODELS, "dyslexia-profile-model.h5"), compile=False
+        ),
+        keras.models.load_model(
+            os.path.join(MODELS, "gaze-encoder-v2.h5"), compile=False
+        ),
+    )
+
+
+def quiet(line):
+    pass
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    n_windows = load()[0].input_shape[1]
+    y_train = rng.integers(0, 2, 12)
+    return {
+        "source": rng.normal(size=(256, 20, 5)).astype(np.float32),
+        "target": rng.normal(0.3, 1.2, size=(192, 20, 5)).astype(np.float32),
+        "x_train": rng.normal(size=(12, n_windows, 20, 5)).astype(np.float32),
+        "y_train": y_train,
+    }
+
+
+def test_classify_matches_classifier(data):
+    classifier, source_encoder = load()
+    x = data["x_train"][:4]
+    # An eager call: Model.predict would trace every TimeDistributed copy.
+    expected = classifier([x], training=False).numpy()
+
+    trainer = UDATrainer(classifier, source_encoder)
+    got = trainer.classify(tf.constant(x)).numpy()
+    np.testing.assert_allclose(got, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_resume_restores_epoch_and_weights(data, tmp_path):
+    checkpoints = str(tmp_path / "checkpoints")
+    x_val, y_val = data["x_train"][:4], data["y_train"][:4]
+
+    trainer = UDATrainer(*load(), checkpoint_dir=checkpoints)
+    first = trainer.fit(
+        **data, x_val=x_val, y_val=y_val, epochs=2, seed=0, log=quiet
+    )
+    assert [row["epoch"] for row in first] == [1, 2]
+
+    resumed = UDATrainer(*load(), checkpoint_dir=checkpoints)
+    assert int(resumed.epoch.numpy()) == 2
+    assert resumed.best_d_diff.numpy() == trainer.best_d_diff.numpy()
+    for model in ("classifier", "discriminator"):
+        restored = getattr(resumed, model).get_weights()
+        trained = getattr(trainer, model).get_weights()
+        assert len(restored) == len(trained)
+        for a, b in zip(restored, trained):
+            np.testing.assert_array_equal(a, b)
+    for optimizer in ("d_optimizer", "g_optimizer"):
+        assert int(getattr(resumed, optimizer).iterations.numpy()) == int(
+            getattr(trainer, optimizer).iterations.numpy()
+        )
+
+    second = resumed.fit(**data, epochs=3, seed=0, log=quiet)
+    assert [row["epoch"] for row in second] == [3]
+
+
+def test_mixed_precision_saves_float32_models(data, tmp_path):
+    trainer = UDATrainer(*load(), mixed_precision=True)
+    history = trainer.fit(**data, epochs=1, seed=0, log=quiet)
+    assert np.isfinite(history[0]["c_loss"])
+
+    trainer.save(str(tmp_path))
+    saved = keras.models.load_model(
+        os.path.join(str(tmp_path), CLASSIFIER_FILE), compile=False
+    )
+    assert saved.dtype_policy.name == "float32"
@@ -0,0 +1,124 @@
+import csv
+import json
+import os
+
+import numpy as np
+import pytest
+
+import _reference
+from lexora_ml.webcam import (
+    CODES_FILE,
+    IDS_FILE,
+    LOG_FILE,
+    SCALER_FILE,
+    build_target,
+    ingest,
+    merge_stats,
+    process_file,
+)
+from lexora_ml.windows import SEQUENCE_LENGTH, STEP
+
+
+@pytest.fixture(scope="module")
+def expected(webcam_files):
+    return _reference.webcam_trial_features(webcam_files)
+
+
+@pytest.fixture(scope="module")
+def ingested(webcam_files, tmp_path_factory):
+    out_dir = str(tmp_path_factory.mktemp("ingested"))
+    results = ingest(webcam_files, out_dir, workers=2)
+    target = np.array(build_target(results, out_dir))
+    return out_dir, results, target
+
+
+def trial_features(results):
+    trials = []
+    for result in results:
+        if result.output is not None:
+            with np.load(result.output) as participant:
+                features, offsets = participant["features"], participant["offsets"]
+                for a, b in zip(offsets[:-1], offsets[1:]):
+                    trials.append((result.participant_id, features[a:b]))
+    return trials
+
+
+def test_point_counts_match_notebook(ingested, expected):
+    _, results, _ = ingested
+    _, processed, filtered = expected
+    assert not any(result.error for result in results)
+    assert sum(result.points for result in results) == processed
+    assert sum(result.points_filtered for result in results) == filtered
+
+
+def test_trial_features_match_notebook(ingested, expected):
+    _, results, _ = ingested
+    got = trial_features(results)
+    want = expected[0]
+    assert len(got) == len(want)
+    for (pid, mine), (want_pid, theirs) in zip(got, want):
+        assert pid == want_pid
+        np.testing.assert_allclose(mine, theirs, rtol=1e-12, atol=1e-12)
+
+
+def test_target_windows_match_notebook(ingested, expected):
+    out_dir, _, target = ingested
+    trials = expected[0]
+    rows = np.concatenate([features for _, features in trials])
+    mean, std = rows.mean(axis=0), rows.std(axis=0)
+    windows = np.array(
+        [
+            (features[i : i + SEQUENCE_LENGTH] - mean) / std
+            for _, features in trials
+            for i in range(0, len(features) - SEQUENCE_LENGTH + 1, STEP)
+        ],
+        dtype=np.float32,
+    )
+    np.testing.assert_allclose(target, windows, atol=1e-5)
+
+    with np.load(os.path.join(out_dir, SCALER_FILE)) as scaler:
+        np.testing.assert_allclose(scaler["mean"], mean, rtol=1e-10)
+        np.testing.assert_allclose(scaler["scale"], std, rtol=1e-10)
+
+    codes = np.load(os.path.join(out_dir, CODES_FILE))
+    ids = np.load(os.path.join(out_dir, IDS_FILE))
+    window_ids = [
+        pid
+        for pid, features in trials
+        for _ in range(0, len(features) - SEQUENCE_LENGTH + 1, STEP)
+    ]
+    assert ids[codes].tolist() == window_ids
+
+
+def test_log_lists_every_file(ingested, webcam_files):
+    out_dir, _, _ = ingested
+    with open(os.path.join(out_dir, LOG_FILE), newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert sorted(row["file"] for row in rows) == sorted(
+        os.path.basename(path) for path in webcam_files
+    )
+    assert not any(row["error"] for row in rows)
+
+
+def test_merge_stats_matches_concatenated_features(ingested):
+    _, results, _ = ingested
+    rows = np.concatenate([features for _, features in trial_features(results)])
+    mean, scale = merge_stats(results)
+    np.testing.assert_allclose(mean, rows.mean(axis=0), rtol=1e-10)
+    np.testing.assert_allclose(scale, rows.std(axis=0), rtol=1e-10)
+
+
+def test_bad_file_is_reported_not_raised(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text("{not json")
+    result = process_file(str(path), str(tmp_path / "out.npz"))
+    assert result.output is None
+    assert result.error.startswith("JSONDecodeError")
+
+
+def test_file_without_screen_size_is_skipped(tmp_path):
+    path = tmp_path / "no_screen.json"
+    path.write_text(json.dumps({"participant": "p", "webgazer_raw_data": "{}"}))
+    result = process_file(str(path), str(tmp_path / "out.npz"))
+    assert result.output is None and result.error is None
+    assert result.participant_id == "p"
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import _reference
+from lexora_ml.windows import (
+    ONESTOP_FEATURE_NAMES,
+    SEQUENCE_LENGTH,
+    STEP,
+    build_windows,
+    pad_windows,
+    split_windows,
+    take_windows,
+    window_stats,
+)
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(0)
+    rows = []
+    for participant in range(60):
+        for trial in rng.permutation(int(rng.integers(1, 12))):
+            n = int(rng.choice([0, 5, 19, 20, 21, int(rng.integers(22, 400))]))
+            rows.append(
+                pd.DataFrame(
+                    {
+                        "participant_id": f"p{participant:03d}",
+                        "TRIAL_INDEX": trial + 1,
+                        **{name: rng.normal(size=n) for name in ONESTOP_FEATURE_NAMES},
+                    }
+                )
+            )
+    # Shuffled, so grouping has to reorder the rows.
+    return pd.concat(rows, ignore_index=True).sample(frac=1.0, random_state=0)
+
+
+@pytest.fixture(scope="module")
+def splits(frame):
+    participants = frame["participant_id"].unique()
+    shuffled = np.random.default_rng(1).permutation(participants)
+    return np.split(shuffled, [int(0.8 * len(shuffled)), int(0.9 * len(shuffled))])
+
+
+def test_split_windows_match_notebook(frame, splits):
+    expected = _reference.build_sequences(frame, SEQUENCE_LENGTH, STEP, *splits)
+
+    table = build_windows(frame, dtype=np.float64)
+    indices = split_windows(table, *splits)
+    got = [take_windows(table.features, table.starts[i], table.length) for i in indices]
+
+    for name, want, have in zip(("train", "val", "test"), expected, got):
+        assert have.shape == want.shape, name
+        np.testing.assert_array_equal(have, want)
+
+
+def test_window_stats_match_stacked_windows(frame, splits):
+    table = build_windows(frame, dtype=np.float64)
+    train = split_windows(table, *splits)[0]
+    windows = take_windows(table.features, table.starts[train], table.length)
+    flat = windows.reshape(-1, windows.shape[-1])
+
+    mean, std = window_stats(table.features, table.starts[train], table.length)
+    np.testing.assert_allclose(mean, flat.mean(axis=0), rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(std, flat.std(axis=0), rtol=1e-9, atol=1e-12)
+
+
+def test_take_windows_into_out_in_chunks(frame):
+    table = build_windows(frame, dtype=np.float64)
+    expected = take_windows(table.features, table.starts, table.length)
+    out = np.empty_like(expected)
+    take_windows(table.features, table.starts, table.length, out=out, chunk_size=97)
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_pad_windows_truncates_and_zero_pads(frame):
+    table = build_windows(frame, dtype=np.float64)
+    codes, n_codes = table.codes, len(table.participants)
+    padded = pad_windows(table.features, table.starts, codes, n_codes, table.length, 40)
+    for code in range(n_codes):
+        starts = table.starts[codes == code][:40]
+        windows = take_windows(table.features, starts, table.length)
+        np.testing.assert_array_equal(padded[code, : len(windows)], windows)
+        assert not padded[code, len(windows) :].any()
@@ -23,4 +23,14 @@ def create_app() -> FastAPI:
 
     app.include_router(tobii.router, prefix="/tobii", tags=["tobii"])
 
+    # Discovery runs once, in the background, so the server answers at once;
+    # the supervisor then searches again whenever the tracker goes missing.
+    app.add_event_handler("startup", tobii.tobii_service.start_discovery)
+    app.add_event_handler("startup", tobii.supervisor.start)
+    app.add_event_handler("shutdown", tobii.supervisor.stop)
+
+    if settings.INFERENCE_PRELOAD:
+        # Returns at once; the model loads and warms up in the background.
+        app.add_event_handler("startup", tobii.inference.load_in_background)
+
     return app
@@ -1,7 +1,12 @@
 """Application configuration."""
 
+from pathlib import Path
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal, Optional
+
+# The exported scoring model ships next to the app package (and is bundled
+# there by the PyInstaller specs), wherever the service is started from.
+MODELS_DIR = Path(__file__).resolve().parent.parent / "models"
 
 
 class Settings(BaseSettings):
@@ -13,6 +18,44 @@ class Settings(BaseSettings):
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000"]
     APP_NAME: str = "Lexora Eye Tracker Service"
     VERSION: str = "1.0.0"
+    SERVICE_STARTUP_TIMEOUT_S: float = 15.0
+    GAZE_BUFFER_CAPACITY: int = 16384
+    GAZE_STREAM_MODE: Literal["poll", "push"] = "push"
+    GAZE_POLL_INTERVAL_MS: int = 50
+    GAZE_PUSH_MIN_BATCH: int = 4
+    GAZE_PUSH_MAX_DELAY_MS: float = 5.0
+    GAZE_MAX_BATCH: int = 256
+    GAZE_SEND_QUEUE_SIZE: int = 16
+    STATUS_RATE_INTERVAL_S: float = 1.0
+    STATUS_RATE_TOLERANCE: float = 0.05
+    WS_PER_MESSAGE_DEFLATE: bool = True
+    TRACKER_BACKEND: Literal["tobii", "synthetic", "replay"] = "tobii"
+    TRACKER_CHECK_INTERVAL_S: float = 0.5
+    TRACKER_STALL_TIMEOUT_S: float = 2.0
+    TRACKER_REDISCOVERY_MIN_S: float = 1.0
+    TRACKER_REDISCOVERY_MAX_S: float = 30.0
+    SYNTHETIC_RATE_HZ: float = 120.0
+    SYNTHETIC_NOISE: float = 0.005
+    SYNTHETIC_SACCADE_RATE_HZ: float = 3.0
+    SYNTHETIC_BLINK_RATE_HZ: float = 0.3
+    SYNTHETIC_SEED: Optional[int] = None
+    REPLAY_PATH: str = ""
+    REPLAY_SPEED: float = 1.0
+    REPLAY_LOOP: bool = True
+    RECORDINGS_DIR: str = "recordings"
+    RECORDING_FLUSH_INTERVAL_MS: int = 250
+    FIXATION_VELOCITY_THRESHOLD: float = 0.5
+    FIXATION_VELOCITY_WINDOW_MS: float = 20.0
+    FIXATION_MIN_DURATION_MS: float = 50.0
+    FIXATION_MAX_DURATION_MS: float = 1500.0
+    FIXATION_MAX_GAP_MS: float = 75.0
+    FIXATION_SMOOTHING_ALPHA: float = 0.5
+    INFERENCE_MODEL_PATH: str = str(MODELS_DIR / "dyslexia-uda-classifier")
+    INFERENCE_SCALER_PATH: str = str(MODELS_DIR / "target-domain-scaler.pkl")
+    INFERENCE_MODEL_INPUT: str = "input_meaningful"
+    INFERENCE_MIN_WINDOWS: int = 10
+    INFERENCE_PRELOAD: bool = True
+    INFERENCE_LIVE_INTERVAL_S: float = 2.0
 
     class Config:
         env_file = ".env"
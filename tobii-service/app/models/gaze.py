@@ -1,8 +1,18 @@
 """Gaze data models."""
 
+from enum import Enum
+
 from pydantic import BaseModel, Field
 
 
+class OverflowPolicy(str, Enum):
+    """What a gaze stream does when its send queue is full."""
+
+    DROP_OLDEST = "drop-oldest"
+    DROP_NEWEST = "drop-newest"
+    COALESCE = "coalesce"
+
+
 class GazePoint(BaseModel):
     """Represents a single gaze point from the eye tracker."""
 
@@ -18,3 +28,32 @@ class GazePoint(BaseModel):
                 "timestamp": 1234567890,
             }
         }
+
+
+class Fixation(BaseModel):
+    """A fixation detected on the gaze stream."""
+
+    start_timestamp: int = Field(..., description="First sample, microseconds")
+    end_timestamp: int = Field(..., description="Last sample, microseconds")
+    duration_ms: float = Field(..., description="Fixation duration in milliseconds")
+    x: float = Field(..., description="Mean X coordinate (normalized 0-1)")
+    y: float = Field(..., description="Mean Y coordinate (normalized 0-1)")
+    previous_saccade_amplitude: float = Field(
+        ..., description="Distance from the previous fixation (normalized units)"
+    )
+    is_regression: bool = Field(
+        ..., description="Whether gaze moved left of the previous fixation"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "start_timestamp": 1234567890,
+                "end_timestamp": 1234797890,
+                "duration_ms": 230.0,
+                "x": 0.42,
+                "y": 0.31,
+                "previous_saccade_amplitude": 0.08,
+                "is_regression": False,
+            }
+        }
@@ -0,0 +1,67 @@
+"""Dyslexia-profile inference models."""
+
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.models.gaze import Fixation
+
+
+class ModelState(str, Enum):
+    """Loading state of the scoring model."""
+
+    NOT_LOADED = "not-loaded"
+    LOADING = "loading"
+    READY = "ready"
+    UNAVAILABLE = "unavailable"
+    ERROR = "error"
+
+
+class InferenceStatus(BaseModel):
+    """Whether the service can score sessions, and with which model."""
+
+    state: ModelState = Field(..., description="Loading state of the model")
+    model: str = Field(..., description="Path of the classifier model")
+    max_windows: Optional[int] = Field(
+        None, description="Windows per input the model accepts, once loaded"
+    )
+    load_seconds: Optional[float] = Field(
+        None, description="Time taken to load and warm up the model"
+    )
+    error: Optional[str] = Field(None, description="Why the model is not ready")
+
+
+class ScoreRequest(BaseModel):
+    """A session to score: a recording, or fixations streamed by the client."""
+
+    session_id: Optional[str] = Field(None, description="Recorded session to score")
+    fixations: Optional[List[Fixation]] = Field(
+        None, description="Fixations received from the fixation stream, in order"
+    )
+
+    class Config:
+        json_schema_extra = {"example": {"session_id": "20240101-120000"}}
+
+
+class RiskScore(BaseModel):
+    """Dyslexia risk estimated for a reading session."""
+
+    risk_score: float = Field(..., description="Classifier output between 0 and 1")
+    at_risk: bool = Field(..., description="Whether the score is 0.5 or more")
+    fixation_count: int = Field(..., description="Fixations the score is based on")
+    window_count: int = Field(
+        ..., description="Fixation windows fed to the model (after truncation)"
+    )
+    elapsed_ms: float = Field(..., description="Time spent scoring")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "risk_score": 0.27,
+                "at_risk": False,
+                "fixation_count": 412,
+                "window_count": 79,
+                "elapsed_ms": 12.4,
+            }
+        }
@@ -0,0 +1,44 @@
+"""Recording session models."""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class RecordingInfo(BaseModel):
+    """Metadata of a recorded gaze session."""
+
+    id: str = Field(..., description="Session identifier")
+    started_at: datetime = Field(..., description="When recording started (UTC)")
+    stopped_at: Optional[datetime] = Field(
+        None, description="When recording stopped, or null while still recording"
+    )
+    sample_count: int = Field(0, description="Number of samples written")
+    dropped: int = Field(
+        0, description="Samples lost because the writer fell behind the tracker"
+    )
+    device: Optional[Dict[str, str]] = Field(
+        None, description="Eye tracker the session was recorded from"
+    )
+    error: Optional[str] = Field(
+        None, description="Why recording stopped early, if writing failed"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "20240101-120000",
+                "started_at": "2024-01-01T12:00:00Z",
+                "stopped_at": "2024-01-01T12:05:00Z",
+                "sample_count": 360000,
+                "dropped": 0,
+                "error": None,
+                "device": {
+                    "device_name": "Tobii Pro Fusion",
+                    "serial_number": "TPFC2-010203040506",
+                    "model": "Tobii Pro Fusion",
+                    "firmware_version": "2.2.1",
+                },
+            }
+        }
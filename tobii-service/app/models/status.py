@@ -0,0 +1,39 @@
+"""Service status models."""
+
+from typing import Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ServiceStatus(BaseModel):
+    """State of the service and its eye tracker."""
+
+    connected: bool = Field(..., description="Whether an eye tracker is connected")
+    discovering: bool = Field(
+        False, description="Whether the service is still looking for a tracker"
+    )
+    device: Optional[Dict[str, str]] = Field(
+        None, description="Connected eye tracker, or null"
+    )
+    capturing: bool = Field(False, description="Whether gaze data is being captured")
+    clients: int = Field(0, description="Connected gaze stream subscribers")
+    sample_rate_hz: float = Field(
+        0.0, description="Measured gaze sample rate while capturing"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "connected": True,
+                "discovering": False,
+                "device": {
+                    "device_name": "Tobii Pro Fusion",
+                    "serial_number": "TPC-0123456789AB",
+                    "model": "Tobii Pro Fusion",
+                    "firmware_version": "1.7.6-citronkola-ibland.6",
+                },
+                "capturing": True,
+                "clients": 1,
+                "sample_rate_hz": 120.0,
+            }
+        }
@@ -1,48 +1,523 @@
 import logging
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
-from typing import Dict, Any
+from fastapi import (
+    APIRouter,
+    WebSocket,
+    WebSocketDisconnect,
+    HTTPException,
+    Query,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Awaitable, Callable, List, Optional, Tuple
 import asyncio
+import numpy as np
 
+from app.config import settings
+from app.models.gaze import OverflowPolicy
+from app.models.inference import InferenceStatus, RiskScore, ScoreRequest
+from app.models.recording import RecordingInfo
+from app.models.status import ServiceStatus
+from app.services.gaze_codec import (
+    BINARY_FORMAT,
+    BINARY_SUBPROTOCOL,
+    JSON_FORMAT,
+    encode_binary,
+    encode_dropped,
+    encode_fixations,
+    encode_gap,
+    encode_json,
+)
+from app.services.fixations import FixationDetector
+from app.services.gaze_queue import GazeSendQueue
+from app.services.gaze_stream import GazeHub, GazeSubscription
+from app.services.inference import InferenceService, SessionScorer
+from app.services.recorder import SessionRecorder, iter_session_npz
+from app.services.status import StatusMonitor
+from app.services.supervisor import TrackerSupervisor
 from app.services.tobii_service import TobiiService
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 tobii_service = TobiiService()
+gaze_hub = GazeHub(tobii_service)
+recorder = SessionRecorder(tobii_service)
+inference = InferenceService()
+status_monitor = StatusMonitor(tobii_service, gaze_hub)
+supervisor = TrackerSupervisor(tobii_service, on_gap=gaze_hub.report_gap)
 
 
-@router.get("/status")
-async def get_status() -> Dict[str, Any]:
+@router.get("/status", response_model=ServiceStatus)
+async def get_status() -> ServiceStatus:
     """Check if Tobii eye tracker is connected and return device info."""
     try:
-        is_connected = tobii_service.is_connected()
-        device_info = tobii_service.get_device_info() if is_connected else None
-        return {"connected": is_connected, "device": device_info}
+        return status_monitor.refresh()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.websocket("/gaze")
-async def gaze_websocket(websocket: WebSocket):
-    """WebSocket endpoint for streaming real-time gaze data from Tobii eye tracker."""
-    await websocket.accept()
+@router.post("/recordings/start", response_model=RecordingInfo)
+async def start_recording() -> RecordingInfo:
+    """Start recording the gaze stream to disk."""
+    if recorder.is_recording:
+        raise HTTPException(status_code=409, detail="Already recording")
 
     try:
-        tobii_service.start_capture()
+        gaze_hub.acquire_capture()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    loop = asyncio.get_running_loop()
+
+    def release_after_failure() -> None:
+        # Called from the writer thread; the hub lives on the event loop.
+        loop.call_soon_threadsafe(gaze_hub.release_capture)
+
+    try:
+        return recorder.start(on_failure=release_after_failure)
+    except Exception as e:
+        gaze_hub.release_capture()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/recordings/stop", response_model=RecordingInfo)
+async def stop_recording() -> RecordingInfo:
+    """Stop the current recording and return its final metadata."""
+    try:
+        # Joining the writer thread waits for its last flush.
+        info = await run_in_threadpool(recorder.stop)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    gaze_hub.release_capture()
+    return info
+
+
+@router.get("/recordings", response_model=List[RecordingInfo])
+async def list_recordings() -> List[RecordingInfo]:
+    """List recorded sessions, oldest first."""
+    return recorder.list_sessions()
+
+
+@router.get("/recordings/{session_id}", response_model=RecordingInfo)
+async def get_recording(session_id: str) -> RecordingInfo:
+    """Get the metadata of one recorded session."""
+    info = recorder.get_session(session_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    return info
+
+
+@router.get("/recordings/{session_id}/download")
+async def download_recording(session_id: str) -> StreamingResponse:
+    """Download a recorded session as an ``.npz`` archive."""
+    path = recorder.session_path(session_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+
+    current = recorder.current
+    if current is not None and current.id == session_id:
+        raise HTTPException(status_code=409, detail="Recording still in progress")
+
+    return StreamingResponse(
+        iter_session_npz(path),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{session_id}.npz"'},
+    )
+
+
+@router.get("/inference/status", response_model=InferenceStatus)
+async def get_inference_status() -> InferenceStatus:
+    """Check whether the scoring model is loaded."""
+    return inference.status()
+
+
+@router.post("/inference/score", response_model=RiskScore)
+async def score_session(request: ScoreRequest) -> RiskScore:
+    """Estimate the dyslexia risk of a recorded or streamed reading session."""
+    if (request.session_id is None) == (request.fixations is None):
+        raise HTTPException(
+            status_code=422, detail="Provide either session_id or fixations"
+        )
+
+    if request.session_id is not None:
+        path = recorder.session_path(request.session_id)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Recording not found")
+        score, argument = inference.score_recording, path
+    else:
+        score, argument = inference.score_fixations, request.fixations
+
+    if not inference.is_ready:
+        # Without preloading, the first request starts the load.
+        inference.load_in_background()
+        state = inference.status()
+        detail = f"Model is {state.state.value}"
+        if state.error:
+            detail += f": {state.error}"
+        raise HTTPException(status_code=503, detail=detail)
+
+    try:
+        return await run_in_threadpool(score, argument)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+Sender = Callable[[np.ndarray, int], Awaitable[None]]
+
+
+def _negotiate_format(websocket: WebSocket) -> Tuple[Optional[str], Optional[str]]:
+    """Pick the wire format from the subprotocol or ``format`` query parameter.
+
+    Returns:
+        Tuple of (format, subprotocol_to_accept); format is None if the
+        requested one is not supported.
+    """
+    if BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        return BINARY_FORMAT, BINARY_SUBPROTOCOL
+
+    wire_format = websocket.query_params.get("format", JSON_FORMAT)
+    if wire_format not in (JSON_FORMAT, BINARY_FORMAT):
+        return None, None
+    return wire_format, None
+
+
+def _make_sender(
+    websocket: WebSocket,
+    wire_format: str,
+    queue: GazeSendQueue,
+    subscription: GazeSubscription,
+) -> Sender:
+    def take_gap(samples: np.ndarray) -> Optional[int]:
+        """Gap start to report before ``samples``, if they follow a gap."""
+        start = subscription.gap_start
+        if start is None or not len(samples) or samples["timestamp"][-1] <= start:
+            return None
+        subscription.gap_start = None
+        return start
+
+    if wire_format == BINARY_FORMAT:
+
+        async def send(samples: np.ndarray, dropped: int) -> None:
+            gap_start = take_gap(samples)
+            if gap_start is not None:
+                # Break the batch at the gap, so that it always lies between
+                # the previous frame's last sample and the flagged frame's
+                # first, which is all a client needs to find its bounds.
+                after = int(np.searchsorted(samples["timestamp"], gap_start, "right"))
+                if after:
+                    await websocket.send_bytes(encode_binary(samples[:after], dropped))
+                    samples, dropped = samples[after:], 0
+            gap = gap_start is not None
+            await websocket.send_bytes(encode_binary(samples, dropped, gap))
+
+    else:
+
+        async def send(samples: np.ndarray, dropped: int) -> None:
+            gap_start = take_gap(samples)
+            if gap_start is not None:
+                after = samples["timestamp"][samples["timestamp"] > gap_start]
+                await websocket.send_text(encode_gap(gap_start, int(after[0])))
+            if dropped:
+                await websocket.send_text(encode_dropped(dropped, queue.total_dropped))
+            await websocket.send_text(encode_json(samples))
+
+    return send
+
+
+async def _read_poll(subscription: GazeSubscription, queue: GazeSendQueue) -> None:
+    """Queue whatever has accumulated on a fixed interval."""
+    interval = settings.GAZE_POLL_INTERVAL_MS / 1000
+
+    while True:
+        queue.put(*subscription.read())
+        await asyncio.sleep(interval)
+
+
+async def _read_push(
+    subscription: GazeSubscription, queue: GazeSendQueue, max_latency: float
+) -> None:
+    """Queue a batch as soon as it is big enough or its deadline expires."""
+    loop = asyncio.get_running_loop()
+    min_batch = min(settings.GAZE_PUSH_MIN_BATCH, queue.max_batch)
+
+    while True:
+        # A decimated subscription counts output samples, which need more
+        # than one source sample each.
+        while not subscription.pending_count():
+            await subscription.wait()
+
+        # The first sample of this batch is here; hold on until either
+        # enough samples have accumulated or it has waited long enough.
+        deadline = loop.time() + max_latency
+        while subscription.pending_count() < min_batch:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await subscription.wait(remaining)
+
+        queue.put(*subscription.read())
+        # At high rates samples may already be pending again, in which case
+        # nothing above suspends; yield so the sender gets to run.
+        await asyncio.sleep(0)
+
+
+async def _send_queued(queue: GazeSendQueue, send: Sender) -> None:
+    """Send queued batches as fast as the client accepts them."""
+    while True:
+        samples, dropped = await queue.get()
+        await send(samples, dropped)
 
-        while True:
-            gaze_points = tobii_service.get_gaze_data()
 
-            if gaze_points:
-                await websocket.send_json(gaze_points)
-                tobii_service.clear_data()
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    """Consume incoming frames until the client goes away."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
 
-            await asyncio.sleep(0.05)
+
+async def _run_until_disconnect(websocket: WebSocket, *coroutines) -> None:
+    """Run ``coroutines`` until one of them fails or the client disconnects.
+
+    Sending alone does not notice a closed socket while the tracker is idle,
+    so the receive side is watched concurrently.
+    """
+    watcher = asyncio.create_task(_wait_for_disconnect(websocket))
+    tasks = {asyncio.create_task(coroutine) for coroutine in coroutines}
+    tasks.add(watcher)
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    # Retrieve every exception so none is reported as never retrieved; a
+    # send failing because the client left is just another disconnect.
+    errors = [task.exception() for task in done]
+    if watcher in done:
+        watcher.result()
+    for error in errors:
+        if isinstance(error, OSError):
+            # uvicorn raises ClientDisconnected, an OSError, when sending on
+            # a socket the client has already closed.
+            raise WebSocketDisconnect(status.WS_1006_ABNORMAL_CLOSURE) from error
+        if error is not None:
+            raise error
+
+
+@router.websocket("/gaze")
+async def gaze_websocket(
+    websocket: WebSocket,
+    max_batch: int = Query(settings.GAZE_MAX_BATCH, ge=1),
+    max_latency_ms: float = Query(settings.GAZE_PUSH_MAX_DELAY_MS, ge=0),
+    overflow: OverflowPolicy = Query(OverflowPolicy.DROP_OLDEST),
+    rate_hz: Optional[float] = Query(None, gt=0),
+):
+    """WebSocket endpoint for streaming real-time gaze data from Tobii eye tracker.
+
+    Args:
+        max_batch: Largest number of samples sent in one message.
+        max_latency_ms: Longest a sample waits for its batch to fill up.
+        overflow: What to discard when the client cannot keep up.
+        rate_hz: Rate to reduce the stream to by averaging, or None for
+            every sample the tracker delivers.
+    """
+    wire_format, subprotocol = _negotiate_format(websocket)
+    if wire_format is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept(subprotocol=subprotocol)
+    queue = GazeSendQueue(settings.GAZE_SEND_QUEUE_SIZE, max_batch, overflow)
+    subscription = None
+
+    try:
+        subscription = gaze_hub.subscribe(rate_hz)
+        send = _make_sender(websocket, wire_format, queue, subscription)
+
+        if settings.GAZE_STREAM_MODE == "poll":
+            reader = _read_poll(subscription, queue)
+        else:
+            reader = _read_push(subscription, queue, max_latency_ms / 1000)
+        await _run_until_disconnect(websocket, reader, _send_queued(queue, send))
 
     except WebSocketDisconnect:
-        tobii_service.stop_capture()
         logger.info("WebSocket disconnected")
     except Exception as e:
-        tobii_service.stop_capture()
         logger.error(f"Error in WebSocket: {e}")
         await websocket.close()
+    finally:
+        if subscription is not None:
+            gaze_hub.unsubscribe(subscription)
+        if queue.total_dropped:
+            logger.info(f"Gaze client dropped {queue.total_dropped} samples")
+
+
+async def _send_status(websocket: WebSocket) -> None:
+    """Send the service status, then every change to it."""
+    async for current in status_monitor.watch():
+        await websocket.send_text(current.model_dump_json())
+
+
+@router.websocket("/status/live")
+async def status_websocket(websocket: WebSocket):
+    """WebSocket endpoint pushing the service status whenever it changes."""
+    await websocket.accept()
+    try:
+        await _run_until_disconnect(websocket, _send_status(websocket))
+
+    except WebSocketDisconnect:
+        logger.info("Status WebSocket disconnected")
+    except Exception as e:
+        logger.error(f"Error in status WebSocket: {e}")
+        await websocket.close()
+
+
+async def _send_fixations(
+    websocket: WebSocket,
+    subscription: GazeSubscription,
+    detector: FixationDetector,
+    max_gap: float,
+) -> None:
+    """Run the detector over new samples and send completed fixations.
+
+    A fixation in progress is sent once no sample has arrived for
+    ``max_gap`` seconds, rather than when the stream resumes.
+    """
+    while True:
+        if not await subscription.wait(max_gap):
+            # Tracking lost or capture stopped: the detector would end the
+            # fixation at the next sample anyway, so end it now.
+            fixations = detector.flush()
+        else:
+            samples, dropped = subscription.read()
+            if dropped:
+                # The samples in between are gone; do not bridge the hole.
+                fixations = detector.flush()
+            else:
+                fixations = []
+            fixations.extend(detector.process(samples))
+        if fixations:
+            await websocket.send_text(encode_fixations(fixations))
+
+
+@router.websocket("/fixations")
+async def fixations_websocket(
+    websocket: WebSocket,
+    velocity_threshold: float = Query(settings.FIXATION_VELOCITY_THRESHOLD, gt=0),
+    velocity_window_ms: float = Query(settings.FIXATION_VELOCITY_WINDOW_MS, ge=0),
+    min_duration_ms: float = Query(settings.FIXATION_MIN_DURATION_MS, ge=0),
+    max_duration_ms: float = Query(settings.FIXATION_MAX_DURATION_MS, gt=0),
+    max_gap_ms: float = Query(settings.FIXATION_MAX_GAP_MS, gt=0),
+    smoothing: float = Query(settings.FIXATION_SMOOTHING_ALPHA, gt=0, le=1),
+):
+    """WebSocket endpoint streaming fixations detected on the gaze stream.
+
+    Args:
+        velocity_threshold: Gaze speed (normalized units/s) above which a
+            sample is part of a saccade.
+        velocity_window_ms: Time span velocity is measured over.
+        min_duration_ms: Shortest fixation reported.
+        max_duration_ms: Longest fixation reported.
+        max_gap_ms: Longest run of missing samples bridged within a fixation.
+        smoothing: EMA factor applied to gaze before measuring velocity
+            (1 disables smoothing).
+    """
+    await websocket.accept()
+    detector = FixationDetector(
+        velocity_threshold=velocity_threshold,
+        min_duration_ms=min_duration_ms,
+        max_duration_ms=max_duration_ms,
+        smoothing_alpha=smoothing,
+        velocity_window_ms=velocity_window_ms,
+        max_gap_ms=max_gap_ms,
+    )
+    subscription = None
+
+    try:
+        subscription = gaze_hub.subscribe()
+        await _run_until_disconnect(
+            websocket,
+            _send_fixations(websocket, subscription, detector, max_gap_ms / 1000),
+        )
+
+    except WebSocketDisconnect:
+        logger.info("Fixation WebSocket disconnected")
+    except Exception as e:
+        logger.error(f"Error in fixation WebSocket: {e}")
+        await websocket.close()
+    finally:
+        if subscription is not None:
+            gaze_hub.unsubscribe(subscription)
+
+
+async def _send_scores(
+    websocket: WebSocket,
+    subscription: GazeSubscription,
+    detector: FixationDetector,
+    scorer: SessionScorer,
+    interval: float,
+) -> None:
+    """Feed new fixations to the scorer and send a score every ``interval``."""
+    loop = asyncio.get_running_loop()
+    next_score = loop.time() + interval
+    scored_windows = 0
+
+    while True:
+        await subscription.wait(max(next_score - loop.time(), 0))
+        samples, dropped = subscription.read()
+        fixations = detector.flush() if dropped else []
+        fixations.extend(detector.process(samples))
+        if fixations:
+            # Encoding the windows these complete runs the model.
+            await run_in_threadpool(scorer.add, fixations)
+
+        if loop.time() < next_score:
+            continue
+        next_score = loop.time() + interval
+        if scorer.window_count < inference.min_windows:
+            continue
+        if scorer.window_count == scored_windows:
+            continue
+        scored_windows = scorer.window_count
+        score = await run_in_threadpool(scorer.score)
+        await websocket.send_text(score.model_dump_json())
+
+
+@router.websocket("/inference/live")
+async def live_score_websocket(
+    websocket: WebSocket,
+    interval_s: float = Query(settings.INFERENCE_LIVE_INTERVAL_S, gt=0),
+):
+    """WebSocket endpoint sending interim risk scores of the session being read.
+
+    Args:
+        interval_s: How often to send a score while new windows complete.
+    """
+    await websocket.accept()
+    try:
+        scorer = inference.new_session()
+    except RuntimeError as e:
+        inference.load_in_background()
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=str(e))
+        return
+
+    detector = FixationDetector()
+    subscription = None
+
+    try:
+        subscription = gaze_hub.subscribe()
+        await _run_until_disconnect(
+            websocket,
+            _send_scores(websocket, subscription, detector, scorer, interval_s),
+        )
+
+    except WebSocketDisconnect:
+        logger.info("Live score WebSocket disconnected")
+    except Exception as e:
+        logger.error(f"Error in live score WebSocket: {e}")
+        await websocket.close()
+    finally:
+        if subscription is not None:
+            gaze_hub.unsubscribe(subscription)
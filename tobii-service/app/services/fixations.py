@@ -0,0 +1,162 @@
+"""Online fixation detection on the gaze stream."""
+
+import math
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+
+class FixationDetector:
+    """Incremental I-VT (velocity threshold) fixation detector.
+
+    Follows the offline ``detect_fixations`` used to build the training
+    data: gaze is smoothed with an exponential moving average, samples
+    moving slower than ``velocity_threshold`` are grouped into fixations, a
+    faster sample ends the current group, and groups shorter than
+    ``min_duration_ms`` or longer than ``max_duration_ms`` are discarded.
+    Two additions make it work on a live high-rate stream:
+
+    - Velocity is measured over ``velocity_window_ms`` rather than between
+      consecutive samples, since at several hundred Hz sample-to-sample
+      velocity is dominated by noise. At webcam rates the window is shorter
+      than one sample interval and this reduces to the offline behaviour.
+    - A gap longer than ``max_gap_ms`` (a blink, or tracking lost) ends the
+      current group instead of being bridged.
+
+    State is carried across calls to ``process``, so fixations spanning
+    batch boundaries are detected exactly as in one pass over the stream.
+    Coordinates are normalized display units and velocities are in
+    normalized units per second.
+    """
+
+    def __init__(
+        self,
+        velocity_threshold: float = settings.FIXATION_VELOCITY_THRESHOLD,
+        min_duration_ms: float = settings.FIXATION_MIN_DURATION_MS,
+        max_duration_ms: float = settings.FIXATION_MAX_DURATION_MS,
+        smoothing_alpha: float = settings.FIXATION_SMOOTHING_ALPHA,
+        velocity_window_ms: float = settings.FIXATION_VELOCITY_WINDOW_MS,
+        max_gap_ms: float = settings.FIXATION_MAX_GAP_MS,
+    ):
+        if not 0 < smoothing_alpha <= 1:
+            raise ValueError("smoothing_alpha must be in (0, 1]")
+        self.velocity_threshold = velocity_threshold
+        self.smoothing_alpha = smoothing_alpha
+        # Timestamps are in microseconds.
+        self._min_duration = min_duration_ms * 1000
+        self._max_duration = max_duration_ms * 1000
+        self._velocity_window = velocity_window_ms * 1000
+        self._max_gap = max_gap_ms * 1000
+
+        # Smoothed recent points (t, x, y) back to one velocity window ago.
+        self._recent: Deque[Tuple[int, float, float]] = deque()
+        # Current candidate fixation.
+        self._start = 0
+        self._end = 0
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+        self._count = 0
+        # Last emitted fixation, for saccade amplitude and regressions. As
+        # in the offline features, the first fixation's is the origin.
+        self._previous: Tuple[float, float] = (0.0, 0.0)
+
+    def process(self, samples: np.ndarray) -> List[Dict[str, Any]]:
+        """Feed raw samples and return the fixations they complete.
+
+        Args:
+            samples: Structured array with ``x``, ``y`` and ``timestamp``.
+
+        Returns:
+            Completed fixations, oldest first, as dictionaries with
+            ``start_timestamp``, ``end_timestamp``, ``duration_ms``, ``x``,
+            ``y``, ``previous_saccade_amplitude`` and ``is_regression``.
+        """
+        fixations: List[Dict[str, Any]] = []
+        recent = self._recent
+        alpha = self.smoothing_alpha
+        keep = 1.0 - alpha
+        threshold = self.velocity_threshold
+        window = self._velocity_window
+        max_gap = self._max_gap
+
+        for x, y, t in zip(
+            samples["x"].tolist(), samples["y"].tolist(), samples["timestamp"].tolist()
+        ):
+            if recent and t - recent[-1][0] > max_gap:
+                self._close_group(fixations)
+                recent.clear()
+
+            if not recent:
+                recent.append((t, x, y))
+                self._add_to_group(t, x, y)
+                continue
+
+            _, last_x, last_y = recent[-1]
+            x = alpha * x + keep * last_x
+            y = alpha * y + keep * last_y
+
+            # Drop reference points older than one window, keeping the
+            # newest of them so velocity always spans at least the window.
+            cutoff = t - window
+            while len(recent) > 1 and recent[1][0] <= cutoff:
+                recent.popleft()
+            ref_t, ref_x, ref_y = recent[0]
+            recent.append((t, x, y))
+
+            elapsed = (t - ref_t) / 1_000_000
+            velocity = math.hypot(x - ref_x, y - ref_y) / elapsed if elapsed > 0 else 0.0
+
+            if velocity < threshold:
+                self._add_to_group(t, x, y)
+            else:
+                self._close_group(fixations)
+
+        return fixations
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Close the fixation in progress, as at the end of a recording."""
+        fixations: List[Dict[str, Any]] = []
+        self._close_group(fixations)
+        self._recent.clear()
+        return fixations
+
+    def _add_to_group(self, t: int, x: float, y: float) -> None:
+        if not self._count:
+            self._start = t
+        self._end = t
+        self._sum_x += x
+        self._sum_y += y
+        self._count += 1
+
+    def _close_group(self, fixations: List[Dict[str, Any]]) -> None:
+        if not self._count:
+            return
+
+        duration = self._end - self._start
+        count = self._count
+        x, y = self._sum_x / count, self._sum_y / count
+        self._sum_x = self._sum_y = 0.0
+        self._count = 0
+
+        if not self._min_duration <= duration <= self._max_duration:
+            return
+
+        previous_x, previous_y = self._previous
+        amplitude = math.hypot(x - previous_x, y - previous_y)
+        is_regression = x < previous_x
+        self._previous = (x, y)
+
+        fixations.append(
+            {
+                "start_timestamp": self._start,
+                "end_timestamp": self._end,
+                "duration_ms": duration / 1000,
+                "x": x,
+                "y": y,
+                "previous_saccade_amplitude": amplitude,
+                "is_regression": is_regression,
+            }
+        )
@@ -0,0 +1,107 @@
+"""Fixed-capacity ring buffer for gaze samples."""
+
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GAZE_DTYPE = np.dtype([("x", np.float64), ("y", np.float64), ("timestamp", np.int64)])
+
+
+class GazeRingBuffer:
+    """Preallocated single-producer ring buffer of gaze samples.
+
+    The SDK callback thread is the only writer. Readers never mutate the
+    buffer; each one owns a cursor (the absolute sample index it has read up
+    to) and drains everything written since that cursor. ``head`` only grows,
+    so a cursor stays valid across wrap-arounds and a reader that falls
+    ``capacity`` or more samples behind can tell exactly how many it missed.
+    A reader can hold at most ``capacity - 1`` unread samples, since the
+    oldest slot is the one the producer overwrites next.
+    """
+
+    __slots__ = ("capacity", "_data", "_x", "_y", "_timestamp", "_head")
+
+    def __init__(self, capacity: int):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=GAZE_DTYPE)
+        # Per-sample writes go through memoryviews of the columns: storing a
+        # Python float into a memoryview skips NumPy's scalar conversion and
+        # is markedly cheaper on the SDK thread than ``array[i] = value``.
+        self._x = memoryview(self._data["x"])
+        self._y = memoryview(self._data["y"])
+        self._timestamp = memoryview(self._data["timestamp"])
+        self._head = 0
+
+    @property
+    def head(self) -> int:
+        """Absolute index of the next sample to be written."""
+        return self._head
+
+    def append(self, x: float, y: float, timestamp: int) -> None:
+        """Write one sample. Must only be called from the producer thread."""
+        i = self._head % self.capacity
+        self._x[i] = x
+        self._y[i] = y
+        self._timestamp[i] = timestamp
+        # Publishing the new head is a single attribute store, which is atomic
+        # under the GIL, so readers never observe a half-written slot as ready.
+        self._head += 1
+
+    def last_timestamp(self) -> Optional[int]:
+        """Timestamp of the newest sample, or None if none was written yet."""
+        if not self._head:
+            return None
+        return self._timestamp[(self._head - 1) % self.capacity]
+
+    def drain(self, cursor: int) -> Tuple[np.ndarray, int, int]:
+        """Copy out every sample written since ``cursor``.
+
+        Args:
+            cursor: Absolute index returned by a previous drain (or ``head``).
+
+        Returns:
+            Tuple of (samples, new_cursor, dropped) where ``samples`` is a
+            structured array owned by the caller and ``dropped`` counts the
+            samples that were overwritten before this reader got to them.
+        """
+        head = self._head
+        dropped = 0
+        # The slot ``capacity`` behind head is the one the producer writes
+        # next, possibly right now, so only ``capacity - 1`` samples are safe.
+        if head - cursor >= self.capacity:
+            dropped = head - self.capacity + 1 - cursor
+            cursor = head - self.capacity + 1
+
+        samples = self._copy_range(cursor, head)
+
+        # The producer may have lapped the oldest slots while we were copying.
+        # Anything ``capacity`` or more behind the current head is suspect.
+        # Only samples up to the returned cursor count as dropped here; any
+        # lost beyond it are reported by the next drain.
+        oldest_valid = min(self._head - self.capacity + 1, head)
+        if oldest_valid > cursor:
+            overwritten = oldest_valid - cursor
+            samples = samples[overwritten:]
+            dropped += overwritten
+
+        if dropped:
+            logger.warning(f"Gaze buffer overrun, dropped {dropped} samples")
+        return samples, head, dropped
+
+    def _copy_range(self, start: int, stop: int) -> np.ndarray:
+        count = stop - start
+        if count <= 0:
+            return self._data[:0].copy()
+
+        begin = start % self.capacity
+        end = begin + count
+        if end <= self.capacity:
+            return self._data[begin:end].copy()
+        return np.concatenate(
+            (self._data[begin:], self._data[: end - self.capacity])
+        )
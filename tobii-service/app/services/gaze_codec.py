@@ -0,0 +1,94 @@
+"""Wire formats for gaze sample batches."""
+
+import json
+import struct
+from typing import Any, Dict, List
+
+import numpy as np
+
+JSON_FORMAT = "json"
+BINARY_FORMAT = "binary"
+BINARY_SUBPROTOCOL = "lexora.gaze.binary.v1"
+
+BINARY_MAGIC = b"LXGZ"
+BINARY_VERSION = 1
+
+# magic, version, flags, reserved, sample count, dropped sample count
+BINARY_HEADER = struct.Struct("<4sBBHII")
+BINARY_FLAG_DROPPED = 0x01
+BINARY_FLAG_GAP = 0x02
+
+
+def encode_json(samples: np.ndarray) -> str:
+    """Encode a batch as the JSON array of gaze points clients already expect."""
+    return json.dumps(
+        [
+            {"fixation_x": x, "fixation_y": y, "timestamp": timestamp}
+            for x, y, timestamp in samples.tolist()
+        ],
+        separators=(",", ":"),
+    )
+
+
+def encode_fixations(fixations: List[Dict[str, Any]]) -> str:
+    """Encode detected fixations as a JSON array."""
+    return json.dumps(fixations, separators=(",", ":"))
+
+
+def encode_dropped(dropped: int, total_dropped: int) -> str:
+    """Encode the JSON control message that precedes a batch after drops."""
+    return json.dumps(
+        {"type": "dropped", "count": dropped, "total": total_dropped},
+        separators=(",", ":"),
+    )
+
+
+def encode_gap(start_timestamp: int, end_timestamp: int) -> str:
+    """Encode the JSON control message that precedes a batch after a gap.
+
+    The stream was interrupted (the tracker was lost or stopped sending)
+    between the two timestamps, in microseconds.
+    """
+    return json.dumps(
+        {
+            "type": "gap",
+            "start_timestamp": start_timestamp,
+            "end_timestamp": end_timestamp,
+            "duration_ms": (end_timestamp - start_timestamp) / 1000,
+        },
+        separators=(",", ":"),
+    )
+
+
+def encode_binary(samples: np.ndarray, dropped: int = 0, gap: bool = False) -> bytes:
+    """Encode a batch as a packed little-endian binary frame.
+
+    Layout (N = sample count):
+        16-byte header  magic "LXGZ", u8 version, u8 flags, u16 reserved,
+                        u32 N, u32 samples dropped since the previous frame
+        N x int64       timestamps (microseconds)
+        N x float32     x coordinates
+        N x float32     y coordinates
+
+    Flags: ``BINARY_FLAG_DROPPED`` when samples were dropped,
+    ``BINARY_FLAG_GAP`` on the first frame after an interruption of the
+    stream. Unlike the JSON control messages the frame carries neither the
+    running drop total nor the gap bounds: the total is the sum of the
+    headers, and the sender starts a new frame at the gap, so it runs from
+    the previous frame's last timestamp to this frame's first. The header is 16 bytes so the int64 block starts 8-byte aligned
+    and can be viewed directly as a ``BigInt64Array`` in the browser.
+    """
+    count = len(samples)
+    flags = BINARY_FLAG_DROPPED if dropped else 0
+    if gap:
+        flags |= BINARY_FLAG_GAP
+    return b"".join(
+        (
+            BINARY_HEADER.pack(
+                BINARY_MAGIC, BINARY_VERSION, flags, 0, count, dropped
+            ),
+            samples["timestamp"].astype("<i8").tobytes(),
+            samples["x"].astype("<f4").tobytes(),
+            samples["y"].astype("<f4").tobytes(),
+        )
+    )
@@ -0,0 +1,134 @@
+"""Per-subscriber rate reduction of the gaze stream."""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+from app.services.gaze_buffer import GAZE_DTYPE
+
+
+class GazeDecimator:
+    """Reduces a gaze stream to ``rate_hz`` by averaging fixed time windows.
+
+    The timeline is cut into windows of ``1 / rate_hz`` seconds, aligned
+    to timestamp zero, and every window that holds samples becomes one
+    output sample: the mean of its positions at the mean of its
+    timestamps. Averaging over the output period is the anti-alias
+    filter, so saccades and fixations keep their shape instead of the
+    jitter a plain "every Nth sample" pick would leave. It also works on
+    the stream as it is: the tracker skips samples where both eyes were
+    lost and its rate drifts, which a fixed-tap filter would not allow.
+
+    Windows are aligned to time rather than to the first sample, so every
+    client asking for the same rate receives the same samples. A window is
+    emitted once a sample of a later window arrives, so the added latency
+    is at most one output period plus one input interval. A source slower
+    than ``rate_hz`` passes through unchanged.
+
+    State is carried across calls to ``process``, so a window spanning
+    batch boundaries is averaged exactly as in one pass over the stream.
+    When samples are lost in between, ``flush`` ends the window in
+    progress first so that it does not average across the hole.
+    """
+
+    def __init__(self, rate_hz: float):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self.rate_hz = rate_hz
+        # Windows per microsecond, the unit of timestamps.
+        self._scale = rate_hz / 1_000_000
+        # Window in progress: index, sums of x, y and timestamp, and count.
+        self._window: Optional[int] = None
+        self._sum_x = 0.0
+        self._sum_y = 0.0
+        self._sum_timestamp = 0
+        self._count = 0
+        # Timestamps are summed relative to the first one seen, so that the
+        # sums cannot overflow however many samples a window holds.
+        self._origin: Optional[int] = None
+
+    def pending_count(self, source_count: int, last_timestamp: int) -> int:
+        """Output samples that reading up to ``last_timestamp`` would give, at most.
+
+        Every window from the one in progress up to the one holding
+        ``last_timestamp`` counts, so windows a gap left empty are counted
+        too. Before the first sample it is unknown, and any pending source
+        sample counts as one.
+
+        Args:
+            source_count: Source samples written since the last read.
+            last_timestamp: Timestamp of the newest of them.
+        """
+        if not source_count:
+            return 0
+        if self._window is None:
+            return 1
+        window = math.floor(last_timestamp * self._scale)
+        return min(max(window - self._window, 0), source_count)
+
+    def flush(self) -> np.ndarray:
+        """End the window in progress, returning it as an output sample."""
+        out = np.empty(1 if self._count else 0, dtype=GAZE_DTYPE)
+        if self._count:
+            out["x"] = self._sum_x / self._count
+            out["y"] = self._sum_y / self._count
+            out["timestamp"] = self._origin + self._sum_timestamp // self._count
+        self._window = None
+        self._sum_x = self._sum_y = 0.0
+        self._sum_timestamp = 0
+        self._count = 0
+        return out
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Feed raw samples and return the output samples they complete.
+
+        Args:
+            samples: Structured array with ``x``, ``y`` and ``timestamp``.
+
+        Returns:
+            Structured array of the same dtype, oldest first.
+        """
+        if not len(samples):
+            return samples[:0]
+
+        timestamps = samples["timestamp"]
+        if self._origin is None:
+            self._origin = int(timestamps[0])
+        windows = np.floor(timestamps * self._scale).astype(np.int64)
+        starts = np.flatnonzero(windows[1:] != windows[:-1]) + 1
+        starts = np.concatenate(([0], starts))
+
+        counts = np.diff(np.append(starts, len(samples)))
+        sum_x = np.add.reduceat(samples["x"], starts)
+        sum_y = np.add.reduceat(samples["y"], starts)
+        sum_timestamp = np.add.reduceat(timestamps - self._origin, starts)
+        group_windows = windows[starts]
+
+        if self._count:
+            if group_windows[0] == self._window:
+                # The window in progress continues into this batch.
+                sum_x[0] += self._sum_x
+                sum_y[0] += self._sum_y
+                sum_timestamp[0] += self._sum_timestamp
+                counts[0] += self._count
+            else:
+                sum_x = np.concatenate(([self._sum_x], sum_x))
+                sum_y = np.concatenate(([self._sum_y], sum_y))
+                sum_timestamp = np.concatenate(([self._sum_timestamp], sum_timestamp))
+                counts = np.concatenate(([self._count], counts))
+                group_windows = np.concatenate(([self._window], group_windows))
+
+        # The last window may still receive samples; hold it back.
+        self._window = int(group_windows[-1])
+        self._sum_x = float(sum_x[-1])
+        self._sum_y = float(sum_y[-1])
+        self._sum_timestamp = int(sum_timestamp[-1])
+        self._count = int(counts[-1])
+
+        out = np.empty(len(counts) - 1, dtype=GAZE_DTYPE)
+        counts = counts[:-1]
+        out["x"] = sum_x[:-1] / counts
+        out["y"] = sum_y[:-1] / counts
+        out["timestamp"] = self._origin + sum_timestamp[:-1] // counts
+        return out
@@ -0,0 +1,81 @@
+"""Bounded send queue between a gaze subscription and a websocket."""
+
+import asyncio
+from collections import deque
+from typing import Deque, Tuple
+
+import numpy as np
+
+from app.models.gaze import OverflowPolicy
+
+
+class GazeSendQueue:
+    """Bounded queue of sample batches waiting to be sent to one client.
+
+    The reader side never blocks: when the client is slower than the
+    tracker, the queue fills up and ``policy`` decides what to discard.
+
+    - ``drop-oldest`` discards the oldest queued batch to make room.
+    - ``drop-newest`` discards the incoming batch.
+    - ``coalesce`` collapses everything queued into the newest sample, so a
+      client that catches up resumes from the current gaze position.
+
+    Every discarded sample is counted and reported with the next batch.
+    """
+
+    def __init__(self, maxsize: int, max_batch: int, policy: OverflowPolicy):
+        self.maxsize = maxsize
+        self.max_batch = max_batch
+        self.policy = policy
+        self.total_dropped = 0
+        self._batches: Deque[np.ndarray] = deque()
+        self._dropped = 0
+        self._event = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._batches)
+
+    def put(self, samples: np.ndarray, dropped: int = 0) -> None:
+        """Queue samples, splitting them into batches of at most ``max_batch``.
+
+        Args:
+            samples: Structured array of gaze samples.
+            dropped: Samples already lost upstream, to be reported.
+        """
+        self._record_dropped(dropped)
+        for start in range(0, len(samples), self.max_batch):
+            self._put_batch(samples[start : start + self.max_batch])
+        if self._batches:
+            self._event.set()
+
+    async def get(self) -> Tuple[np.ndarray, int]:
+        """Wait for the next batch.
+
+        Returns:
+            Tuple of (samples, dropped) where ``dropped`` counts samples
+            discarded since the previous batch was handed out.
+        """
+        while not self._batches:
+            await self._event.wait()
+            self._event.clear()
+
+        dropped, self._dropped = self._dropped, 0
+        return self._batches.popleft(), dropped
+
+    def _put_batch(self, batch: np.ndarray) -> None:
+        if len(self._batches) < self.maxsize:
+            self._batches.append(batch)
+        elif self.policy == OverflowPolicy.DROP_OLDEST:
+            self._record_dropped(len(self._batches.popleft()))
+            self._batches.append(batch)
+        elif self.policy == OverflowPolicy.DROP_NEWEST:
+            self._record_dropped(len(batch))
+        else:
+            queued = sum(len(b) for b in self._batches) + len(batch)
+            self._batches.clear()
+            self._batches.append(batch[-1:])
+            self._record_dropped(queued - 1)
+
+    def _record_dropped(self, count: int) -> None:
+        self._dropped += count
+        self.total_dropped += count
@@ -0,0 +1,215 @@
+"""Broadcast of the gaze stream to any number of asyncio consumers."""
+
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.services.gaze_decimator import GazeDecimator
+from app.services.tobii_service import TobiiService
+
+logger = logging.getLogger(__name__)
+
+
+class GazeSubscription:
+    """One consumer's view of the shared gaze stream.
+
+    Each subscription owns a cursor into the service's ring buffer, so
+    subscribers never steal samples from each other. A subscription with a
+    ``decimator`` reads the stream reduced to that decimator's rate.
+    """
+
+    def __init__(
+        self, hub: "GazeHub", cursor: int, decimator: Optional[GazeDecimator] = None
+    ):
+        self._hub = hub
+        self._event = asyncio.Event()
+        self.cursor = cursor
+        self.decimator = decimator
+        # Timestamp of the last sample before an interruption of the stream
+        # that has not been reported to the client yet.
+        self.gap_start: Optional[int] = None
+
+    def pending_count(self) -> int:
+        """Number of samples available to read.
+
+        With a decimator this counts output samples, as estimated by
+        ``GazeDecimator.pending_count``, not the source samples behind them.
+        """
+        service = self._hub.service
+        pending = service.pending_count(self.cursor)
+        if self.decimator is None or not pending:
+            return pending
+        last_timestamp = service.gaze_buffer.last_timestamp()
+        return self.decimator.pending_count(pending, int(last_timestamp))
+
+    def read(self) -> Tuple[np.ndarray, int]:
+        """Read every sample written since the last read.
+
+        Returns:
+            Tuple of (samples, dropped) where ``dropped`` counts source
+            samples this subscriber fell too far behind to read. With a
+            decimator, ``samples`` holds the output samples completed so far.
+        """
+        samples, self.cursor, dropped = self._hub.service.get_gaze_data(self.cursor)
+        if self.decimator is not None:
+            if dropped:
+                # Do not average across the samples that were lost.
+                samples = np.concatenate(
+                    (self.decimator.flush(), self.decimator.process(samples))
+                )
+            else:
+                samples = self.decimator.process(samples)
+        return samples, dropped
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until new samples are written.
+
+        The wake-up is consumed before returning, so callers should read
+        *after* this returns to avoid missing one.
+
+        Returns:
+            True if woken by new data, False if the timeout expired.
+        """
+        if timeout is None:
+            try:
+                await self._event.wait()
+            finally:
+                self._event.clear()
+            return True
+
+        # A timer rather than ``asyncio.wait_for``, which on Python 3.11 can
+        # swallow a cancellation that arrives as the event is set, leaving
+        # the cancelled reader waiting forever.
+        expired = False
+
+        def expire() -> None:
+            nonlocal expired
+            expired = True
+            self._event.set()
+
+        timer = asyncio.get_running_loop().call_later(timeout, expire)
+        try:
+            await self._event.wait()
+        finally:
+            timer.cancel()
+            self._event.clear()
+        return not expired
+
+    def _wake(self) -> None:
+        self._event.set()
+
+    def _mark_gap(self, start_timestamp: int) -> None:
+        if self.gap_start is None:
+            self.gap_start = start_timestamp
+
+
+class GazeHub:
+    """Fans one SDK subscription out to many subscribers.
+
+    Capture is reference counted: the first subscriber (or other holder,
+    such as a recording) starts it and the last one to leave stops it. The
+    SDK thread pays the same constant cost
+    per sample however many subscribers there are; it schedules at most one
+    wake-up on the event loop at a time, and that wake-up fans out to
+    every subscriber.
+    """
+
+    def __init__(self, service: TobiiService):
+        self.service = service
+        self._subscriptions: List[GazeSubscription] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake_pending = False
+        self._capture_holds = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, rate_hz: Optional[float] = None) -> GazeSubscription:
+        """Attach a new subscriber, starting capture if it is the first.
+
+        Must be called from the event loop thread.
+
+        Args:
+            rate_hz: Rate to reduce this subscriber's stream to, or None for
+                every sample.
+        """
+        if not self._subscriptions:
+            self._loop = asyncio.get_running_loop()
+            self.acquire_capture()
+            self.service.add_listener(self._notify)
+
+        decimator = GazeDecimator(rate_hz) if rate_hz is not None else None
+        subscription = GazeSubscription(self, self.service.get_cursor(), decimator)
+        self._subscriptions.append(subscription)
+        logger.info(f"Gaze subscriber added ({len(self._subscriptions)} active)")
+        self.service.notify_status()
+        return subscription
+
+    def unsubscribe(self, subscription: GazeSubscription) -> None:
+        """Detach a subscriber, stopping capture if it was the last."""
+        if subscription not in self._subscriptions:
+            return
+
+        self._subscriptions.remove(subscription)
+        logger.info(f"Gaze subscriber removed ({len(self._subscriptions)} active)")
+
+        if not self._subscriptions:
+            self.service.remove_listener(self._notify)
+            self.release_capture()
+        self.service.notify_status()
+
+    def acquire_capture(self) -> None:
+        """Keep capture running until a matching ``release_capture``.
+
+        Must be called from the event loop thread.
+
+        Raises:
+            RuntimeError: If no eye tracker is connected.
+        """
+        if not self._capture_holds:
+            self.service.start_capture()
+        self._capture_holds += 1
+
+    def release_capture(self) -> None:
+        """Release a hold taken with ``acquire_capture``."""
+        self._capture_holds -= 1
+        if not self._capture_holds:
+            self.service.stop_capture()
+
+    def report_gap(self, start_timestamp: int) -> None:
+        """Mark an interruption of the stream after ``start_timestamp``.
+
+        Every current subscriber gets ``gap_start`` set, for its consumer to
+        report before the samples that follow. Safe to call from any thread.
+        """
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._mark_gap, start_timestamp)
+        except RuntimeError:
+            # The loop has been closed underneath us during shutdown.
+            pass
+
+    def _mark_gap(self, start_timestamp: int) -> None:
+        for subscription in self._subscriptions:
+            subscription._mark_gap(start_timestamp)
+
+    def _notify(self) -> None:
+        """Called from the SDK thread after every sample."""
+        if self._wake_pending:
+            return
+        self._wake_pending = True
+        try:
+            self._loop.call_soon_threadsafe(self._wake_subscribers)
+        except RuntimeError:
+            # The loop has been closed underneath us during shutdown.
+            self._wake_pending = False
+
+    def _wake_subscribers(self) -> None:
+        self._wake_pending = False
+        for subscription in self._subscriptions:
+            subscription._wake()
@@ -0,0 +1,548 @@
+"""Dyslexia-profile scoring of reading sessions."""
+
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.config import settings
+from app.models.gaze import Fixation
+from app.models.inference import InferenceStatus, ModelState, RiskScore
+from app.services.fixations import FixationDetector
+from app.services.gaze_buffer import GAZE_DTYPE
+from app.services.recorder import open_session
+
+try:
+    from numpy._core import multiarray as _multiarray
+except ImportError:  # NumPy without the 2.x module layout
+    from numpy.core import multiarray as _multiarray
+
+logger = logging.getLogger(__name__)
+
+# Window layout the profile models were trained on.
+SEQUENCE_LENGTH = 20
+STEP = 5
+FEATURE_NAMES = (
+    "CURRENT_FIX_DURATION",
+    "CURRENT_FIX_X",
+    "CURRENT_FIX_Y",
+    "PREVIOUS_SAC_AMPLITUDE",
+    "IS_REGRESSION",
+)
+RISK_THRESHOLD = 0.5
+SESSION_CHUNK = 65536
+
+# Written by ml-work/lexora_ml/export.py next to encoder.onnx and head.onnx.
+ONNX_MANIFEST = "model.json"
+ONNX_FORMAT = "lexora-onnx-1"
+
+# The two stages of a loaded classifier.
+_Encoder = Callable[[np.ndarray], np.ndarray]
+_Classifier = Callable[[List[np.ndarray]], np.ndarray]
+
+
+def fixation_features(
+    duration_ms: Sequence[float],
+    x: Sequence[float],
+    y: Sequence[float],
+    previous: Tuple[float, float] = (0.0, 0.0),
+) -> np.ndarray:
+    """Model features of consecutive fixations, as built for training.
+
+    Args:
+        duration_ms, x, y: Fixation durations and positions.
+        previous: Position of the fixation before the first one. As in the
+            training notebook, a session's first fixation has (0, 0).
+
+    Returns:
+        ``(len(x), 5)`` array with columns ``FEATURE_NAMES``.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    previous_x = np.concatenate(([previous[0]], x[:-1]))
+    previous_y = np.concatenate(([previous[1]], y[:-1]))
+    return np.column_stack(
+        (
+            np.asarray(duration_ms, dtype=np.float64),
+            x,
+            y,
+            np.hypot(x - previous_x, y - previous_y),
+            (x < previous_x).astype(np.float64),
+        )
+    )
+
+
+def make_windows(features: np.ndarray) -> np.ndarray:
+    """Overlapping ``SEQUENCE_LENGTH``-fixation windows, ``STEP`` apart."""
+    if len(features) < SEQUENCE_LENGTH:
+        return np.empty((0, SEQUENCE_LENGTH, features.shape[1]), dtype=np.float32)
+    windows = sliding_window_view(features, SEQUENCE_LENGTH, axis=0)[::STEP]
+    # The view's window axis comes last: (windows, features, fixations).
+    return np.ascontiguousarray(windows.transpose(0, 2, 1), dtype=np.float32)
+
+
+def session_fixations(path: str) -> List[Dict[str, Any]]:
+    """Run the fixation detector over a recorded session."""
+    columns = open_session(path)
+    count = len(columns["timestamp"])
+    detector = FixationDetector()
+    chunk = np.empty(min(count, SESSION_CHUNK), dtype=GAZE_DTYPE)
+    fixations: List[Dict[str, Any]] = []
+    for start in range(0, count, SESSION_CHUNK):
+        samples = chunk[: min(count - start, SESSION_CHUNK)]
+        for name in GAZE_DTYPE.names:
+            samples[name] = columns[name][start : start + len(samples)]
+        fixations.extend(detector.process(samples))
+    fixations.extend(detector.flush())
+    return fixations
+
+
+class _StandardScaler:
+    """Fitted state of a pickled scikit-learn ``StandardScaler``."""
+
+    with_mean = True
+    with_std = True
+    mean_: Optional[np.ndarray] = None
+    scale_: Optional[np.ndarray] = None
+
+    def transform(self, features: np.ndarray) -> np.ndarray:
+        if self.with_mean and self.mean_ is not None:
+            features = features - self.mean_
+        if self.with_std and self.scale_ is not None:
+            features = features / self.scale_
+        return features
+
+
+class _ScalerUnpickler(pickle.Unpickler):
+    """Loads a ``StandardScaler`` pickle without scikit-learn.
+
+    Only the classes such a pickle refers to are resolved, so a scaler file
+    cannot run arbitrary code. NumPy's module was renamed in 2.0 and the
+    scalers were pickled under both names.
+    """
+
+    def find_class(self, module: str, name: str) -> Any:
+        if module.startswith("sklearn.preprocessing") and name == "StandardScaler":
+            return _StandardScaler
+        if module in ("numpy.core.multiarray", "numpy._core.multiarray") and name in (
+            "_reconstruct",
+            "scalar",
+        ):
+            return getattr(_multiarray, name)
+        if module == "numpy" and name in ("ndarray", "dtype"):
+            return getattr(np, name)
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a scaler")
+
+
+def load_scaler(path: str) -> _StandardScaler:
+    """Load the feature scaler fitted alongside the classifier."""
+    with open(path, "rb") as f:
+        scaler = _ScalerUnpickler(f).load()
+    if not isinstance(scaler, _StandardScaler):
+        raise ValueError(f"{path} does not contain a StandardScaler")
+
+    names = getattr(scaler, "feature_names_in_", None)
+    if names is not None and tuple(names) != FEATURE_NAMES:
+        raise ValueError(
+            f"Scaler was fitted on {list(names)}, not {list(FEATURE_NAMES)}"
+        )
+    if getattr(scaler, "n_features_in_", len(FEATURE_NAMES)) != len(FEATURE_NAMES):
+        raise ValueError(f"Scaler expects {scaler.n_features_in_} features")
+    return scaler
+
+
+class InferenceService:
+    """Scores reading sessions with the dyslexia-profile classifier.
+
+    The classifier takes zero-padded windows of scaled fixation features,
+    encodes every window with the shared gaze encoder, averages the
+    embeddings of each input and classifies the result. The service runs
+    those stages separately: a session's windows are encoded once, the
+    all-zero padding window once at load time, and a score is the average
+    plus the classifier head. This is what lets a ``SessionScorer`` cache
+    embeddings as a live session grows.
+
+    The model is loaded once, with its scaler, on a background thread and
+    warmed up. ``INFERENCE_MODEL_PATH`` is either a directory exported by
+    ``ml-work/lexora_ml/export.py``, run with ONNX Runtime, or a Keras
+    ``.h5`` file, run with TensorFlow. TensorFlow traces and optimizes a
+    graph on its first call, which takes far longer than scoring itself;
+    every later call reuses the traced functions, whose input signatures
+    are fixed, so they are never retraced. ONNX Runtime loads in
+    milliseconds and encodes a window about ten times faster.
+
+    The runtime is imported by the loading thread only. It stays off the
+    startup path and is optional: without it the service runs as usual and
+    reports the model as unavailable.
+    """
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        scaler_path: Optional[str] = None,
+        model_input: Optional[str] = None,
+        min_windows: int = settings.INFERENCE_MIN_WINDOWS,
+    ):
+        self.model_path = model_path or settings.INFERENCE_MODEL_PATH
+        self.scaler_path = scaler_path or settings.INFERENCE_SCALER_PATH
+        self.model_input = model_input or settings.INFERENCE_MODEL_INPUT
+        self.min_windows = min_windows
+        self._lock = threading.Lock()
+        self._state = ModelState.NOT_LOADED
+        self._error: Optional[str] = None
+        self._load_seconds: Optional[float] = None
+        self._scaler: Optional[_StandardScaler] = None
+        self._input_names: List[str] = []
+        self._max_windows = 0
+        self._padding: Optional[np.ndarray] = None
+        self._encode: Optional[_Encoder] = None
+        self._head: Optional[_Classifier] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._state == ModelState.READY
+
+    @property
+    def max_windows(self) -> int:
+        """Windows per session the classifier takes."""
+        return self._max_windows
+
+    @property
+    def embedding_size(self) -> int:
+        return len(self._padding)
+
+    def status(self) -> InferenceStatus:
+        with self._lock:
+            return InferenceStatus(
+                state=self._state,
+                model=self.model_path,
+                max_windows=self._max_windows or None,
+                load_seconds=self._load_seconds,
+                error=self._error,
+            )
+
+    def load_in_background(self) -> None:
+        """Start loading the model, unless that has been done already."""
+        with self._lock:
+            if self._state != ModelState.NOT_LOADED:
+                return
+            self._state = ModelState.LOADING
+        threading.Thread(target=self._load, name="model-loader", daemon=True).start()
+
+    def new_session(self) -> "SessionScorer":
+        """Start scoring a live session incrementally.
+
+        Raises:
+            RuntimeError: If the model is not ready.
+        """
+        self._check_ready()
+        return SessionScorer(self)
+
+    def score_recording(self, path: str) -> RiskScore:
+        """Score a recorded session, detecting its fixations first.
+
+        Blocks for the whole computation, so call it off the event loop.
+        """
+        fixations = session_fixations(path)
+        return self._score_features(
+            fixation_features(
+                [f["duration_ms"] for f in fixations],
+                [f["x"] for f in fixations],
+                [f["y"] for f in fixations],
+            )
+        )
+
+    def score_fixations(self, fixations: List[Fixation]) -> RiskScore:
+        """Score the fixations of a session streamed to the client."""
+        return self._score_features(
+            fixation_features(
+                [f.duration_ms for f in fixations],
+                [f.x for f in fixations],
+                [f.y for f in fixations],
+            )
+        )
+
+    def scale(self, features: np.ndarray) -> np.ndarray:
+        """Scale fixation features as for training."""
+        return self._scaler.transform(features)
+
+    def encode(self, windows: np.ndarray) -> np.ndarray:
+        """Embeddings of scaled fixation windows, one row per window."""
+        return self._encode(windows)
+
+    def score_embeddings(
+        self, embeddings: np.ndarray, fixation_count: int
+    ) -> RiskScore:
+        """Risk score of a session from the embeddings of its first windows.
+
+        Raises:
+            ValueError: If there are fewer than ``min_windows`` windows.
+        """
+        start = time.perf_counter()
+        if len(embeddings) < self.min_windows:
+            needed = SEQUENCE_LENGTH + STEP * (self.min_windows - 1)
+            raise ValueError(
+                f"At least {needed} fixations are needed, "
+                f"the session has {fixation_count}"
+            )
+
+        # The classifier averages over all of its input windows, including
+        # the zero padding after the session's own.
+        padding = self._padding
+        pooled = (
+            embeddings.sum(axis=0) + (self._max_windows - len(embeddings)) * padding
+        ) / self._max_windows
+        # Other task inputs of a multi-task model are all padding, as they
+        # were for participants missing that task.
+        profiles = [
+            (pooled if name == self.model_input else padding)[None].astype(np.float32)
+            for name in self._input_names
+        ]
+        risk = float(self._head(profiles)[0, 0])
+
+        return RiskScore(
+            risk_score=risk,
+            at_risk=risk >= RISK_THRESHOLD,
+            fixation_count=fixation_count,
+            window_count=len(embeddings),
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+        )
+
+    def _score_features(self, features: np.ndarray) -> RiskScore:
+        """Risk score of one session from all of its fixation features.
+
+        Raises:
+            RuntimeError: If the model is not ready.
+            ValueError: If the session is too short to score.
+        """
+        start = time.perf_counter()
+        self._check_ready()
+        # Like the training data, keep the first windows of a long session.
+        windows = make_windows(self.scale(features))[: self._max_windows]
+        if len(windows) < self.min_windows:
+            embeddings = np.empty((len(windows), self.embedding_size))
+        else:
+            embeddings = self.encode(windows)
+
+        score = self.score_embeddings(embeddings, len(features))
+        score.elapsed_ms = (time.perf_counter() - start) * 1000
+        return score
+
+    def _check_ready(self) -> None:
+        if not self.is_ready:
+            raise RuntimeError(f"Model is {self._state.value}")
+
+    def _load(self) -> None:
+        start = time.perf_counter()
+        exported = not self.model_path.endswith((".h5", ".keras"))
+        missing = [
+            path
+            for path in (self.model_path, self.scaler_path)
+            if not os.path.exists(path)
+        ]
+        if missing:
+            # A deployment without the model, not a failure: say how to fix it.
+            message = (
+                f"No model file at {', '.join(missing)}; set "
+                "INFERENCE_MODEL_PATH and INFERENCE_SCALER_PATH"
+            )
+            logger.warning(f"Session scoring is disabled: {message}")
+            self._finish(ModelState.UNAVAILABLE, message)
+            return
+        try:
+            scaler = load_scaler(self.scaler_path)
+            if exported:
+                input_names, max_windows, encode, classify = self._load_onnx()
+            else:
+                input_names, max_windows, encode, classify = self._load_keras()
+            if self.model_input not in input_names:
+                raise ValueError(
+                    f"Model has no input {self.model_input!r}, only {input_names}"
+                )
+
+            # Warm both stages up; the padding embedding is needed anyway.
+            window_shape = (SEQUENCE_LENGTH, len(FEATURE_NAMES))
+            padding = encode(np.zeros((1,) + window_shape, dtype=np.float32))
+            padding = padding[0].astype(np.float64)
+            classify([padding[None].astype(np.float32)] * len(input_names))
+        except ImportError as e:
+            runtime = "ONNX Runtime" if exported else "TensorFlow"
+            logger.warning(f"Session scoring is disabled: {e}")
+            self._finish(ModelState.UNAVAILABLE, f"{runtime} is not installed ({e})")
+            return
+        except Exception as e:
+            logger.error(f"Failed to load model {self.model_path}: {e}")
+            self._finish(ModelState.ERROR, str(e))
+            return
+
+        with self._lock:
+            self._scaler = scaler
+            self._input_names = input_names
+            self._max_windows = max_windows
+            self._padding = padding
+            self._encode = encode
+            self._head = classify
+            self._load_seconds = time.perf_counter() - start
+            self._state = ModelState.READY
+        logger.info(f"Loaded model {self.model_path} in {self._load_seconds:.1f} s")
+
+    def _load_onnx(self) -> Tuple[List[str], int, _Encoder, _Classifier]:
+        """Load an encoder/head pair exported by ``lexora_ml.export``."""
+        import onnxruntime
+
+        with open(os.path.join(self.model_path, ONNX_MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest.get("format") != ONNX_FORMAT or not manifest.get("head"):
+            raise ValueError(f"{self.model_path} is not an exported classifier")
+        if (manifest["sequence_length"], manifest["feature_count"]) != (
+            SEQUENCE_LENGTH,
+            len(FEATURE_NAMES),
+        ):
+            raise ValueError(
+                f"Model expects windows of {manifest['sequence_length']} "
+                f"fixations with {manifest['feature_count']} features"
+            )
+
+        def session(name: str) -> Any:
+            return onnxruntime.InferenceSession(
+                os.path.join(self.model_path, name),
+                providers=["CPUExecutionProvider"],
+            )
+
+        encoder = session(manifest["encoder"])
+        head = session(manifest["head"])
+        input_names = list(manifest["inputs"])
+
+        def encode(windows: np.ndarray) -> np.ndarray:
+            return encoder.run(None, {"windows": windows})[0]
+
+        def classify(profiles: List[np.ndarray]) -> np.ndarray:
+            return head.run(None, dict(zip(input_names, profiles)))[0]
+
+        return input_names, manifest["max_windows"], encode, classify
+
+    def _load_keras(self) -> Tuple[List[str], int, _Encoder, _Classifier]:
+        """Load a Keras ``.h5`` classifier and split it into traced stages."""
+        import tensorflow as tf
+
+        keras = tf.keras
+        model = keras.models.load_model(self.model_path, compile=False)
+
+        input_names = [tensor.name for tensor in model.inputs]
+        max_windows = model.inputs[0].shape[1]
+        window_shape = (SEQUENCE_LENGTH, len(FEATURE_NAMES))
+        for tensor in model.inputs:
+            if tuple(tensor.shape[1:]) != (max_windows,) + window_shape:
+                raise ValueError(f"Input {tensor.name!r} has shape {tensor.shape}")
+
+        encoders = [
+            layer
+            for layer in model.layers
+            if isinstance(layer, keras.layers.TimeDistributed)
+        ]
+        pools = [
+            layer
+            for layer in model.layers
+            if isinstance(layer, keras.layers.GlobalAveragePooling1D)
+        ]
+        if len(encoders) != 1 or len(pools) != len(input_names):
+            raise ValueError(
+                "Expected a shared window encoder and one pooling layer per input"
+            )
+        encoder = encoders[0].layer
+        # The notebooks pool each input's embeddings in input order.
+        head = keras.Model([pool.output for pool in pools], model.output)
+        embedding_size = encoder.output.shape[-1]
+
+        window_spec = tf.TensorSpec((None,) + window_shape, tf.float32)
+        embedding_spec = tf.TensorSpec((1, embedding_size), tf.float32)
+
+        @tf.function(input_signature=[window_spec])
+        def encode(windows):
+            return encoder(windows, training=False)
+
+        @tf.function(input_signature=[[embedding_spec] * len(pools)])
+        def classify(profiles):
+            return head(profiles, training=False)
+
+        return (
+            input_names,
+            max_windows,
+            lambda windows: encode(windows).numpy(),
+            lambda profiles: classify(profiles).numpy(),
+        )
+
+    def _finish(self, state: ModelState, error: str) -> None:
+        with self._lock:
+            self._state = state
+            self._error = error
+
+
+class SessionScorer:
+    """Scores a live session incrementally from cached window embeddings.
+
+    Windows overlap (20 fixations, 5 apart), so encoding the whole session
+    again for every interim score would encode each fixation about four
+    times over, at a cost growing with the session. Instead each window is
+    scaled and encoded once, as soon as its last fixation arrives, and its
+    embedding is kept; a score is then only the average and the classifier
+    head, at constant cost. As when scoring a whole session, only the first
+    ``max_windows`` windows count, after which fixations are just counted.
+
+    Feed and score a session from one thread at a time.
+    """
+
+    def __init__(self, service: InferenceService):
+        self._service = service
+        self.fixation_count = 0
+        self.window_count = 0
+        self._embeddings = np.empty((service.max_windows, service.embedding_size))
+        # Scaled features from the first fixation of the next window on.
+        self._pending = np.empty((0, len(FEATURE_NAMES)))
+        self._previous = (0.0, 0.0)
+
+    @property
+    def is_full(self) -> bool:
+        return self.window_count == len(self._embeddings)
+
+    def add(self, fixations: List[Dict[str, Any]]) -> int:
+        """Add detected fixations, encoding the windows they complete.
+
+        Returns:
+            The number of windows completed.
+        """
+        self.fixation_count += len(fixations)
+        if not fixations or self.is_full:
+            return 0
+
+        x = [f["x"] for f in fixations]
+        y = [f["y"] for f in fixations]
+        features = fixation_features(
+            [f["duration_ms"] for f in fixations], x, y, previous=self._previous
+        )
+        self._previous = (x[-1], y[-1])
+
+        pending = np.concatenate((self._pending, self._service.scale(features)))
+        windows = make_windows(pending)[: len(self._embeddings) - self.window_count]
+        if len(windows):
+            end = self.window_count + len(windows)
+            self._embeddings[self.window_count : end] = self._service.encode(windows)
+            self.window_count = end
+        self._pending = pending[len(windows) * STEP :]
+        return len(windows)
+
+    def score(self) -> RiskScore:
+        """Risk score of the session so far.
+
+        Raises:
+            ValueError: If the session is still too short to score.
+        """
+        return self._service.score_embeddings(
+            self._embeddings[: self.window_count], self.fixation_count
+        )
@@ -0,0 +1,330 @@
+"""Recording of gaze sessions to disk."""
+
+import logging
+import os
+import re
+import threading
+import zipfile
+from datetime import datetime, timezone
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+from app.config import settings
+from app.models.recording import RecordingInfo
+from app.services.gaze_buffer import GAZE_DTYPE
+from app.services.tobii_service import TobiiService
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+COLUMNS = GAZE_DTYPE.names
+DOWNLOAD_CHUNK_BYTES = 1 << 20
+
+_SESSION_ID = re.compile(r"^[0-9A-Za-z_-]+$")
+
+
+class _ColumnWriter:
+    """Appends one field of the gaze samples to a growing ``.npy`` file.
+
+    The header is rewritten in place after every flush with the number of
+    samples written so far. NumPy pads the header so the shape can grow
+    without changing its length, so the file is a valid, memory-mappable
+    array at every flush and a crash loses at most the last interval.
+    """
+
+    def __init__(self, path: str, dtype: np.dtype):
+        self._file: BinaryIO = open(path, "wb")
+        self._header = {
+            "descr": npy_format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (0,),
+        }
+        npy_format.write_array_header_1_0(self._file, self._header)
+        self._header_size = self._file.tell()
+        self.count = 0
+
+    def append(self, values: np.ndarray) -> None:
+        self._file.write(np.ascontiguousarray(values).tobytes())
+        self.count += len(values)
+
+    def flush(self) -> None:
+        self._header["shape"] = (self.count,)
+        self._file.seek(0)
+        npy_format.write_array_header_1_0(self._file, self._header)
+        if self._file.tell() != self._header_size:
+            raise RuntimeError("npy header changed size while recording")
+        self._file.seek(0, os.SEEK_END)
+        self._file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class _Session:
+    def __init__(self, info: RecordingInfo, path: str):
+        self.info = info
+        self.path = path
+        self.stop = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.on_failure: Optional[Callable[[], None]] = None
+
+
+class SessionRecorder:
+    """Records the gaze stream into a session directory on disk.
+
+    A session is a directory under ``RECORDINGS_DIR`` holding one ``.npy``
+    file per field (``x``, ``y``, ``timestamp``) plus ``meta.json``. A
+    background thread drains the service's ring buffer through its own
+    cursor every ``RECORDING_FLUSH_INTERVAL_MS`` and appends the samples to
+    the column files, so memory use stays constant however long the
+    session runs and neither the SDK callback nor the websockets wait on
+    disk I/O.
+
+    The caller is responsible for keeping capture running while recording.
+    If the writer fails, the session ends on its own: it is stopped with
+    its ``error`` set, a new one can be started, and the ``on_failure``
+    callback given to ``start`` is called from the writer thread so the
+    caller can release capture.
+    """
+
+    def __init__(self, service: TobiiService, directory: Optional[str] = None):
+        self.service = service
+        self.directory = directory or settings.RECORDINGS_DIR
+        self._session: Optional[_Session] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_recording(self) -> bool:
+        return self._session is not None
+
+    @property
+    def current(self) -> Optional[RecordingInfo]:
+        """Metadata of the session being recorded, if any."""
+        with self._lock:
+            session = self._session
+            return session.info.model_copy() if session else None
+
+    def start(self, on_failure: Optional[Callable[[], None]] = None) -> RecordingInfo:
+        """Start recording a new session from the newest sample on.
+
+        Args:
+            on_failure: Called from the writer thread if the session ends
+                because writing failed, instead of through ``stop``.
+
+        Raises:
+            RuntimeError: If a session is already being recorded.
+        """
+        with self._lock:
+            if self._session is not None:
+                raise RuntimeError("Already recording")
+
+            started_at = datetime.now(timezone.utc)
+            session_id = self._new_session_id(started_at)
+            path = os.path.join(self.directory, session_id)
+            os.makedirs(path)
+
+            writers = {
+                name: _ColumnWriter(
+                    os.path.join(path, f"{name}.npy"), GAZE_DTYPE.fields[name][0]
+                )
+                for name in COLUMNS
+            }
+            session = _Session(
+                RecordingInfo(
+                    id=session_id,
+                    started_at=started_at,
+                    device=self.service.get_device_info(),
+                ),
+                path,
+            )
+            session.on_failure = on_failure
+            session.thread = threading.Thread(
+                target=self._run,
+                args=(session, writers, self.service.get_cursor()),
+                name="gaze-recorder",
+                daemon=True,
+            )
+            self._session = session
+            info = session.info.model_copy()
+
+        self._write_meta(session)
+        session.thread.start()
+        logger.info(f"Started recording session {session_id}")
+        return info
+
+    def stop(self) -> RecordingInfo:
+        """Stop recording, flushing everything captured so far.
+
+        Blocks until the writer thread has finished, so call it off the
+        event loop.
+
+        Raises:
+            RuntimeError: If nothing is being recorded.
+        """
+        with self._lock:
+            session, self._session = self._session, None
+        if session is None:
+            raise RuntimeError("Not recording")
+
+        session.stop.set()
+        session.thread.join()
+
+        with self._lock:
+            session.info.stopped_at = datetime.now(timezone.utc)
+            info = session.info.model_copy()
+        self._write_meta(session)
+        logger.info(
+            f"Stopped recording session {info.id}: {info.sample_count} samples, "
+            f"{info.dropped} dropped"
+        )
+        return info
+
+    def list_sessions(self) -> List[RecordingInfo]:
+        """Metadata of every recorded session, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        sessions = []
+        for name in sorted(os.listdir(self.directory)):
+            info = self.get_session(name)
+            if info is not None:
+                sessions.append(info)
+        return sessions
+
+    def get_session(self, session_id: str) -> Optional[RecordingInfo]:
+        """Metadata of one session, or None if it does not exist."""
+        path = self.session_path(session_id)
+        if path is None:
+            return None
+        current = self.current
+        if current is not None and current.id == session_id:
+            return current
+        with open(os.path.join(path, META_FILE)) as f:
+            return RecordingInfo.model_validate_json(f.read())
+
+    def session_path(self, session_id: str) -> Optional[str]:
+        """Directory of a session, or None if the id is unknown or invalid."""
+        if not _SESSION_ID.match(session_id):
+            return None
+        path = os.path.join(self.directory, session_id)
+        if not os.path.isfile(os.path.join(path, META_FILE)):
+            return None
+        return path
+
+    def _new_session_id(self, started_at: datetime) -> str:
+        base = started_at.strftime("%Y%m%d-%H%M%S")
+        session_id, suffix = base, 1
+        while os.path.exists(os.path.join(self.directory, session_id)):
+            suffix += 1
+            session_id = f"{base}-{suffix}"
+        return session_id
+
+    def _write_meta(self, session: _Session) -> None:
+        with self._lock:
+            payload = session.info.model_dump_json(indent=2)
+        tmp_path = os.path.join(session.path, META_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            f.write(payload)
+        os.replace(tmp_path, os.path.join(session.path, META_FILE))
+
+    def _run(
+        self, session: _Session, writers: Dict[str, _ColumnWriter], cursor: int
+    ) -> None:
+        interval = settings.RECORDING_FLUSH_INTERVAL_MS / 1000
+        try:
+            while True:
+                stopping = session.stop.wait(interval)
+                samples, cursor, dropped = self.service.get_gaze_data(cursor)
+                if len(samples):
+                    for name, writer in writers.items():
+                        writer.append(samples[name])
+                    for writer in writers.values():
+                        writer.flush()
+                if len(samples) or dropped:
+                    with self._lock:
+                        session.info.sample_count += len(samples)
+                        session.info.dropped += dropped
+                if stopping:
+                    break
+        except Exception as e:
+            logger.error(f"Recording writer failed: {e}")
+            self._fail(session, str(e))
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+    def _fail(self, session: _Session, error: str) -> None:
+        """End a session whose writer failed, unless it is being stopped."""
+        with self._lock:
+            session.info.error = error
+            owned = self._session is session
+            if owned:
+                self._session = None
+                session.info.stopped_at = datetime.now(timezone.utc)
+        if not owned:
+            # ``stop`` took the session first and finishes it.
+            return
+        try:
+            self._write_meta(session)
+        except OSError as e:
+            logger.error(f"Could not write metadata of {session.info.id}: {e}")
+        if session.on_failure is not None:
+            session.on_failure()
+
+
+def open_session(path: str) -> Dict[str, np.ndarray]:
+    """Open a recorded session's columns as read-only memory maps."""
+    return {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        for name in COLUMNS
+    }
+
+
+class _ChunkSink:
+    """Write-only file object that collects what ``zipfile`` writes to it."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_session_npz(path: str) -> Iterator[bytes]:
+    """Stream a session's columns as an uncompressed ``.npz`` archive.
+
+    The archive is produced on the fly in ``DOWNLOAD_CHUNK_BYTES`` pieces,
+    so downloading a long session needs neither a temporary file nor the
+    whole session in memory. ``np.load`` reads the result directly.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name in COLUMNS:
+            column_path = os.path.join(path, f"{name}.npy")
+            member = zipfile.ZipInfo(f"{name}.npy")
+            member.file_size = os.path.getsize(column_path)
+            with open(column_path, "rb") as source, archive.open(member, "w") as target:
+                while True:
+                    data = source.read(DOWNLOAD_CHUNK_BYTES)
+                    if not data:
+                        break
+                    target.write(data)
+                    yield sink.take()
+    # Closing the archive writes the central directory.
+    yield sink.take()
@@ -0,0 +1,140 @@
+"""Service status, pushed to watchers when it changes."""
+
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, List, Optional
+
+from app.config import settings
+from app.models.status import ServiceStatus
+from app.services.gaze_stream import GazeHub
+from app.services.tobii_service import TobiiService
+
+logger = logging.getLogger(__name__)
+
+
+class StatusMonitor:
+    """Keeps the current ``ServiceStatus`` and wakes watchers when it changes.
+
+    Discrete changes (discovery finishing, capture starting or stopping,
+    subscribers coming and going) arrive through the tracker service's
+    status listeners, from whatever thread they happen on. The sample rate
+    is the one continuous value: while capturing, watchers re-measure it
+    from the ring buffer's write position every ``rate_interval_s``, and it
+    only counts as changed once it moves by more than ``rate_tolerance``
+    (relative), so sampling jitter does not cause a push on every tick.
+    Without capture, watchers sleep until notified.
+    """
+
+    def __init__(
+        self,
+        service: TobiiService,
+        hub: GazeHub,
+        rate_interval_s: float = settings.STATUS_RATE_INTERVAL_S,
+        rate_tolerance: float = settings.STATUS_RATE_TOLERANCE,
+    ):
+        self.service = service
+        self.hub = hub
+        self.rate_interval_s = rate_interval_s
+        self.rate_tolerance = rate_tolerance
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watchers: List[asyncio.Event] = []
+        self._sample_rate = 0.0
+        self._rate_head = 0
+        self._rate_time: Optional[float] = None
+        self._status = self._read()
+        service.add_status_listener(self.notify)
+
+    @property
+    def status(self) -> ServiceStatus:
+        """The status as of the last refresh."""
+        return self._status
+
+    def notify(self) -> None:
+        """Report a possible change. Safe to call from any thread."""
+        loop = self._loop
+        if loop is None:
+            # Nobody is watching; ``watch`` reads a fresh status first.
+            return
+        try:
+            loop.call_soon_threadsafe(self.refresh)
+        except RuntimeError:
+            # The loop has been closed underneath us during shutdown.
+            pass
+
+    def refresh(self) -> ServiceStatus:
+        """Re-read the status, waking the watchers if it changed.
+
+        Must be called from the event loop thread.
+        """
+        status = self._read()
+        if status != self._status:
+            self._status = status
+            for event in self._watchers:
+                event.set()
+        return self._status
+
+    async def watch(self) -> AsyncIterator[ServiceStatus]:
+        """Yield the current status, then each new one as it changes."""
+        self._loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        self._watchers.append(event)
+        try:
+            sent = self.refresh()
+            yield sent
+            while True:
+                # Wake up to re-measure the rate with a timer rather than
+                # ``asyncio.wait_for``, which on Python 3.11 can swallow the
+                # cancellation of a watcher whose client has gone.
+                timer = (
+                    self._loop.call_later(self.rate_interval_s, event.set)
+                    if sent.capturing
+                    else None
+                )
+                try:
+                    await event.wait()
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+                event.clear()
+                if self.refresh() is not sent:
+                    sent = self._status
+                    yield sent
+        finally:
+            self._watchers.remove(event)
+
+    def _read(self) -> ServiceStatus:
+        connected = self.service.is_connected()
+        return ServiceStatus(
+            connected=connected,
+            discovering=self.service.is_discovering,
+            device=self.service.get_device_info() if connected else None,
+            capturing=self.service.is_capturing,
+            clients=self.hub.subscriber_count,
+            sample_rate_hz=self._measure_rate(),
+        )
+
+    def _measure_rate(self) -> float:
+        """Samples per second written since the previous measurement."""
+        if not self.service.is_capturing:
+            self._rate_time = None
+            self._sample_rate = 0.0
+            return self._sample_rate
+
+        now = time.monotonic()
+        head = self.service.gaze_buffer.head
+        if self._rate_time is None:
+            self._rate_head, self._rate_time = head, now
+            return self._sample_rate
+        elapsed = now - self._rate_time
+        # Several watchers tick; a window this short would only add noise.
+        if elapsed < self.rate_interval_s / 2:
+            return self._sample_rate
+
+        rate = (head - self._rate_head) / elapsed
+        self._rate_head, self._rate_time = head, now
+        if abs(rate - self._sample_rate) > self.rate_tolerance * max(
+            self._sample_rate, 1.0
+        ):
+            self._sample_rate = round(rate, 1)
+        return self._sample_rate
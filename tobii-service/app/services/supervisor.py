@@ -0,0 +1,158 @@
+"""Keeps the eye tracker connected across unplugs and stalled streams."""
+
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from app.config import settings
+from app.services.tobii_service import TobiiService
+from app.services.trackers import find_eyetracker
+
+logger = logging.getLogger(__name__)
+
+
+class TrackerSupervisor:
+    """Watches the tracker from a background thread and brings it back.
+
+    - Without a tracker, it looks for one again, waiting twice as long
+      after every empty search, from ``min_backoff_s`` up to
+      ``max_backoff_s``.
+    - If the SDK reports the tracker's connection lost, captured or not,
+      the tracker is detached and searched for like a missing one.
+    - While capturing, it watches the SDK callbacks. If none arrive for
+      ``stall_timeout_s``, it subscribes to the same tracker again, which
+      is enough after a short glitch. If the stream is still silent after
+      another ``stall_timeout_s``, the tracker is detached and searched for
+      like a missing one. Capture resumes on whatever tracker is found
+      next.
+
+    Each time the stream is restarted, ``on_gap`` is called with the
+    timestamp of the last sample received before it stopped.
+    """
+
+    def __init__(
+        self,
+        service: TobiiService,
+        on_gap: Optional[Callable[[int], None]] = None,
+        check_interval_s: float = settings.TRACKER_CHECK_INTERVAL_S,
+        stall_timeout_s: float = settings.TRACKER_STALL_TIMEOUT_S,
+        min_backoff_s: float = settings.TRACKER_REDISCOVERY_MIN_S,
+        max_backoff_s: float = settings.TRACKER_REDISCOVERY_MAX_S,
+    ):
+        self.service = service
+        self.on_gap = on_gap
+        self.check_interval_s = check_interval_s
+        self.stall_timeout_s = stall_timeout_s
+        self.min_backoff_s = min_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._backoff = min_backoff_s
+        self._next_search = 0.0
+        self._last_count = 0
+        self._last_flow = 0.0
+        self._restarted = False
+
+    def start(self) -> None:
+        """Start supervising, unless already started."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="tracker-supervisor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop supervising and wait for the thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        # The first search belongs to the service's own discovery.
+        while not self.service.wait_for_discovery(self.check_interval_s):
+            if self._stop.is_set():
+                return
+
+        while not self._stop.wait(self.check_interval_s):
+            try:
+                self._check()
+            except Exception as e:
+                logger.error(f"Tracker supervisor error: {e}")
+
+    def _check(self) -> None:
+        if not self.service.is_connected():
+            self._search()
+        elif self.service.connection_lost:
+            self._lose_tracker()
+        else:
+            self._check_flow()
+
+    def _search(self) -> None:
+        now = time.monotonic()
+        if now < self._next_search:
+            return
+
+        eyetracker = None
+        try:
+            eyetracker = find_eyetracker()
+            if eyetracker is not None:
+                self.service.attach_eyetracker(eyetracker)
+        except Exception as e:
+            logger.warning(f"Eye tracker search failed: {e}")
+            eyetracker = None
+
+        if eyetracker is None:
+            self._next_search = time.monotonic() + self._backoff
+            logger.debug(f"No eye tracker; searching again in {self._backoff:.0f} s")
+            self._backoff = min(self._backoff * 2, self.max_backoff_s)
+            return
+
+        self._backoff = self.min_backoff_s
+        self._next_search = 0.0
+        self._reset_flow()
+        if self.service.is_capturing:
+            self._report_gap()
+
+    def _check_flow(self) -> None:
+        if not self.service.is_capturing:
+            self._reset_flow()
+            return
+
+        count = self.service.callback_count
+        now = time.monotonic()
+        if count != self._last_count:
+            self._last_count = count
+            self._last_flow = now
+            self._restarted = False
+            return
+        if now - self._last_flow < self.stall_timeout_s:
+            return
+
+        if not self._restarted:
+            logger.warning(
+                f"No gaze data for {now - self._last_flow:.1f} s; resubscribing"
+            )
+            self.service.restart_stream()
+            self._restarted = True
+            self._last_flow = now
+            self._report_gap()
+        else:
+            self._lose_tracker()
+
+    def _lose_tracker(self) -> None:
+        """Detach the tracker and search for one right away."""
+        self.service.detach_eyetracker()
+        self._backoff = self.min_backoff_s
+        self._next_search = 0.0
+
+    def _reset_flow(self) -> None:
+        self._last_count = self.service.callback_count
+        self._last_flow = time.monotonic()
+        self._restarted = False
+
+    def _report_gap(self) -> None:
+        start = self.service.gaze_buffer.last_timestamp()
+        if start is not None and self.on_gap is not None:
+            self.on_gap(int(start))
@@ -1,32 +1,116 @@
 """Tobii eye tracker service."""
 
 import logging
-from typing import List, Dict, Any, Optional
-import tobii_research as tr
+import threading
+from typing import Callable, Dict, Any, Optional, Tuple
+import numpy as np
 
-from app.models.gaze import GazePoint
+from app.config import settings
+from app.services.gaze_buffer import GazeRingBuffer
+from app.services.trackers import (
+    EYETRACKER_GAZE_DATA,
+    EYETRACKER_NOTIFICATION_CONNECTION_LOST,
+    EYETRACKER_NOTIFICATION_CONNECTION_RESTORED,
+    find_eyetracker,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class TobiiService:
-    """Service for interacting with Tobii eye tracker."""
+    """Service for interacting with Tobii eye tracker.
+
+    Creating the service does not look for a tracker: SDK discovery can
+    take seconds, so it runs on a background thread started by
+    ``start_discovery`` once the server is up.
+
+    ``is_capturing`` is whether capture has been asked for, which outlives
+    the tracker: when a ``TrackerSupervisor`` detaches a tracker that
+    stopped responding and later attaches a new one, capture resumes on it
+    by itself.
+    """
 
     def __init__(self):
-        self.eyetracker: Optional[tr.EyeTracker] = None
-        self.gaze_data: List[GazePoint] = []
+        self.eyetracker: Optional[Any] = None
+        self.gaze_buffer = GazeRingBuffer(settings.GAZE_BUFFER_CAPACITY)
+        self._append = self.gaze_buffer.append
         self.is_capturing: bool = False
-        self._initialize_eyetracker()
+        self.is_discovering: bool = False
+        self._discovery: Optional[threading.Thread] = None
+        # Every SDK callback counts, valid or not, so that a user looking
+        # away is not mistaken for a stalled stream.
+        self.callback_count = 0
+        # Set by the SDK when the attached tracker stops answering, whether
+        # or not capture is running, and cleared if it comes back.
+        self.connection_lost = False
+        self._subscribed: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._listeners: Tuple[Callable[[], None], ...] = ()
+        self._status_listeners: Tuple[Callable[[], None], ...] = ()
+
+    def start_discovery(self) -> None:
+        """Look for the eye tracker on a background thread, unless already done."""
+        if self._discovery is not None:
+            return
+        self.is_discovering = True
+        self._discovery = threading.Thread(
+            target=self._initialize_eyetracker, name="tracker-discovery", daemon=True
+        )
+        self._discovery.start()
+
+    def wait_for_discovery(self, timeout: Optional[float] = None) -> bool:
+        """Block until discovery has finished; False if it is still running."""
+        if self._discovery is not None:
+            self._discovery.join(timeout)
+        return not self.is_discovering
 
     def _initialize_eyetracker(self) -> None:
-        """Initialize connection to Tobii eye tracker."""
+        """Initialize connection to the eye tracker of the configured backend."""
         try:
-            eyetrackers = tr.find_all_eyetrackers()
-            if eyetrackers:
-                self.eyetracker = eyetrackers[0]
-                logger.info(f"Connected to eye tracker: {self.eyetracker.device_name}")
+            eyetracker = find_eyetracker()
+            if eyetracker:
+                self.attach_eyetracker(eyetracker)
+            else:
+                logger.info("No eye tracker found")
         except Exception as e:
             logger.error(f"Failed to initialize eye tracker: {e}")
+        finally:
+            self.is_discovering = False
+            self.notify_status()
+
+    def attach_eyetracker(self, eyetracker: Any) -> None:
+        """Use a newly found tracker, resuming capture on it if it is wanted.
+
+        Raises:
+            Exception: Whatever the SDK raises if subscribing fails; the
+                tracker is then not attached.
+        """
+        with self._lock:
+            if self.is_capturing:
+                self._subscribe(eyetracker)
+            self.eyetracker = eyetracker
+            self.connection_lost = False
+            self._watch_connection(eyetracker)
+        logger.info(f"Connected to eye tracker: {eyetracker.device_name}")
+        self.notify_status()
+
+    def detach_eyetracker(self) -> None:
+        """Forget a tracker that stopped responding; capture stays wanted."""
+        with self._lock:
+            eyetracker, self.eyetracker = self.eyetracker, None
+            self._unsubscribe()
+            if eyetracker is not None:
+                self._unwatch_connection(eyetracker)
+        if eyetracker is not None:
+            logger.warning(f"Lost eye tracker: {eyetracker.device_name}")
+            self.notify_status()
+
+    def restart_stream(self) -> None:
+        """Subscribe to the gaze data of the current tracker again."""
+        with self._lock:
+            if self.is_capturing and self.eyetracker:
+                self._unsubscribe()
+                self._subscribe(self.eyetracker)
 
     def is_connected(self) -> bool:
         """Check if eye tracker is connected."""
@@ -45,71 +129,166 @@ class TobiiService:
         }
 
     def _gaze_data_callback(self, gaze_data: Dict[str, Any]) -> None:
-        """Callback function to handle incoming gaze data."""
+        """Callback function to handle incoming gaze data.
+
+        Runs on the SDK thread for every sample, holding the GIL the asyncio
+        loop needs, so it does the bare minimum: average the valid eyes and
+        store raw values. Models are only built at serialization time.
+        """
+        self.callback_count += 1
         try:
-            left_gaze = gaze_data.get("left_gaze_point_on_display_area", (None, None))
-            right_gaze = gaze_data.get("right_gaze_point_on_display_area", (None, None))
-
-            x_coords = []
-            y_coords = []
-
-            if left_gaze[0] is not None:
-                x_coords.append(left_gaze[0])
-                y_coords.append(left_gaze[1])
-
-            if right_gaze[0] is not None:
-                x_coords.append(right_gaze[0])
-                y_coords.append(right_gaze[1])
-
-            if x_coords and y_coords:
-                avg_x = sum(x_coords) / len(x_coords)
-                avg_y = sum(y_coords) / len(y_coords)
-
-                self.gaze_data.append(
-                    GazePoint(
-                        fixation_x=avg_x,
-                        fixation_y=avg_y,
-                        timestamp=gaze_data["system_time_stamp"],
-                    )
-                )
+            left_x, left_y = gaze_data["left_gaze_point_on_display_area"]
+            right_x, right_y = gaze_data["right_gaze_point_on_display_area"]
+
+            # The SDK reports an eye it lost as NaN; ``v == v`` is False only
+            # for NaN and also rejects the None some firmware versions send.
+            left_valid = left_x is not None and left_x == left_x
+            if right_x is not None and right_x == right_x:
+                if left_valid:
+                    x = (left_x + right_x) * 0.5
+                    y = (left_y + right_y) * 0.5
+                else:
+                    x, y = right_x, right_y
+            elif left_valid:
+                x, y = left_x, left_y
+            else:
+                return
+
+            self._append(x, y, gaze_data["system_time_stamp"])
+            for listener in self._listeners:
+                listener()
         except Exception as e:
             logger.error(f"Error processing gaze data: {e}")
 
     def start_capture(self) -> None:
         """Start capturing gaze data."""
-        if not self.eyetracker:
-            raise RuntimeError("No eye tracker connected")
+        with self._lock:
+            if not self.eyetracker:
+                if self.is_discovering:
+                    raise RuntimeError("Still looking for the eye tracker")
+                raise RuntimeError("No eye tracker connected")
 
-        if self.is_capturing:
-            logger.warning("Already capturing gaze data")
-            return
+            if self.is_capturing:
+                logger.warning("Already capturing gaze data")
+                return
 
-        self.eyetracker.subscribe_to(
-            tr.EYETRACKER_GAZE_DATA, self._gaze_data_callback, as_dictionary=True
-        )
-        self.is_capturing = True
+            self._subscribe(self.eyetracker)
+            self.is_capturing = True
         logger.info("Started gaze data capture")
+        self.notify_status()
 
     def stop_capture(self) -> None:
-        """Stop capturing gaze data."""
-        if not self.eyetracker:
-            raise RuntimeError("No eye tracker connected")
+        """Stop capturing gaze data.
 
-        if not self.is_capturing:
-            logger.warning("Not currently capturing gaze data")
+        Works whether or not the tracker is still there.
+        """
+        with self._lock:
+            if not self.is_capturing:
+                logger.warning("Not currently capturing gaze data")
+                return
+
+            self.is_capturing = False
+            self._unsubscribe()
+        logger.info("Stopped gaze data capture")
+        self.notify_status()
+
+    def _subscribe(self, eyetracker: Any) -> None:
+        eyetracker.subscribe_to(
+            EYETRACKER_GAZE_DATA, self._gaze_data_callback, as_dictionary=True
+        )
+        self._subscribed = eyetracker
+
+    def _unsubscribe(self) -> None:
+        eyetracker, self._subscribed = self._subscribed, None
+        if eyetracker is None:
             return
+        try:
+            eyetracker.unsubscribe_from(EYETRACKER_GAZE_DATA, self._gaze_data_callback)
+        except Exception as e:
+            # A device that has gone away may refuse; it sends nothing anyway.
+            logger.warning(f"Failed to unsubscribe from gaze data: {e}")
+
+    def _watch_connection(self, eyetracker: Any) -> None:
+        try:
+            eyetracker.subscribe_to(
+                EYETRACKER_NOTIFICATION_CONNECTION_LOST,
+                self._connection_lost_callback,
+                as_dictionary=True,
+            )
+            eyetracker.subscribe_to(
+                EYETRACKER_NOTIFICATION_CONNECTION_RESTORED,
+                self._connection_restored_callback,
+                as_dictionary=True,
+            )
+        except ValueError:
+            # The synthetic and replay backends offer no notifications.
+            pass
+
+    def _unwatch_connection(self, eyetracker: Any) -> None:
+        for stream, callback in (
+            (EYETRACKER_NOTIFICATION_CONNECTION_LOST, self._connection_lost_callback),
+            (
+                EYETRACKER_NOTIFICATION_CONNECTION_RESTORED,
+                self._connection_restored_callback,
+            ),
+        ):
+            try:
+                eyetracker.unsubscribe_from(stream, callback)
+            except Exception as e:
+                logger.debug(f"Failed to unsubscribe from {stream}: {e}")
+
+    def _connection_lost_callback(self, notification: Dict[str, Any]) -> None:
+        logger.warning("Eye tracker connection lost")
+        self.connection_lost = True
 
-        self.eyetracker.unsubscribe_from(
-            tr.EYETRACKER_GAZE_DATA, self._gaze_data_callback
+    def _connection_restored_callback(self, notification: Dict[str, Any]) -> None:
+        logger.info("Eye tracker connection restored")
+        self.connection_lost = False
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Register a callable invoked from the SDK thread after each sample."""
+        self._listeners = self._listeners + (listener,)
+
+    def remove_listener(self, listener: Callable[[], None]) -> None:
+        """Unregister a listener previously passed to ``add_listener``."""
+        self._listeners = tuple(l for l in self._listeners if l != listener)
+
+    def add_status_listener(self, listener: Callable[[], None]) -> None:
+        """Register a callable invoked, from any thread, when the status changes.
+
+        Covers discovery finishing, capture starting or stopping and
+        anything reported through ``notify_status``.
+        """
+        self._status_listeners = self._status_listeners + (listener,)
+
+    def remove_status_listener(self, listener: Callable[[], None]) -> None:
+        """Unregister a listener passed to ``add_status_listener``."""
+        self._status_listeners = tuple(
+            l for l in self._status_listeners if l != listener
         )
-        self.is_capturing = False
-        logger.info("Stopped gaze data capture")
 
-    def get_gaze_data(self) -> List[Dict[str, Any]]:
-        """Get collected gaze data."""
-        return [point.dict() for point in self.gaze_data]
+    def notify_status(self) -> None:
+        """Tell the status listeners that something they report has changed."""
+        for listener in self._status_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Error in status listener: {e}")
+
+    def get_cursor(self) -> int:
+        """Get a read cursor positioned at the newest gaze sample."""
+        return self.gaze_buffer.head
+
+    def get_gaze_data(self, cursor: int) -> Tuple[np.ndarray, int, int]:
+        """Get gaze samples collected since ``cursor``.
+
+        Returns:
+            Tuple of (samples, new_cursor, dropped) where ``samples`` is a
+            structured array with ``x``, ``y`` and ``timestamp`` fields and
+            ``dropped`` counts samples overwritten before they were read.
+        """
+        return self.gaze_buffer.drain(cursor)
 
-    def clear_data(self) -> None:
-        """Clear the gaze data buffer."""
-        self.gaze_data.clear()
-        logger.info("Cleared gaze data buffer")
+    def pending_count(self, cursor: int) -> int:
+        """Number of samples written since ``cursor``."""
+        return self.gaze_buffer.head - cursor
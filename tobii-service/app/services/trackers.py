@@ -0,0 +1,380 @@
+"""Eye tracker backends.
+
+``find_eyetracker`` returns an object with the subset of the
+``tobii_research.EyeTracker`` interface the service uses: the device info
+attributes plus ``subscribe_to`` / ``unsubscribe_from``. Besides real Tobii
+hardware there is a synthetic gaze generator and a replay of recorded
+sessions, both of which call back with the same dictionaries as the SDK so
+the service can be exercised and load-tested without a device.
+"""
+
+import logging
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Same value as ``tobii_research.EYETRACKER_GAZE_DATA``, defined here so the
+# SDK only needs to be importable when the tobii backend is used.
+EYETRACKER_GAZE_DATA = "gaze_data"
+# Same values as the SDK's connection notifications, which only the tobii
+# backend sends: the others cannot lose their connection.
+EYETRACKER_NOTIFICATION_CONNECTION_LOST = "notification_connection_lost"
+EYETRACKER_NOTIFICATION_CONNECTION_RESTORED = "notification_connection_restored"
+
+TOBII_BACKEND = "tobii"
+SYNTHETIC_BACKEND = "synthetic"
+REPLAY_BACKEND = "replay"
+
+GazeCallback = Callable[[Dict[str, Any]], None]
+EyePoints = Tuple[float, float, float, float]
+
+_NAN = float("nan")
+_INVALID_POINT = (_NAN, _NAN)
+_INVALID_POINT_3D = (_NAN, _NAN, _NAN)
+# Plausible fixed geometry for the fields the service does not use.
+_LEFT_ORIGIN = (-30.0, 0.0, 600.0)
+_RIGHT_ORIGIN = (30.0, 0.0, 600.0)
+_LEFT_ORIGIN_TRACKBOX = (0.45, 0.5, 0.5)
+_RIGHT_ORIGIN_TRACKBOX = (0.55, 0.5, 0.5)
+_PUPIL_DIAMETER = 3.5
+
+
+def system_time_stamp() -> int:
+    """Microsecond monotonic clock, the same one ``system_time_stamp`` uses."""
+    return time.monotonic_ns() // 1000
+
+
+def make_gaze_data(
+    left_x: float,
+    left_y: float,
+    right_x: float,
+    right_y: float,
+    device_time_stamp: int,
+    system_time_stamp: int,
+) -> Dict[str, Any]:
+    """Build a gaze sample shaped like the SDK's ``as_dictionary=True`` output.
+
+    An eye whose coordinates are NaN is reported invalid, as the SDK does.
+    """
+    left_valid = left_x == left_x
+    right_valid = right_x == right_x
+    return {
+        "device_time_stamp": device_time_stamp,
+        "system_time_stamp": system_time_stamp,
+        "left_gaze_point_on_display_area": (left_x, left_y),
+        "left_gaze_point_in_user_coordinate_system": (
+            _LEFT_ORIGIN if left_valid else _INVALID_POINT_3D
+        ),
+        "left_gaze_point_validity": int(left_valid),
+        "left_pupil_diameter": _PUPIL_DIAMETER if left_valid else _NAN,
+        "left_pupil_validity": int(left_valid),
+        "left_gaze_origin_in_user_coordinate_system": (
+            _LEFT_ORIGIN if left_valid else _INVALID_POINT_3D
+        ),
+        "left_gaze_origin_in_trackbox_coordinate_system": (
+            _LEFT_ORIGIN_TRACKBOX if left_valid else _INVALID_POINT_3D
+        ),
+        "left_gaze_origin_validity": int(left_valid),
+        "right_gaze_point_on_display_area": (right_x, right_y),
+        "right_gaze_point_in_user_coordinate_system": (
+            _RIGHT_ORIGIN if right_valid else _INVALID_POINT_3D
+        ),
+        "right_gaze_point_validity": int(right_valid),
+        "right_pupil_diameter": _PUPIL_DIAMETER if right_valid else _NAN,
+        "right_pupil_validity": int(right_valid),
+        "right_gaze_origin_in_user_coordinate_system": (
+            _RIGHT_ORIGIN if right_valid else _INVALID_POINT_3D
+        ),
+        "right_gaze_origin_in_trackbox_coordinate_system": (
+            _RIGHT_ORIGIN_TRACKBOX if right_valid else _INVALID_POINT_3D
+        ),
+        "right_gaze_origin_validity": int(right_valid),
+    }
+
+
+class _ThreadedEyeTracker:
+    """Base for backends that deliver samples from their own thread.
+
+    Subclasses implement ``_samples``, a generator of (seconds since the
+    stream started, eye points) pairs; the seconds become the samples'
+    timestamps. Samples are delivered when they fall due, ``speed`` times
+    faster than their timestamps, or as fast as the callback keeps up when
+    ``speed`` is 0. If the thread wakes up late (coarse sleep granularity, a
+    busy GIL) the overdue samples are delivered back to back, so the
+    long-run rate is exact even when individual sleeps are not.
+    """
+
+    device_name = ""
+    serial_number = ""
+    model = ""
+    firmware_version = settings.VERSION
+    speed = 1.0
+
+    def __init__(self):
+        self._streams: Dict[GazeCallback, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def subscribe_to(
+        self, stream: str, callback: GazeCallback, as_dictionary: bool = True
+    ) -> None:
+        if stream != EYETRACKER_GAZE_DATA:
+            raise ValueError(f"Unsupported stream: {stream}")
+        if not as_dictionary:
+            raise ValueError(f"{type(self).__name__} only delivers dictionaries")
+
+        stop = threading.Event()
+        with self._lock:
+            if callback in self._streams:
+                return
+            self._streams[callback] = stop
+        threading.Thread(
+            target=self._run,
+            args=(callback, stop),
+            name=f"{type(self).__name__}-gaze",
+            daemon=True,
+        ).start()
+
+    def unsubscribe_from(
+        self, stream: str, callback: Optional[GazeCallback] = None
+    ) -> None:
+        with self._lock:
+            if callback is None:
+                stops = list(self._streams.values())
+                self._streams.clear()
+            else:
+                stop = self._streams.pop(callback, None)
+                stops = [stop] if stop is not None else []
+        for stop in stops:
+            stop.set()
+
+    def _samples(self) -> Iterator[Tuple[float, EyePoints]]:
+        raise NotImplementedError
+
+    def _run(self, callback: GazeCallback, stop: threading.Event) -> None:
+        start = time.monotonic()
+        start_stamp = system_time_stamp()
+        try:
+            for offset, (left_x, left_y, right_x, right_y) in self._samples():
+                if self.speed:
+                    delay = start + offset / self.speed - time.monotonic()
+                    if delay > 0 and stop.wait(delay):
+                        return
+                if stop.is_set():
+                    return
+
+                device_stamp = int(offset * 1_000_000)
+                callback(
+                    make_gaze_data(
+                        left_x,
+                        left_y,
+                        right_x,
+                        right_y,
+                        device_stamp,
+                        start_stamp + device_stamp,
+                    )
+                )
+        except Exception as e:
+            logger.error(f"{self.model} gaze stream stopped: {e}")
+
+
+class SyntheticEyeTracker(_ThreadedEyeTracker):
+    """Generates plausible reading-like gaze at a fixed sampling rate.
+
+    Gaze dwells on a fixation target, jumps to a new target in a short
+    saccade, and is lost on both eyes for the duration of a blink. Each eye
+    gets independent Gaussian noise on top of the true position.
+    """
+
+    model = "Synthetic"
+    serial_number = "SYNTHETIC"
+
+    MIN_RATE_HZ = 60
+    MAX_RATE_HZ = 1200
+    SACCADE_DURATION = (0.02, 0.06)
+    BLINK_DURATION = (0.1, 0.25)
+
+    def __init__(
+        self,
+        rate_hz: float,
+        noise: float = 0.005,
+        saccade_rate_hz: float = 3.0,
+        blink_rate_hz: float = 0.3,
+        seed: Optional[int] = None,
+    ):
+        if not self.MIN_RATE_HZ <= rate_hz <= self.MAX_RATE_HZ:
+            raise ValueError(
+                f"rate_hz must be between {self.MIN_RATE_HZ} and {self.MAX_RATE_HZ}"
+            )
+        super().__init__()
+        self.rate_hz = rate_hz
+        self.noise = noise
+        self.saccade_rate_hz = saccade_rate_hz
+        self.blink_rate_hz = blink_rate_hz
+        self.seed = seed
+        self.device_name = f"Synthetic Eye Tracker ({rate_hz:g} Hz)"
+
+    def _samples(self) -> Iterator[Tuple[float, EyePoints]]:
+        rng = random.Random(self.seed)
+        gauss = rng.gauss
+        period = 1.0 / self.rate_hz
+        noise = self.noise
+
+        def next_event(rate: float) -> float:
+            return rng.expovariate(rate) if rate > 0 else math.inf
+
+        x, y = rng.uniform(0.1, 0.9), rng.uniform(0.1, 0.9)
+        saccade_at = next_event(self.saccade_rate_hz)
+        blink_at = next_event(self.blink_rate_hz)
+        saccade = None  # (start, end, from_x, from_y, to_x, to_y)
+        blink_until = -1.0
+
+        i = 0
+        while True:
+            t = i * period
+            i += 1
+
+            if saccade is None and t >= saccade_at:
+                duration = rng.uniform(*self.SACCADE_DURATION)
+                saccade = (
+                    t, t + duration, x, y, rng.uniform(0.1, 0.9), rng.uniform(0.1, 0.9)
+                )
+            if saccade is not None:
+                start, end, from_x, from_y, to_x, to_y = saccade
+                if t >= end:
+                    x, y = to_x, to_y
+                    saccade = None
+                    saccade_at = t + next_event(self.saccade_rate_hz)
+                else:
+                    # Smoothstep gives the bell-shaped velocity profile of a
+                    # real saccade rather than a constant-speed jump.
+                    p = (t - start) / (end - start)
+                    p = p * p * (3.0 - 2.0 * p)
+                    x = from_x + (to_x - from_x) * p
+                    y = from_y + (to_y - from_y) * p
+
+            if t >= blink_at:
+                blink_until = t + rng.uniform(*self.BLINK_DURATION)
+                blink_at = blink_until + next_event(self.blink_rate_hz)
+            if t < blink_until:
+                yield t, (_NAN, _NAN, _NAN, _NAN)
+                continue
+
+            yield t, (
+                x + gauss(0.0, noise),
+                y + gauss(0.0, noise),
+                x + gauss(0.0, noise),
+                y + gauss(0.0, noise),
+            )
+
+
+class ReplayEyeTracker(_ThreadedEyeTracker):
+    """Streams a recorded session back through the SDK callback interface.
+
+    The recording is a session recorded by the service, or an ``.npy``
+    structured array or ``.npz`` archive with ``x``, ``y`` and ``timestamp``
+    (microseconds) fields. Samples keep their recorded spacing in time and
+    are paced by it divided by ``speed``; a speed of 0 replays as fast as
+    the callback keeps up. Both eyes report the recorded point, and NaN
+    coordinates replay as lost samples.
+    """
+
+    model = "Replay"
+    serial_number = "REPLAY"
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = True):
+        if speed < 0:
+            raise ValueError("speed must not be negative")
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.x, self.y, self.timestamp = load_recording(path)
+        self.device_name = f"Replay of {os.path.basename(path)}"
+        logger.info(f"Loaded {len(self.x)} samples for replay from {path}")
+
+    def _samples(self) -> Iterator[Tuple[float, EyePoints]]:
+        if not len(self.x):
+            return
+
+        count = len(self.x)
+        offsets = (self.timestamp - self.timestamp[0]) / 1_000_000
+        # One pass lasts the recording plus one mean sample interval, so
+        # the next pass starts where the following sample would have.
+        span = offsets[-1] * count / (count - 1) if count > 1 else 0.0
+
+        xs, ys, offsets = self.x.tolist(), self.y.tolist(), offsets.tolist()
+        base = 0.0
+        while True:
+            for offset, x, y in zip(offsets, xs, ys):
+                yield base + offset, (x, y, x, y)
+            if not self.loop:
+                return
+            base += span
+
+
+def load_recording(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Load ``x``, ``y`` and ``timestamp`` columns from a recording.
+
+    ``path`` may be a session directory written by the recorder, an
+    ``.npz`` archive (such as a downloaded session) or a structured ``.npy``.
+    """
+    if os.path.isdir(path):
+        # Imported here: the recorder depends on the service, which
+        # depends on this module.
+        from app.services.recorder import open_session
+
+        columns = open_session(path)
+    elif path.endswith(".npz"):
+        with np.load(path) as archive:
+            columns = {name: archive[name] for name in ("x", "y", "timestamp")}
+    else:
+        data = np.load(path, mmap_mode="r")
+        columns = {name: data[name] for name in ("x", "y", "timestamp")}
+
+    return (
+        np.asarray(columns["x"], dtype=np.float64),
+        np.asarray(columns["y"], dtype=np.float64),
+        np.asarray(columns["timestamp"], dtype=np.int64),
+    )
+
+
+def find_eyetracker(backend: Optional[str] = None) -> Optional[Any]:
+    """Return the tracker for the configured backend, or None if none is found.
+
+    ``tobii_research`` is only imported for the tobii backend, so the
+    synthetic and replay backends work on machines without the SDK.
+    """
+    backend = backend or settings.TRACKER_BACKEND
+
+    if backend == TOBII_BACKEND:
+        import tobii_research as tr
+
+        eyetrackers = tr.find_all_eyetrackers()
+        return eyetrackers[0] if eyetrackers else None
+
+    if backend == SYNTHETIC_BACKEND:
+        return SyntheticEyeTracker(
+            settings.SYNTHETIC_RATE_HZ,
+            noise=settings.SYNTHETIC_NOISE,
+            saccade_rate_hz=settings.SYNTHETIC_SACCADE_RATE_HZ,
+            blink_rate_hz=settings.SYNTHETIC_BLINK_RATE_HZ,
+            seed=settings.SYNTHETIC_SEED,
+        )
+
+    if backend == REPLAY_BACKEND:
+        if not settings.REPLAY_PATH:
+            raise ValueError("REPLAY_PATH must be set for the replay backend")
+        return ReplayEyeTracker(
+            settings.REPLAY_PATH, speed=settings.REPLAY_SPEED, loop=settings.REPLAY_LOOP
+        )
+
+    raise ValueError(f"Unknown tracker backend: {backend}")
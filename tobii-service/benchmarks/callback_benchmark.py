@@ -0,0 +1,128 @@
+"""Micro-benchmark of the per-sample cost of the SDK gaze callback.
+
+Compares the current ``TobiiService._gaze_data_callback`` with the original
+implementation, which built temporary coordinate lists and a validated
+``GazePoint`` for every sample.
+
+Usage (from the tobii-service directory):
+
+    python benchmarks/callback_benchmark.py [--samples N] [--repeat R]
+"""
+
+import argparse
+import math
+import os
+import sys
+import timeit
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.gaze import GazePoint  # noqa: E402
+from app.services.tobii_service import TobiiService  # noqa: E402
+
+NAN = float("nan")
+
+
+def make_samples(count: int) -> List[Dict[str, Any]]:
+    """Build SDK-shaped gaze dictionaries, with the odd lost eye or blink."""
+    samples = []
+    for i in range(count):
+        left = (0.4 + (i % 100) * 1e-3, 0.5)
+        right = (0.42 + (i % 100) * 1e-3, 0.51)
+        if i % 50 == 0:
+            left = (NAN, NAN)
+        if i % 200 == 1:
+            left = right = (NAN, NAN)
+        samples.append(
+            {
+                "left_gaze_point_on_display_area": left,
+                "right_gaze_point_on_display_area": right,
+                "left_gaze_point_validity": int(not math.isnan(left[0])),
+                "right_gaze_point_validity": int(not math.isnan(right[0])),
+                "device_time_stamp": i * 1000,
+                "system_time_stamp": i * 1000,
+            }
+        )
+    return samples
+
+
+def make_legacy_callback(store: List[GazePoint]) -> Callable[[Dict[str, Any]], None]:
+    """The callback as it was before the lean capture path."""
+
+    def callback(gaze_data: Dict[str, Any]) -> None:
+        try:
+            left_gaze = gaze_data.get("left_gaze_point_on_display_area", (None, None))
+            right_gaze = gaze_data.get("right_gaze_point_on_display_area", (None, None))
+
+            x_coords = []
+            y_coords = []
+
+            if left_gaze[0] is not None:
+                x_coords.append(left_gaze[0])
+                y_coords.append(left_gaze[1])
+
+            if right_gaze[0] is not None:
+                x_coords.append(right_gaze[0])
+                y_coords.append(right_gaze[1])
+
+            if x_coords and y_coords:
+                avg_x = sum(x_coords) / len(x_coords)
+                avg_y = sum(y_coords) / len(y_coords)
+
+                store.append(
+                    GazePoint(
+                        fixation_x=avg_x,
+                        fixation_y=avg_y,
+                        timestamp=gaze_data["system_time_stamp"],
+                    )
+                )
+        except Exception:
+            pass
+
+    return callback
+
+
+def per_sample_ns(
+    callback: Callable[[Dict[str, Any]], None],
+    samples: List[Dict[str, Any]],
+    repeat: int,
+    reset: Callable[[], None],
+) -> float:
+    def run() -> None:
+        for sample in samples:
+            callback(sample)
+
+    best = math.inf
+    for _ in range(repeat):
+        reset()
+        best = min(best, timeit.timeit(run, number=1))
+    return best / len(samples) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = make_samples(args.samples)
+
+    legacy_store: List[GazePoint] = []
+    legacy = per_sample_ns(
+        make_legacy_callback(legacy_store), samples, args.repeat, legacy_store.clear
+    )
+
+    service = TobiiService()
+    current = per_sample_ns(
+        service._gaze_data_callback, samples, args.repeat, lambda: None
+    )
+
+    print(f"samples per run : {args.samples}")
+    print(f"legacy callback : {legacy:8.0f} ns/sample")
+    print(f"current callback: {current:8.0f} ns/sample")
+    print(f"speed-up        : {legacy / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
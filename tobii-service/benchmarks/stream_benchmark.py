@@ -0,0 +1,351 @@
+"""End-to-end throughput and latency benchmark for the gaze websocket.
+
+For every combination of sample rate and client count, the service is
+started in a child process from ``app.api.create_app`` with the synthetic
+tracker backend, and N websocket clients stream ``/tobii/gaze`` from it.
+
+Per run it records:
+
+- samples/sec received, in total and per client
+- latency from sample timestamp to client receipt (p50/p99/p99.9/max).
+  Both ends use the system-wide monotonic clock, so the two processes can
+  compare timestamps directly.
+- samples the service reported as dropped
+- service CPU (percent of one core) and peak RSS
+
+Results are written as JSON. Pass an earlier result file as ``--baseline``
+to print the change for every configuration the two files share.
+
+Clients run in this process on a single event loop. At high client counts
+they can become the bottleneck themselves, so compare runs made on the
+same machine with the same settings.
+
+Usage (from the tobii-service directory):
+
+    python benchmarks/stream_benchmark.py --rates 120,600,1200 --clients 1,4,16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import psutil
+import websockets
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+
+from app.config import settings  # noqa: E402
+from app.services.gaze_codec import (  # noqa: E402
+    BINARY_FORMAT,
+    BINARY_HEADER,
+    JSON_FORMAT,
+)
+
+HOST = "127.0.0.1"
+STARTUP_TIMEOUT = 30.0
+RSS_SAMPLE_INTERVAL = 0.25
+
+
+def serve(port: int) -> None:
+    """Run the service in this process (the child side of a benchmark run)."""
+    import uvicorn
+
+    from app.api import create_app
+
+    uvicorn.run(
+        create_app(),
+        host=HOST,
+        port=port,
+        log_level="warning",
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
+    )
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def start_service(port: int, rate_hz: float) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        TRACKER_BACKEND="synthetic",
+        SYNTHETIC_RATE_HZ=str(rate_hz),
+        SYNTHETIC_SEED="0",
+        # Blinks drop samples at random moments, which makes throughput
+        # vary with the measurement window; keep every run comparable.
+        SYNTHETIC_BLINK_RATE_HZ="0",
+    )
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", str(port)],
+        cwd=SERVICE_DIR,
+        env=env,
+    )
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Service exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://{HOST}:{port}/tobii/status", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.1)
+
+    process.kill()
+    raise RuntimeError("Service did not become ready in time")
+
+
+def stop_service(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def decode_timestamps(message: Any, wire_format: str) -> tuple:
+    """Return (timestamps, dropped) from one gaze stream message."""
+    if wire_format == BINARY_FORMAT:
+        _, _, _, _, count, dropped = BINARY_HEADER.unpack_from(message)
+        timestamps = np.frombuffer(
+            message, dtype="<i8", count=count, offset=BINARY_HEADER.size
+        )
+        return timestamps, dropped
+
+    payload = json.loads(message)
+    if isinstance(payload, dict):
+        return np.empty(0, dtype=np.int64), payload.get("count", 0)
+    return np.fromiter((p["timestamp"] for p in payload), dtype=np.int64), 0
+
+
+class ClientStats:
+    def __init__(self):
+        self.latencies: List[np.ndarray] = []
+        self.samples = 0
+        self.dropped = 0
+
+
+async def run_client(
+    url: str, wire_format: str, stats: ClientStats, measuring: asyncio.Event,
+    done: asyncio.Event,
+) -> None:
+    async with websockets.connect(url, max_size=None) as ws:
+        while not done.is_set():
+            try:
+                message = await asyncio.wait_for(ws.recv(), 0.5)
+            except asyncio.TimeoutError:
+                continue
+            received = time.monotonic_ns() // 1000
+            timestamps, dropped = decode_timestamps(message, wire_format)
+            if not measuring.is_set():
+                continue
+            stats.samples += len(timestamps)
+            stats.dropped += dropped
+            if len(timestamps):
+                stats.latencies.append(received - timestamps)
+
+
+async def sample_rss(process: psutil.Process, peak: List[int], done: asyncio.Event) -> None:
+    while not done.is_set():
+        peak[0] = max(peak[0], process.memory_info().rss)
+        await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+
+async def measure(
+    port: int, pid: int, clients: int, duration: float, warmup: float,
+    wire_format: str, query: str,
+) -> Dict[str, Any]:
+    url = f"ws://{HOST}:{port}/tobii/gaze?format={wire_format}"
+    if query:
+        url += "&" + query
+
+    measuring = asyncio.Event()
+    done = asyncio.Event()
+    stats = [ClientStats() for _ in range(clients)]
+    tasks = [
+        asyncio.create_task(run_client(url, wire_format, s, measuring, done))
+        for s in stats
+    ]
+
+    service = psutil.Process(pid)
+    peak_rss = [0]
+    rss_task = asyncio.create_task(sample_rss(service, peak_rss, done))
+
+    await asyncio.sleep(warmup)
+    cpu_start = service.cpu_times()
+    wall_start = time.monotonic()
+    measuring.set()
+    await asyncio.sleep(duration)
+    measuring.clear()
+    elapsed = time.monotonic() - wall_start
+    cpu_end = service.cpu_times()
+
+    done.set()
+    await asyncio.gather(*tasks, rss_task, return_exceptions=True)
+    for task in tasks:
+        if task.exception() is not None:
+            raise RuntimeError(f"Client failed: {task.exception()!r}")
+
+    cpu_seconds = (cpu_end.user + cpu_end.system) - (cpu_start.user + cpu_start.system)
+    latencies = (
+        np.concatenate([l for s in stats for l in s.latencies])
+        if any(s.latencies for s in stats)
+        else np.empty(0, dtype=np.int64)
+    )
+    total = sum(s.samples for s in stats)
+
+    result: Dict[str, Any] = {
+        "samples_per_sec": total / elapsed,
+        "samples_per_sec_per_client": [s.samples / elapsed for s in stats],
+        "dropped": sum(s.dropped for s in stats),
+        "cpu_percent": 100.0 * cpu_seconds / elapsed,
+        "rss_peak_mb": peak_rss[0] / 2**20,
+        "latency_us": None,
+    }
+    if len(latencies):
+        p50, p99, p999 = np.percentile(latencies, [50, 99, 99.9])
+        result["latency_us"] = {
+            "p50": float(p50),
+            "p99": float(p99),
+            "p999": float(p999),
+            "max": float(latencies.max()),
+        }
+    return result
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SERVICE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = {
+            (r["rate_hz"], r["clients"]): r for r in json.load(f)["results"]
+        }
+
+    print(f"\nChange vs {baseline_path}:")
+    for run in results:
+        old = baseline.get((run["rate_hz"], run["clients"]))
+        if old is None or not run["latency_us"] or not old["latency_us"]:
+            continue
+        print(
+            f"  {run['rate_hz']:>6g} Hz x {run['clients']:>3} clients: "
+            f"throughput {_change(old['samples_per_sec'], run['samples_per_sec'])}, "
+            f"p99 {_change(old['latency_us']['p99'], run['latency_us']['p99'])}, "
+            f"cpu {_change(old['cpu_percent'], run['cpu_percent'])}"
+        )
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the gaze websocket end to end."
+    )
+    parser.add_argument("--rates", default="120,600,1200",
+                        help="comma-separated synthetic sample rates (Hz)")
+    parser.add_argument("--clients", default="1,4,16",
+                        help="comma-separated websocket client counts")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=2.0,
+                        help="seconds streamed before measuring")
+    parser.add_argument("--format", choices=(JSON_FORMAT, BINARY_FORMAT),
+                        default=JSON_FORMAT, dest="wire_format")
+    parser.add_argument("--query", default="",
+                        help="extra query string for /tobii/gaze, e.g. max_batch=64")
+    parser.add_argument("--output", default="stream_benchmark.json")
+    parser.add_argument("--baseline", help="earlier result file to compare with")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    rates = [float(r) for r in args.rates.split(",")]
+    client_counts = [int(c) for c in args.clients.split(",")]
+
+    results = []
+    for rate in rates:
+        for clients in client_counts:
+            port = free_port()
+            process = start_service(port, rate)
+            try:
+                run = asyncio.run(
+                    measure(
+                        port, process.pid, clients, args.duration, args.warmup,
+                        args.wire_format, args.query,
+                    )
+                )
+            finally:
+                stop_service(process)
+
+            run = {"rate_hz": rate, "clients": clients, **run}
+            results.append(run)
+            latency = run["latency_us"] or {}
+            print(
+                f"{rate:>6g} Hz x {clients:>3} clients: "
+                f"{run['samples_per_sec']:>9.0f} samples/s  "
+                f"p50 {latency.get('p50', float('nan')):>7.0f} us  "
+                f"p99 {latency.get('p99', float('nan')):>7.0f} us  "
+                f"p99.9 {latency.get('p999', float('nan')):>7.0f} us  "
+                f"cpu {run['cpu_percent']:>5.1f}%  "
+                f"rss {run['rss_peak_mb']:>6.1f} MB  "
+                f"dropped {run['dropped']}"
+            )
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "version": settings.VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "format": args.wire_format,
+            "query": args.query,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "stream_mode": settings.GAZE_STREAM_MODE,
+            "per_message_deflate": settings.WS_PER_MESSAGE_DEFLATE,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 import multiprocessing
 import logging
-from typing import Optional, Tuple
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.error import URLError
+from urllib.request import urlopen
 import uvicorn
 import psutil
 import socket
@@ -9,6 +13,12 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# The port check and the dialog naming the port's owner follow each other
+# closely; one socket table scan serves both.
+PORT_OWNERS_CACHE_S = 2.0
+READY_POLL_INTERVAL_S = 0.1
+READY_REQUEST_TIMEOUT_S = 0.5
+
 
 class ServiceManager:
     """Manages the FastAPI server lifecycle on fixed port."""
@@ -16,6 +26,11 @@ class ServiceManager:
     def __init__(self):
         self.server_process: Optional[multiprocessing.Process] = None
         self.current_port: int = settings.PORT
+        self.is_ready: bool = False
+        self.startup_seconds: Optional[float] = None
+        self._started_at: Optional[float] = None
+        self._port_owners: Dict[int, int] = {}
+        self._port_owners_time = float("-inf")
 
     def _run_server(self):
         uvicorn.run(
@@ -24,8 +39,51 @@ class ServiceManager:
             port=settings.PORT,
             log_level="info",
             reload=False,
+            ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
         )
 
+    def _find_port_owners(self) -> Dict[int, int]:
+        """Map every local port in use to the PID of the process holding it.
+
+        Reads the system socket table once instead of asking every process
+        for its connections, and keeps the result for
+        ``PORT_OWNERS_CACHE_S`` seconds.
+        """
+        now = time.monotonic()
+        if now - self._port_owners_time < PORT_OWNERS_CACHE_S:
+            return self._port_owners
+
+        entries: List[Tuple[Any, str, Optional[int]]]
+        try:
+            entries = [
+                (conn.laddr, conn.status, conn.pid)
+                for conn in psutil.net_connections(kind="inet")
+            ]
+        except psutil.AccessDenied:
+            # macOS only lets root read the system-wide table; fall back to
+            # each process's own sockets, still in a single pass.
+            entries = []
+            for proc in psutil.process_iter():
+                try:
+                    entries.extend(
+                        (conn.laddr, conn.status, proc.pid)
+                        for conn in proc.connections(kind="inet")
+                    )
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+
+        owners: Dict[int, int] = {}
+        for laddr, status, pid in entries:
+            if not laddr or pid is None:
+                continue
+            # The listening socket names the owner over client connections.
+            if laddr.port not in owners or status == psutil.CONN_LISTEN:
+                owners[laddr.port] = pid
+
+        self._port_owners = owners
+        self._port_owners_time = now
+        return owners
+
     def check_port_available(self) -> Tuple[bool, Optional[int]]:
         """Check if the port is available.
 
@@ -39,15 +97,7 @@ class ServiceManager:
             sock.close()
 
             if result == 0:
-                # Port is in use, find the process
-                for proc in psutil.process_iter(["pid", "name"]):
-                    try:
-                        for conn in proc.connections():
-                            if conn.laddr.port == settings.PORT:
-                                return False, proc.pid
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        continue
-                return False, None
+                return False, self._find_port_owners().get(settings.PORT)
             return True, None
         except Exception as e:
             logger.error(f"Error checking port: {e}")
@@ -60,17 +110,17 @@ class ServiceManager:
             Dictionary with process info or None if no process found.
         """
         try:
-            for proc in psutil.process_iter(["pid", "name", "exe"]):
-                try:
-                    for conn in proc.connections():
-                        if conn.laddr.port == settings.PORT:
-                            return {
-                                "pid": proc.pid,
-                                "name": proc.name(),
-                                "exe": proc.exe() if proc.exe() else "Unknown",
-                            }
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+            pid = self._find_port_owners().get(settings.PORT)
+            if pid is None:
+                return None
+
+            proc = psutil.Process(pid)
+            try:
+                exe = proc.exe()
+            except psutil.AccessDenied:
+                exe = ""
+            return {"pid": pid, "name": proc.name(), "exe": exe or "Unknown"}
+        except psutil.NoSuchProcess:
             return None
         except Exception as e:
             logger.error(f"Error getting process info: {e}")
@@ -86,6 +136,7 @@ class ServiceManager:
             True if process was killed successfully, False otherwise.
         """
         try:
+            self._port_owners_time = float("-inf")
             proc = psutil.Process(pid)
             proc.terminate()
             proc.wait(timeout=5)
@@ -106,6 +157,9 @@ class ServiceManager:
     def start(self) -> bool:
         """Start the FastAPI server in a separate process.
 
+        Returns as soon as the process is spawned; ``wait_until_ready``
+        tells when the server answers requests.
+
         Returns:
             True if server started successfully, False otherwise.
         """
@@ -114,11 +168,14 @@ class ServiceManager:
             return False
 
         try:
+            self.is_ready = False
+            self.startup_seconds = None
+            self._started_at = time.perf_counter()
             self.server_process = multiprocessing.Process(
                 target=self._run_server, daemon=True
             )
             self.server_process.start()
-            logger.info(f"Service started on port {settings.PORT}")
+            logger.info(f"Service process started for port {settings.PORT}")
             return True
         except Exception as e:
             logger.error(f"Failed to start service: {e}")
@@ -143,6 +200,8 @@ class ServiceManager:
                 self.server_process.join()
 
             self.server_process = None
+            self.is_ready = False
+            self.startup_seconds = None
             logger.info("Service stopped")
             return True
         except Exception as e:
@@ -159,6 +218,34 @@ class ServiceManager:
             return self.start()
         return False
 
+    def wait_until_ready(
+        self, timeout: float = settings.SERVICE_STARTUP_TIMEOUT_S
+    ) -> bool:
+        """Wait until the started server answers ``/tobii/status``.
+
+        Blocks for up to ``timeout`` seconds; call it off the Tk main
+        thread. On success ``startup_seconds`` holds the time from
+        ``start`` until the first answer.
+
+        Returns:
+            True once the server answers, False if it exited or did not
+            answer in time.
+        """
+        deadline = time.perf_counter() + timeout
+        while self.is_running():
+            if self.get_tracker_status(timeout=READY_REQUEST_TIMEOUT_S):
+                self.is_ready = True
+                self.startup_seconds = time.perf_counter() - self._started_at
+                logger.info(f"Service ready in {self.startup_seconds:.2f} s")
+                return True
+            if time.perf_counter() >= deadline:
+                logger.error(f"Service did not answer within {timeout:.0f} s")
+                return False
+            time.sleep(READY_POLL_INTERVAL_S)
+
+        logger.error("Service exited during startup")
+        return False
+
     def is_running(self) -> bool:
         """Check if the server process is currently running."""
         return self.server_process is not None and self.server_process.is_alive()
@@ -170,3 +257,31 @@ class ServiceManager:
             Port number if server is running, None otherwise.
         """
         return self.current_port if self.is_running() else None
+
+    @property
+    def status_stream_url(self) -> str:
+        """WebSocket on which the service pushes status changes."""
+        return f"ws://{settings.HOST}:{self.current_port}/tobii/status/live"
+
+    def get_tracker_status(self, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+        """Ask the running service for its status.
+
+        The service process owns the SDK connection, so the GUI learns
+        about the tracker from the service only: from this request, which
+        doubles as the readiness probe, and then from the pushed updates on
+        ``status_stream_url``. Blocks for up to ``timeout`` seconds; call it
+        off the Tk main thread.
+
+        Returns:
+            The ``/tobii/status`` response, or None if the service does not
+            answer.
+        """
+        if not self.is_running():
+            return None
+
+        url = f"http://{settings.HOST}:{self.current_port}/tobii/status"
+        try:
+            with urlopen(url, timeout=timeout) as response:
+                return json.load(response)
+        except (URLError, OSError, ValueError):
+            return None
@@ -0,0 +1,58 @@
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from websockets.exceptions import WebSocketException
+from websockets.sync.client import connect
+
+logger = logging.getLogger(__name__)
+
+
+class StatusListener:
+    """Receives the status the service pushes over ``/tobii/status/live``.
+
+    A daemon thread stays connected while the listener is enabled and
+    passes every status message to ``on_status``, on that thread. When the
+    connection drops it calls ``on_status(None)`` and, if still enabled,
+    reconnects after ``retry_s`` seconds. Nothing runs between messages, so
+    an idle tray app does not wake up.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        on_status: Callable[[Optional[Dict[str, Any]]], None],
+        retry_s: float = 1.0,
+    ):
+        self.url = url
+        self.on_status = on_status
+        self.retry_s = retry_s
+        self._enabled = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="status-listener", daemon=True
+        )
+        self._thread.start()
+
+    def enable(self) -> None:
+        """Connect, and keep reconnecting, until ``disable`` is called."""
+        self._enabled.set()
+
+    def disable(self) -> None:
+        """Stop reconnecting once the current connection closes."""
+        self._enabled.clear()
+
+    def _run(self) -> None:
+        while True:
+            self._enabled.wait()
+            try:
+                with connect(self.url, open_timeout=2) as websocket:
+                    logger.info(f"Listening for status on {self.url}")
+                    for message in websocket:
+                        self.on_status(json.loads(message))
+            except (OSError, WebSocketException, ValueError) as e:
+                logger.debug(f"Status connection closed: {e}")
+
+            self.on_status(None)
+            time.sleep(self.retry_s)
@@ -25,7 +25,10 @@ class HeaderWidget:
 
 
 class StatusCard:
+    """Service, port and tracker status; each row is redrawn only on change."""
+
     def __init__(self, parent):
+        self._shown = {}
         self.frame = ctk.CTkFrame(
             parent, fg_color=Styles.CARD_BG_LIGHT, corner_radius=10
         )
@@ -94,11 +97,34 @@ class StatusCard:
 
         return value_label
 
-    def update_service_status(self, is_running):
-        if is_running:
+    def _changed(self, row, state):
+        if self._shown.get(row) == state:
+            return False
+        self._shown[row] = state
+        return True
+
+    def update_service_status(
+        self, is_running, is_ready=True, startup_seconds=None, busy_text=None
+    ):
+        state = (is_running, is_ready, startup_seconds, busy_text)
+        if not self._changed("service", state):
+            return
+
+        if busy_text:
             self.service_label.configure(
-                text="● Running", text_color=Styles.SUCCESS_DARK
+                text=f"● {busy_text}", text_color=Styles.INFO_DARK
             )
+            self.service_card.configure(fg_color=Styles.INFO_LIGHT)
+        elif is_running and not is_ready:
+            self.service_label.configure(
+                text="● Not Responding", text_color=Styles.WARNING_COLOR
+            )
+            self.service_card.configure(fg_color=Styles.CARD_BG)
+        elif is_running:
+            text = "● Running"
+            if startup_seconds is not None:
+                text += f" (started in {startup_seconds:.1f} s)"
+            self.service_label.configure(text=text, text_color=Styles.SUCCESS_DARK)
             self.service_card.configure(fg_color=Styles.SUCCESS_LIGHT)
         else:
             self.service_label.configure(
@@ -106,20 +132,38 @@ class StatusCard:
             )
             self.service_card.configure(fg_color=Styles.CARD_BG)
 
-    def update_port(self, port):
+    def update_port(self, port, clients=0):
+        if not self._changed("port", (port, clients)):
+            return
+
         if port:
-            self.port_label.configure(text=f"{port}", text_color=Styles.INFO_DARK)
+            text = f"{port}"
+            if clients:
+                text += f" ({clients} client{'s' if clients > 1 else ''})"
+            self.port_label.configure(text=text, text_color=Styles.INFO_DARK)
             self.port_card.configure(fg_color=Styles.INFO_LIGHT)
         else:
             self.port_label.configure(text="N/A", text_color=Styles.TEXT_MUTED)
             self.port_card.configure(fg_color=Styles.CARD_BG)
 
-    def update_tracker_status(self, is_connected):
+    def update_tracker_status(
+        self, is_connected, is_discovering=False, sample_rate_hz=0.0
+    ):
+        state = (is_connected, is_discovering, sample_rate_hz)
+        if not self._changed("tracker", state):
+            return
+
         if is_connected:
+            text = "✓ Connected"
+            if sample_rate_hz:
+                text += f" ({sample_rate_hz:.0f} Hz)"
+            self.tracker_label.configure(text=text, text_color=Styles.SUCCESS_DARK)
+            self.tracker_card.configure(fg_color=Styles.SUCCESS_LIGHT)
+        elif is_discovering:
             self.tracker_label.configure(
-                text="✓ Connected", text_color=Styles.SUCCESS_DARK
+                text="… Searching", text_color=Styles.INFO_DARK
             )
-            self.tracker_card.configure(fg_color=Styles.SUCCESS_LIGHT)
+            self.tracker_card.configure(fg_color=Styles.INFO_LIGHT)
         else:
             self.tracker_label.configure(
                 text="✗ Not Connected", text_color=Styles.TEXT_MUTED
@@ -129,6 +173,7 @@ class StatusCard:
 
 class ControlButtons:
     def __init__(self, parent, on_start, on_stop, on_restart):
+        self._state = (False, False)
         self.frame = ctk.CTkFrame(parent, fg_color="transparent")
         self.frame.pack(fill="x", pady=(0, 15))
 
@@ -176,8 +221,16 @@ class ControlButtons:
         )
         self.restart_btn.pack(side="left", expand=True, fill="both")
 
-    def update_button_states(self, is_running):
-        if is_running:
+    def update_button_states(self, is_running, is_busy=False):
+        if self._state == (is_running, is_busy):
+            return
+        self._state = (is_running, is_busy)
+
+        if is_busy:
+            self.start_btn.configure(state="disabled")
+            self.stop_btn.configure(state="disabled")
+            self.restart_btn.configure(state="disabled")
+        elif is_running:
             self.start_btn.configure(state="disabled")
             self.stop_btn.configure(state="normal")
             self.restart_btn.configure(state="normal")
@@ -7,7 +7,7 @@ from PIL import Image
 from pathlib import Path
 
 from gui.service_manager import ServiceManager
-from app.services.tobii_service import TobiiService
+from gui.status_listener import StatusListener
 from app.config import settings
 from gui.widgets import (
     HeaderWidget,
@@ -26,7 +26,10 @@ class TobiiServiceGUI:
 
     def __init__(self):
         self.service_manager = ServiceManager()
-        self.tobii_service = TobiiService()
+        self.service_status = None
+        self.status_listener = StatusListener(
+            self.service_manager.status_stream_url, self.on_service_status
+        )
 
         self.root = ctk.CTk()
         self.root.title(settings.APP_NAME)
@@ -38,12 +41,13 @@ class TobiiServiceGUI:
 
         self.tray_icon = None
         self.is_minimized_to_tray = False
+        self.busy_text = None
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close_window)
         self.root.bind("<Unmap>", self.on_minimize_event)
 
         self.create_widgets()
-        self.update_status()
+        self.refresh_status()
         self.setup_tray()
 
     def create_widgets(self):
@@ -61,67 +65,133 @@ class TobiiServiceGUI:
         )
         ExitButton.create(content_frame, on_exit=self.on_exit)
 
-    def update_status(self):
+    def on_service_status(self, status):
+        """Status pushed by the service, or None when the connection drops.
+
+        Called on the listener thread; the widgets are updated on Tk's.
+        """
+        self.root.after(0, self.apply_service_status, status)
+
+    def apply_service_status(self, status):
+        self.service_status = status
+        self.refresh_status()
+
+    def refresh_status(self):
+        """Show the current state; widgets only redraw what changed."""
         is_running = self.service_manager.is_running()
         port = self.service_manager.get_port()
-        tracker_connected = self.tobii_service.is_connected()
+        status = (self.service_status if is_running else None) or {}
+        if not is_running and self.busy_text is None:
+            # The service is gone; do not keep trying to reconnect.
+            self.status_listener.disable()
+
+        self.status_card.update_service_status(
+            is_running,
+            is_ready=self.service_manager.is_ready,
+            startup_seconds=self.service_manager.startup_seconds,
+            busy_text=self.busy_text,
+        )
+        self.status_card.update_port(port, status.get("clients", 0))
+        self.status_card.update_tracker_status(
+            status.get("connected", False),
+            status.get("discovering", False),
+            status.get("sample_rate_hz", 0.0),
+        )
+        self.control_buttons.update_button_states(
+            is_running, is_busy=self.busy_text is not None
+        )
+
+    def run_in_background(self, busy_text, action):
+        """Run a slow service action on a worker thread, then refresh.
+
+        The buttons stay disabled and the service status shows
+        ``busy_text`` until it is done.
+        """
+        self.busy_text = busy_text
+        self.refresh_status()
+
+        def run():
+            try:
+                action()
+            finally:
+                self.root.after(0, self.finish_background_action)
 
-        self.status_card.update_service_status(is_running)
-        self.status_card.update_port(port)
-        self.status_card.update_tracker_status(tracker_connected)
-        self.control_buttons.update_button_states(is_running)
+        threading.Thread(target=run, daemon=True).start()
 
-        self.root.after(2000, self.update_status)
+    def finish_background_action(self):
+        self.busy_text = None
+        self.refresh_status()
+
+    def start_and_wait(self):
+        """Start the service and wait until it answers (worker thread)."""
+        if self.service_manager.start() and self.service_manager.wait_until_ready():
+            self.status_listener.enable()
+
+    def stop_service_process(self):
+        """Stop the service, if running, and stop listening to it."""
+        self.status_listener.disable()
+        if self.service_manager.is_running():
+            return self.service_manager.stop()
+        return False
 
     def start_service(self):
-        is_available, pid = self.service_manager.check_port_available()
+        self.run_in_background("Checking port...", self.check_port_and_start)
 
+    def check_port_and_start(self):
+        """Find who holds the port before starting (worker thread)."""
+        is_available, _ = self.service_manager.check_port_available()
+        proc_info = None
         if not is_available:
             proc_info = self.service_manager.get_process_using_port()
-            if proc_info:
-                process_name = proc_info["name"]
-                process_exe = proc_info["exe"]
-
-                dialog = ConfirmDialog(
-                    self.root,
-                    "Port Already in Use",
-                    f"Port {self.service_manager.current_port} is already being used by:\n\n"
-                    f"Process: {process_name}\n"
-                    f"PID: {proc_info['pid']}\n"
-                    f"Path: {process_exe}\n\n"
-                    f"Do you want to kill this process and start the service?",
-                    "warning",
-                )
-
-                result = dialog.get_result()
-
-                if result:
-                    if self.service_manager.kill_process_on_port(proc_info["pid"]):
-                        if self.service_manager.start():
-                            self.update_status()
-                return
-
-        if self.service_manager.start():
-            self.update_status()
+
+        if proc_info:
+            self.root.after(0, self.confirm_kill_and_start, proc_info)
+        else:
+            self.root.after(0, self.set_busy_text, "Starting...")
+            self.start_and_wait()
+
+    def set_busy_text(self, busy_text):
+        self.busy_text = busy_text
+        self.refresh_status()
+
+    def confirm_kill_and_start(self, proc_info):
+        dialog = ConfirmDialog(
+            self.root,
+            "Port Already in Use",
+            f"Port {self.service_manager.current_port} is already being used by:\n\n"
+            f"Process: {proc_info['name']}\n"
+            f"PID: {proc_info['pid']}\n"
+            f"Path: {proc_info['exe']}\n\n"
+            f"Do you want to kill this process and start the service?",
+            "warning",
+        )
+
+        if dialog.get_result():
+
+            def kill_and_start():
+                if self.service_manager.kill_process_on_port(proc_info["pid"]):
+                    self.start_and_wait()
+
+            self.run_in_background("Starting...", kill_and_start)
 
     def stop_service(self):
-        if self.service_manager.stop():
-            self.update_status()
+        self.run_in_background("Stopping...", self.stop_service_process)
 
     def restart_service(self):
-        if self.service_manager.restart():
-            self.update_status()
+        def restart():
+            if self.stop_service_process():
+                self.start_and_wait()
+
+        self.run_in_background("Restarting...", restart)
 
     def on_exit(self):
         """Exit button: Stop service and minimize to tray (tray stays running)."""
-        if self.service_manager.is_running():
-            self.service_manager.stop()
+        self.stop_service_process()
         self.minimize_to_tray()
 
     def on_close_window(self):
         """Window X button: Stop service and minimize to tray."""
-        if self.service_manager.is_running():
-            self.service_manager.stop()
+        self.stop_service_process()
         self.minimize_to_tray()
 
     def show_window(self):
@@ -144,8 +214,7 @@ class TobiiServiceGUI:
 
     def on_tray_exit(self, icon, item):
         """Exit from tray menu: Stop service and quit application completely."""
-        if self.service_manager.is_running():
-            self.service_manager.stop()
+        self.stop_service_process()
         icon.stop()
         self.root.after(0, self.root.quit)
 
@@ -5,7 +5,11 @@ a = Analysis(
     ['gui_window.py'],
     pathex=[],
     binaries=[],
-    datas=[('assets/eye.ico', 'assets')],
+    datas=[
+        ('assets/eye.ico', 'assets'),
+        ('models/dyslexia-uda-classifier', 'models/dyslexia-uda-classifier'),
+        ('models/target-domain-scaler.pkl', 'models'),
+    ],
     hiddenimports=[
         'tobii_research',
         'pystray._xorg',  # Linux-specific
@@ -22,17 +26,33 @@ a = Analysis(
         'uvicorn.protocols.websockets.auto',
         'uvicorn.lifespan',
         'uvicorn.lifespan.on',
+        'onnxruntime',
         'app',
         'app.api',
         'app.config',
         'app.models',
         'app.models.gaze',
+        'app.models.recording',
+        'app.models.inference',
+        'app.models.status',
         'app.routers',
         'app.routers.tobii',
         'app.services',
         'app.services.tobii_service',
+        'app.services.gaze_buffer',
+        'app.services.gaze_stream',
+        'app.services.gaze_decimator',
+        'app.services.gaze_codec',
+        'app.services.gaze_queue',
+        'app.services.trackers',
+        'app.services.recorder',
+        'app.services.fixations',
+        'app.services.inference',
+        'app.services.status',
+        'app.services.supervisor',
         'gui',
         'gui.service_manager',
+        'gui.status_listener',
         'gui.styles',
         'gui.widgets',
         'psutil',
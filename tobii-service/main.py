@@ -11,6 +11,7 @@ def main():
         port=settings.PORT,
         reload=settings.DEBUG,
         log_level="info",
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
     )
 
 
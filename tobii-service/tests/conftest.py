@@ -0,0 +1,21 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The service on the synthetic tracker, started once for the session."""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "TRACKER_BACKEND", "synthetic")
+        patch.setattr(settings, "SYNTHETIC_RATE_HZ", 600.0)
+        patch.setattr(settings, "SYNTHETIC_SEED", 0)
+        patch.setattr(settings, "INFERENCE_PRELOAD", False)
+
+        from app.api import create_app
+        from app.routers import tobii
+
+        with TestClient(create_app()) as test_client:
+            assert tobii.tobii_service.wait_for_discovery(10)
+            yield test_client
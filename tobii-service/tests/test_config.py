@@ -0,0 +1,28 @@
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+
+
+def test_gaze_stream_mode_accepts_poll_and_push(monkeypatch):
+    for mode in ("poll", "push"):
+        monkeypatch.setenv("GAZE_STREAM_MODE", mode)
+        assert Settings().GAZE_STREAM_MODE == mode
+
+
+def test_gaze_stream_mode_rejects_unknown_values(monkeypatch):
+    monkeypatch.setenv("GAZE_STREAM_MODE", "pol")
+    with pytest.raises(ValidationError):
+        Settings()
+
+
+def test_tracker_backend_accepts_known_backends(monkeypatch):
+    for backend in ("tobii", "synthetic", "replay"):
+        monkeypatch.setenv("TRACKER_BACKEND", backend)
+        assert Settings().TRACKER_BACKEND == backend
+
+
+def test_tracker_backend_rejects_unknown_values(monkeypatch):
+    monkeypatch.setenv("TRACKER_BACKEND", "synthetc")
+    with pytest.raises(ValidationError):
+        Settings()
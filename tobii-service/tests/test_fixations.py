@@ -0,0 +1,188 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.routers.tobii import _send_fixations
+from app.services.fixations import FixationDetector
+from app.services.gaze_buffer import GAZE_DTYPE
+
+ML_WORK = os.path.join(os.path.dirname(__file__), "..", "..", "ml-work")
+
+
+def reading_trace(rate_hz: float, n_fixations: int = 12, seed: int = 0) -> np.ndarray:
+    """Noisy fixations of 60-400 ms joined by 30 ms saccades.
+
+    Timestamps are whole milliseconds, in microseconds, so the offline
+    detector sees exactly the same times.
+    """
+    rng = np.random.default_rng(seed)
+    period_ms = 1000 / rate_hz
+    points = []
+    x, y = 0.5, 0.5
+    for _ in range(n_fixations):
+        for _ in range(int(rng.integers(60, 400) / period_ms)):
+            points.append((x + rng.normal(0, 0.001), y + rng.normal(0, 0.001)))
+        to_x, to_y = rng.uniform(0.1, 0.9, 2)
+        steps = max(2, int(30 / period_ms))
+        for p in np.linspace(0, 1, steps, endpoint=False)[1:]:
+            points.append((x + (to_x - x) * p, y + (to_y - y) * p))
+        x, y = to_x, to_y
+
+    samples = np.zeros(len(points), dtype=GAZE_DTYPE)
+    samples["x"], samples["y"] = np.array(points).T
+    samples["timestamp"] = np.round(np.arange(len(points)) * period_ms) * 1000
+    return samples
+
+
+def detect(detector: FixationDetector, samples: np.ndarray, sizes=()) -> list:
+    fixations = []
+    start = 0
+    for size in sizes:
+        fixations += detector.process(samples[start : start + size])
+        start += size
+    fixations += detector.process(samples[start:])
+    return fixations + detector.flush()
+
+
+@pytest.fixture(scope="module")
+def offline():
+    pytest.importorskip("scipy")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.syspath_prepend(ML_WORK)
+        from lexora_ml import fixations
+
+        yield fixations
+
+
+def test_matches_the_offline_detector(offline):
+    samples = reading_trace(30)
+    detector = FixationDetector(
+        velocity_threshold=1.0,
+        min_duration_ms=100,
+        max_duration_ms=1000,
+        smoothing_alpha=0.5,
+        velocity_window_ms=0,
+        max_gap_ms=1000,
+    )
+    got = detect(detector, samples)
+
+    expected = offline.detect_fixations(
+        samples["x"],
+        samples["y"],
+        samples["timestamp"] / 1000,
+        velocity_threshold=1.0,
+        min_duration=100,
+        max_duration=1000,
+        alpha=0.5,
+    )
+    features = offline.fixation_features(expected, np.array([0, len(expected)]))
+    assert len(got) == len(expected) > 5
+    np.testing.assert_array_equal(
+        [f["start_timestamp"] for f in got], expected["start"] * 1000
+    )
+    np.testing.assert_array_equal(
+        [f["end_timestamp"] for f in got], expected["end"] * 1000
+    )
+    columns = ("duration_ms", "x", "y", "previous_saccade_amplitude", "is_regression")
+    np.testing.assert_allclose(
+        [[f[column] for column in columns] for f in got], features, rtol=1e-12
+    )
+
+
+def test_batch_boundaries_do_not_change_the_fixations():
+    samples = reading_trace(600)
+    whole = detect(FixationDetector(), samples)
+    assert len(whole) > 5
+
+    rng = np.random.default_rng(1)
+    for sizes in ([1] * 50, rng.integers(1, 40, 200), rng.integers(50, 500, 10)):
+        assert detect(FixationDetector(), samples, sizes) == whole
+
+
+def still(x: float, start: int, duration_ms: int, rate_hz: float = 500) -> np.ndarray:
+    """Gaze resting on ``(x, 0.5)`` for ``duration_ms`` from ``start`` (us)."""
+    period = 1_000_000 / rate_hz
+    samples = np.zeros(int(duration_ms * 1000 / period) + 1, dtype=GAZE_DTYPE)
+    samples["x"], samples["y"] = x, 0.5
+    samples["timestamp"] = start + np.arange(len(samples)) * period
+    return samples
+
+
+def test_gap_ends_the_fixation_in_progress():
+    before, after = still(0.5, 0, 200), still(0.5, 300_000, 200)
+
+    detector = FixationDetector(max_gap_ms=75)
+    assert detector.process(before) == []
+    [fixation] = detector.process(after[:1])
+    assert fixation["end_timestamp"] == before["timestamp"][-1]
+
+    # Without the gap limit the two halves are one fixation.
+    both = np.concatenate((before, after))
+    assert len(detect(FixationDetector(max_gap_ms=1000), both)) == 1
+
+
+def test_flush_closes_the_fixation_in_progress():
+    samples = still(0.5, 0, 200)
+    detector = FixationDetector()
+    assert detector.process(samples) == []
+    [fixation] = detector.flush()
+    assert fixation["start_timestamp"] == samples["timestamp"][0]
+    assert fixation["duration_ms"] == 200
+    assert detector.flush() == []
+
+
+@pytest.mark.parametrize("drop_ms", [60, 400])
+def test_fixations_outside_the_duration_limits_are_dropped(drop_ms):
+    detector = FixationDetector(min_duration_ms=100, max_duration_ms=300)
+    # Gaps between the fixations end each one.
+    samples = np.concatenate(
+        (still(0.2, 0, 150), still(0.5, 300_000, drop_ms), still(0.8, 900_000, 150))
+    )
+    fixations = detect(detector, samples)
+
+    assert [f["x"] for f in fixations] == pytest.approx([0.2, 0.8])
+    # The first saccade starts at the origin, the next at the last fixation
+    # kept.
+    amplitudes = [f["previous_saccade_amplitude"] for f in fixations]
+    assert amplitudes == pytest.approx([np.hypot(0.2, 0.5), 0.6])
+
+
+class StalledSubscription:
+    """Delivers one batch of samples, then nothing until ``wait`` times out."""
+
+    def __init__(self, samples: np.ndarray):
+        self.batches = [samples]
+        self.timeouts = []
+
+    async def wait(self, timeout=None) -> bool:
+        self.timeouts.append(timeout)
+        return bool(self.batches)
+
+    def read(self):
+        return self.batches.pop(), 0
+
+
+class Sent(Exception):
+    pass
+
+
+class FirstMessageSocket:
+    async def send_text(self, data: str) -> None:
+        raise Sent(data)
+
+
+def test_stalled_stream_sends_the_fixation_in_progress():
+    samples = still(0.5, 0, 200)
+    subscription = StalledSubscription(samples)
+    sender = _send_fixations(
+        FirstMessageSocket(), subscription, FixationDetector(), 0.075
+    )
+    with pytest.raises(Sent) as sent:
+        asyncio.run(sender)
+
+    [fixation] = json.loads(str(sent.value))
+    assert fixation["end_timestamp"] == samples["timestamp"][-1]
+    assert subscription.timeouts == [0.075, 0.075]
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from app.services.gaze_buffer import GazeRingBuffer
+
+
+def fill(buffer: GazeRingBuffer, start: int, stop: int) -> None:
+    for i in range(start, stop):
+        buffer.append(float(i), float(-i), i)
+
+
+def assert_consistent(samples: np.ndarray, first: int, last: int) -> None:
+    expected = np.arange(first, last)
+    np.testing.assert_array_equal(samples["timestamp"], expected)
+    np.testing.assert_array_equal(samples["x"], expected)
+    np.testing.assert_array_equal(samples["y"], -expected)
+
+
+def test_drain_returns_samples_since_cursor():
+    buffer = GazeRingBuffer(8)
+    fill(buffer, 0, 5)
+    samples, cursor, dropped = buffer.drain(0)
+    assert_consistent(samples, 0, 5)
+    assert (cursor, dropped) == (5, 0)
+
+    fill(buffer, 5, 12)
+    samples, cursor, dropped = buffer.drain(cursor)
+    assert_consistent(samples, 5, 12)
+    assert (cursor, dropped) == (12, 0)
+
+
+def test_reader_lagging_by_exactly_capacity_skips_the_slot_being_written():
+    buffer = GazeRingBuffer(8)
+    fill(buffer, 0, 8)
+    # Head is 8, so slot 0 (cursor 0) is the producer's next write.
+    samples, cursor, dropped = buffer.drain(0)
+    assert_consistent(samples, 1, 8)
+    assert (cursor, dropped) == (8, 1)
+
+
+def test_reader_lagging_by_capacity_minus_one_loses_nothing():
+    buffer = GazeRingBuffer(8)
+    fill(buffer, 0, 7)
+    samples, cursor, dropped = buffer.drain(0)
+    assert_consistent(samples, 0, 7)
+    assert (cursor, dropped) == (7, 0)
+
+
+def test_reader_lagging_by_more_than_capacity_counts_every_lost_sample():
+    buffer = GazeRingBuffer(8)
+    fill(buffer, 0, 30)
+    samples, cursor, dropped = buffer.drain(3)
+    assert_consistent(samples, 23, 30)
+    assert (cursor, dropped) == (30, 20)
+
+
+def test_capacity_must_leave_room_for_the_producer():
+    with pytest.raises(ValueError):
+        GazeRingBuffer(1)
+
+
+def test_lap_during_copy_counts_each_lost_sample_once(monkeypatch):
+    buffer = GazeRingBuffer(8)
+    fill(buffer, 0, 5)
+    copy_range = GazeRingBuffer._copy_range
+
+    def copy_while_producer_laps(self, start, stop):
+        samples = copy_range(self, start, stop)
+        # The producer laps the reader by far more than the copied range.
+        fill(buffer, 5, 40)
+        return samples
+
+    monkeypatch.setattr(GazeRingBuffer, "_copy_range", copy_while_producer_laps)
+    samples, cursor, dropped = buffer.drain(0)
+    assert len(samples) == 0
+    assert (cursor, dropped) == (5, 5)
+
+    monkeypatch.undo()
+    samples, cursor, next_dropped = buffer.drain(cursor)
+    assert_consistent(samples, 33, 40)
+    assert (cursor, next_dropped) == (40, 28)
+    # Every sample from 0 to 32 is reported lost exactly once.
+    assert dropped + next_dropped == 33
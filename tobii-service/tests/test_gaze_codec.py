@@ -0,0 +1,135 @@
+import asyncio
+import json
+import struct
+
+import numpy as np
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.models.gaze import OverflowPolicy
+from app.routers.tobii import _make_sender
+from app.services.gaze_buffer import GAZE_DTYPE
+from app.services.gaze_codec import (
+    BINARY_FLAG_DROPPED,
+    BINARY_FLAG_GAP,
+    BINARY_FORMAT,
+    BINARY_SUBPROTOCOL,
+    encode_binary,
+    encode_dropped,
+    encode_gap,
+    encode_json,
+)
+from app.services.gaze_queue import GazeSendQueue
+
+
+def make_samples(count: int, start: int = 1_000_000) -> np.ndarray:
+    samples = np.zeros(count, dtype=GAZE_DTYPE)
+    samples["x"] = np.linspace(0.0, 1.0, count)
+    samples["y"] = np.linspace(1.0, 0.0, count)
+    samples["timestamp"] = start + np.arange(count) * 1667
+    return samples
+
+
+def decode_binary(frame: bytes):
+    magic, version, flags, reserved, count, dropped = struct.unpack_from(
+        "<4sBBHII", frame
+    )
+    assert (magic, version, reserved) == (b"LXGZ", 1, 0)
+    assert len(frame) == 16 + 16 * count
+    timestamp = np.frombuffer(frame, "<i8", count, 16)
+    x = np.frombuffer(frame, "<f4", count, 16 + 8 * count)
+    y = np.frombuffer(frame, "<f4", count, 16 + 12 * count)
+    return flags, dropped, timestamp, x, y
+
+
+def test_binary_frame_round_trip():
+    samples = make_samples(7)
+    flags, dropped, timestamp, x, y = decode_binary(encode_binary(samples))
+    assert (flags, dropped) == (0, 0)
+    np.testing.assert_array_equal(timestamp, samples["timestamp"])
+    np.testing.assert_array_equal(x, samples["x"].astype(np.float32))
+    np.testing.assert_array_equal(y, samples["y"].astype(np.float32))
+
+
+def test_binary_frame_flags_and_dropped_count():
+    samples = make_samples(3)
+    flags, dropped, _, _, _ = decode_binary(encode_binary(samples, 42))
+    assert (flags, dropped) == (BINARY_FLAG_DROPPED, 42)
+
+    flags, dropped, _, _, _ = decode_binary(encode_binary(samples, 0, gap=True))
+    assert (flags, dropped) == (BINARY_FLAG_GAP, 0)
+
+    flags, _, timestamp, _, _ = decode_binary(encode_binary(samples[:0], 5, True))
+    assert flags == BINARY_FLAG_DROPPED | BINARY_FLAG_GAP
+    assert len(timestamp) == 0
+
+
+def test_json_messages():
+    samples = make_samples(2)
+    assert json.loads(encode_json(samples)) == [
+        {"fixation_x": 0.0, "fixation_y": 1.0, "timestamp": 1_000_000},
+        {"fixation_x": 1.0, "fixation_y": 0.0, "timestamp": 1_001_667},
+    ]
+    assert json.loads(encode_dropped(3, 10)) == {
+        "type": "dropped", "count": 3, "total": 10
+    }
+    assert json.loads(encode_gap(1_000_000, 1_500_000))["duration_ms"] == 500.0
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_bytes(self, data: bytes) -> None:
+        self.frames.append(data)
+
+
+class GapSubscription:
+    def __init__(self, gap_start):
+        self.gap_start = gap_start
+
+
+def test_binary_frames_break_at_a_gap():
+    samples = make_samples(10)
+    gap_start = int(samples["timestamp"][3])
+    socket = RecordingSocket()
+    subscription = GapSubscription(gap_start)
+    send = _make_sender(socket, BINARY_FORMAT, GazeSendQueue(4, 64, OverflowPolicy.DROP_OLDEST), subscription)
+
+    asyncio.run(send(samples, 2))
+    before, after = (decode_binary(frame) for frame in socket.frames)
+    assert before[:2] == (BINARY_FLAG_DROPPED, 2)
+    assert before[2][-1] == gap_start
+    assert after[:2] == (BINARY_FLAG_GAP, 0)
+    assert after[2][0] == samples["timestamp"][4]
+    assert subscription.gap_start is None
+
+
+def test_negotiates_binary_by_query_parameter(client):
+    with client.websocket_connect("/tobii/gaze?format=binary") as websocket:
+        frame = websocket.receive_bytes()
+    _, _, timestamp, _, _ = decode_binary(frame)
+    assert len(timestamp) > 0
+    assert np.all(np.diff(timestamp) > 0)
+
+
+def test_negotiates_binary_by_subprotocol(client):
+    with client.websocket_connect(
+        "/tobii/gaze", subprotocols=[BINARY_SUBPROTOCOL]
+    ) as websocket:
+        assert websocket.accepted_subprotocol == BINARY_SUBPROTOCOL
+        decode_binary(websocket.receive_bytes())
+
+
+def test_json_is_the_default(client):
+    with client.websocket_connect("/tobii/gaze") as websocket:
+        message = websocket.receive_json()
+    assert isinstance(message, list)
+    assert set(message[0]) == {"fixation_x", "fixation_y", "timestamp"}
+
+
+def test_unknown_format_is_rejected(client):
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/tobii/gaze?format=xml") as websocket:
+            websocket.receive_bytes()
+    assert closed.value.code == 1008
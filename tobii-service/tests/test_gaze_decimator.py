@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+from app.services.gaze_buffer import GAZE_DTYPE, GazeRingBuffer
+from app.services.gaze_decimator import GazeDecimator
+from app.services.gaze_stream import GazeSubscription
+
+
+def stream(rate_hz: float, count: int, start: int = 1_000_000, seed: int = 0):
+    """Gaze at ``rate_hz`` with timing jitter, timestamps in microseconds."""
+    rng = np.random.default_rng(seed)
+    period = 1_000_000 / rate_hz
+    samples = np.zeros(count, dtype=GAZE_DTYPE)
+    samples["x"] = rng.random(count)
+    samples["y"] = rng.random(count)
+    jitter = rng.integers(-period // 10, period // 10, count)
+    samples["timestamp"] = start + np.round(np.arange(count) * period) + jitter
+    return samples
+
+
+def window_means(samples: np.ndarray, rate_hz: float) -> np.ndarray:
+    """Every complete window's mean, computed directly."""
+    windows = np.floor(samples["timestamp"] * rate_hz / 1_000_000)
+    out = []
+    for window in np.unique(windows)[:-1]:
+        group = samples[windows == window]
+        out.append((group["x"].mean(), group["y"].mean(), group["timestamp"].mean()))
+    return np.array(out)
+
+
+def as_rows(samples: np.ndarray) -> np.ndarray:
+    return np.column_stack((samples["x"], samples["y"], samples["timestamp"]))
+
+
+def assert_same_points(actual: np.ndarray, expected: np.ndarray) -> None:
+    np.testing.assert_array_equal(actual["timestamp"], expected["timestamp"])
+    # Sums in a different order may differ in the last bit.
+    np.testing.assert_allclose(actual["x"], expected["x"], rtol=1e-12)
+    np.testing.assert_allclose(actual["y"], expected["y"], rtol=1e-12)
+
+
+def read_in_pieces(decimator: GazeDecimator, samples: np.ndarray, sizes) -> np.ndarray:
+    out = []
+    start = 0
+    for size in sizes:
+        out.append(decimator.process(samples[start : start + size]))
+        start += size
+    out.append(decimator.process(samples[start:]))
+    return np.concatenate(out)
+
+
+def test_windows_average_the_samples_they_hold():
+    samples = stream(600, 3000)
+    out = GazeDecimator(60).process(samples)
+    np.testing.assert_allclose(as_rows(out), window_means(samples, 60), atol=1)
+    assert len(out) == pytest.approx(300, abs=2)
+
+
+def test_windows_span_read_boundaries():
+    samples = stream(1200, 5000)
+    whole = GazeDecimator(30).process(samples)
+
+    rng = np.random.default_rng(1)
+    for sizes in ([1] * 500, rng.integers(1, 60, 100), rng.integers(100, 900, 5)):
+        pieces = read_in_pieces(GazeDecimator(30), samples, sizes)
+        assert_same_points(pieces, whole)
+
+
+@pytest.mark.parametrize("rate_hz", [120, 500])
+def test_rate_at_or_above_the_source_passes_samples_through(rate_hz):
+    samples = stream(120, 500)
+    # Just slower than 120 Hz, so that no window holds two samples.
+    samples["timestamp"] = 1_000_000 + np.arange(500) * 8334
+    out = read_in_pieces(GazeDecimator(rate_hz), samples, [7] * 50)
+    # Only the last sample is still held back.
+    np.testing.assert_array_equal(out, samples[:-1])
+
+
+def test_flush_ends_the_window_in_progress():
+    decimator = GazeDecimator(10)
+    samples = stream(600, 30)  # Half of a 100 ms window.
+    assert len(decimator.process(samples)) == 0
+    [point] = decimator.flush()
+    assert point["x"] == pytest.approx(samples["x"].mean())
+    assert len(decimator.flush()) == 0
+
+
+class BufferService:
+    """The part of ``TobiiService`` a subscription reads through."""
+
+    def __init__(self, capacity: int):
+        self.gaze_buffer = GazeRingBuffer(capacity)
+
+    def pending_count(self, cursor: int) -> int:
+        return self.gaze_buffer.head - cursor
+
+    def get_gaze_data(self, cursor: int):
+        return self.gaze_buffer.drain(cursor)
+
+    def write(self, samples: np.ndarray) -> None:
+        for x, y, timestamp in samples.tolist():
+            self.gaze_buffer.append(x, y, timestamp)
+
+
+class Hub:
+    def __init__(self, service: BufferService):
+        self.service = service
+
+
+def test_window_does_not_bridge_dropped_samples():
+    service = BufferService(64)
+    subscription = GazeSubscription(Hub(service), 0, GazeDecimator(10))
+    # 600 Hz, so one 100 ms window holds 60 samples.
+    samples = stream(600, 200, start=0)
+    samples["timestamp"] = np.arange(200) * 1667
+    before, lost, after = samples[:20], samples[20:100], samples[100:104]
+
+    service.write(before)
+    assert len(subscription.read()[0]) == 0
+    service.write(lost)
+    service.write(after)
+    out, dropped = subscription.read()
+
+    assert dropped > 0
+    # The window in progress ends where the loss begins, and the samples
+    # that survived of that window are not averaged with those before it.
+    assert out[0]["x"] == pytest.approx(before["x"].mean())
+    assert out[0]["timestamp"] < before["timestamp"][-1]
+
+
+def test_pending_count_counts_output_samples():
+    service = BufferService(4096)
+    subscription = GazeSubscription(Hub(service), 0, GazeDecimator(30))
+    samples = stream(1200, 400, start=0)
+    samples["timestamp"] = np.arange(400) * 833
+
+    service.write(samples[:10])
+    assert subscription.pending_count() == 1  # Nothing read yet.
+    subscription.read()
+    service.write(samples[10:30])
+    assert subscription.pending_count() == 0  # Still in the first window.
+    service.write(samples[30:200])
+    # Samples up to 165 ms complete the windows of 0-33, 33-66, 66-100 and
+    # 100-133 ms.
+    assert subscription.pending_count() == 4
+    assert len(subscription.read()[0]) == 4
+    assert subscription.pending_count() == 0
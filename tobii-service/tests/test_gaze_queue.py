@@ -0,0 +1,89 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.models.gaze import OverflowPolicy
+from app.services.gaze_buffer import GAZE_DTYPE
+from app.services.gaze_queue import GazeSendQueue
+
+
+def make_samples(start: int, stop: int) -> np.ndarray:
+    samples = np.zeros(stop - start, dtype=GAZE_DTYPE)
+    samples["timestamp"] = np.arange(start, stop)
+    return samples
+
+
+def take_all(queue: GazeSendQueue) -> list:
+    async def take():
+        return [await queue.get() for _ in range(len(queue))]
+
+    batches = asyncio.run(take())
+    return [(list(batch["timestamp"]), dropped) for batch, dropped in batches]
+
+
+def test_put_splits_into_batches():
+    queue = GazeSendQueue(8, 4, OverflowPolicy.DROP_OLDEST)
+    queue.put(make_samples(0, 10))
+    assert take_all(queue) == [
+        ([0, 1, 2, 3], 0),
+        ([4, 5, 6, 7], 0),
+        ([8, 9], 0),
+    ]
+
+
+def test_drop_oldest_keeps_the_newest_batches():
+    queue = GazeSendQueue(2, 4, OverflowPolicy.DROP_OLDEST)
+    queue.put(make_samples(0, 12))
+    assert take_all(queue) == [([4, 5, 6, 7], 4), ([8, 9, 10, 11], 0)]
+    assert queue.total_dropped == 4
+
+
+def test_drop_newest_keeps_the_queued_batches():
+    queue = GazeSendQueue(2, 4, OverflowPolicy.DROP_NEWEST)
+    queue.put(make_samples(0, 12))
+    queue.put(make_samples(12, 14))
+    assert take_all(queue) == [([0, 1, 2, 3], 6), ([4, 5, 6, 7], 0)]
+    assert queue.total_dropped == 6
+
+
+def test_coalesce_keeps_only_the_newest_sample():
+    queue = GazeSendQueue(2, 4, OverflowPolicy.COALESCE)
+    queue.put(make_samples(0, 12))
+    assert take_all(queue) == [([11], 11)]
+    assert queue.total_dropped == 11
+
+
+@pytest.mark.parametrize(
+    "policy, total",
+    [
+        # Three lost upstream, plus what the full queue discards.
+        (OverflowPolicy.DROP_OLDEST, 7),
+        (OverflowPolicy.DROP_NEWEST, 7),
+        (OverflowPolicy.COALESCE, 10),
+    ],
+)
+def test_dropped_is_reported_once_and_totalled(policy, total):
+    queue = GazeSendQueue(1, 4, policy)
+    queue.put(make_samples(0, 4), dropped=3)
+    queue.put(make_samples(4, 8))
+    [(_, dropped)] = take_all(queue)
+    assert dropped == queue.total_dropped == total
+
+    queue.put(make_samples(8, 10))
+    assert take_all(queue) == [([8, 9], 0)]
+    assert queue.total_dropped == total
+
+
+def test_get_waits_for_a_put():
+    queue = GazeSendQueue(2, 4, OverflowPolicy.DROP_OLDEST)
+
+    async def wait_then_put():
+        waiter = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        queue.put(make_samples(0, 2), dropped=1)
+        batch, dropped = await asyncio.wait_for(waiter, 1)
+        return list(batch["timestamp"]), dropped
+
+    assert asyncio.run(wait_then_put()) == ([0, 1], 1)
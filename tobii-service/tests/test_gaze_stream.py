@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from app.services.gaze_stream import GazeSubscription
+
+
+def test_wait_times_out():
+    async def wait():
+        return await GazeSubscription(None, 0).wait(0.01)
+
+    assert asyncio.run(wait()) is False
+
+
+def test_wait_is_woken_by_new_samples():
+    async def wait():
+        subscription = GazeSubscription(None, 0)
+        waiter = asyncio.create_task(subscription.wait(10))
+        await asyncio.sleep(0)
+        subscription._wake()
+        return await waiter, subscription._event.is_set()
+
+    assert asyncio.run(wait()) == (True, False)
+
+
+@pytest.mark.parametrize("timeout", [None, 10])
+def test_cancel_is_not_lost_when_samples_arrive(timeout):
+    async def cancel():
+        subscription = GazeSubscription(None, 0)
+        waiter = asyncio.create_task(subscription.wait(timeout))
+        await asyncio.sleep(0)
+        # The wake-up and the cancellation land in the same loop iteration.
+        subscription._wake()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(cancel())
@@ -0,0 +1,104 @@
+import os
+import time
+from typing import List
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.models.gaze import Fixation
+from app.models.inference import ModelState
+from app.services.inference import RISK_THRESHOLD, InferenceService
+
+
+def wait_loaded(service: InferenceService, timeout: float = 30.0) -> ModelState:
+    service.load_in_background()
+    deadline = time.monotonic() + timeout
+    while service.status().state == ModelState.LOADING:
+        assert time.monotonic() < deadline, "model did not finish loading"
+        time.sleep(0.01)
+    return service.status().state
+
+
+def test_default_model_is_bundled():
+    assert os.path.isdir(settings.INFERENCE_MODEL_PATH)
+    assert os.path.isfile(settings.INFERENCE_SCALER_PATH)
+
+
+def reading_fixations(count: int, seed: int = 0) -> List[Fixation]:
+    rng = np.random.default_rng(seed)
+    fixations = []
+    t = 0
+    for _ in range(count):
+        duration = int(rng.integers(80, 400))
+        fixations.append(
+            Fixation(
+                start_timestamp=t,
+                end_timestamp=t + duration * 1000,
+                duration_ms=duration,
+                x=float(rng.random()),
+                y=float(rng.random()),
+                previous_saccade_amplitude=float(rng.random() * 0.2),
+                is_regression=bool(rng.random() < 0.15),
+            )
+        )
+        t += (duration + 30) * 1000
+    return fixations
+
+
+def test_default_model_loads_and_scores(tmp_path, monkeypatch):
+    pytest.importorskip("onnxruntime")
+    # The defaults must not depend on the working directory.
+    monkeypatch.chdir(tmp_path)
+    service = InferenceService()
+    assert wait_loaded(service) == ModelState.READY
+
+    score = service.score_fixations(reading_fixations(120))
+    assert 0.0 <= score.risk_score <= 1.0
+    assert score.window_count > 0
+
+
+def test_risk_at_the_threshold_is_at_risk(monkeypatch):
+    pytest.importorskip("onnxruntime")
+    service = InferenceService()
+    assert wait_loaded(service) == ModelState.READY
+
+    # As in the notebook's population analysis, which flags risk >= 0.5.
+    head = np.array([[RISK_THRESHOLD]], dtype=np.float32)
+    monkeypatch.setattr(service, "_head", lambda profiles: head)
+    score = service.score_fixations(reading_fixations(120))
+    assert score.risk_score == RISK_THRESHOLD
+    assert score.at_risk
+
+
+def test_missing_model_is_reported_without_an_error_log(tmp_path, caplog):
+    missing = str(tmp_path / "no-such-model")
+    service = InferenceService(model_path=missing)
+
+    assert wait_loaded(service) == ModelState.UNAVAILABLE
+    assert missing in service.status().error
+    assert not [record for record in caplog.records if record.levelname == "ERROR"]
+
+
+@pytest.mark.parametrize("count", [80, 120, 600])
+def test_incremental_score_matches_whole_session(count):
+    # 600 fixations make more windows than the model takes.
+    pytest.importorskip("onnxruntime")
+    service = InferenceService()
+    assert wait_loaded(service) == ModelState.READY
+    fixations = reading_fixations(count, seed=count)
+    expected = service.score_fixations(fixations)
+
+    scorer = service.new_session()
+    rng = np.random.default_rng(1)
+    start = 0
+    while start < count:
+        size = int(rng.integers(1, 30))
+        scorer.add([f.model_dump() for f in fixations[start : start + size]])
+        start += size
+
+    score = scorer.score()
+    assert score.window_count == expected.window_count
+    assert score.fixation_count == expected.fixation_count == count
+    assert score.risk_score == pytest.approx(expected.risk_score, abs=1e-6)
+    assert score.at_risk == expected.at_risk
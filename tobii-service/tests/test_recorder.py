@@ -0,0 +1,48 @@
+import threading
+
+import numpy as np
+
+from app.config import settings
+from app.services.gaze_buffer import GAZE_DTYPE
+from app.services.recorder import SessionRecorder
+
+
+class FailingService:
+    """Delivers one batch, then fails every read."""
+
+    def __init__(self):
+        self.reads = 0
+
+    def get_device_info(self):
+        return None
+
+    def get_cursor(self):
+        return 0
+
+    def get_gaze_data(self, cursor):
+        self.reads += 1
+        if self.reads > 1:
+            raise OSError("No space left on device")
+        samples = np.zeros(3, dtype=GAZE_DTYPE)
+        samples["timestamp"] = [1, 2, 3]
+        return samples, cursor + 3, 0
+
+
+def test_writer_failure_ends_the_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RECORDING_FLUSH_INTERVAL_MS", 1)
+    recorder = SessionRecorder(FailingService(), str(tmp_path))
+    failed = threading.Event()
+
+    info = recorder.start(on_failure=failed.set)
+    assert failed.wait(5)
+
+    assert not recorder.is_recording
+    stored = recorder.get_session(info.id)
+    assert stored.error == "No space left on device"
+    assert stored.stopped_at is not None
+    assert stored.sample_count == 3
+
+    # A new session can start without stopping the failed one first.
+    failed.clear()
+    recorder.start(on_failure=failed.set)
+    assert failed.wait(5)
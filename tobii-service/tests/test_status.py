@@ -0,0 +1,26 @@
+def receive_until(websocket, predicate, limit: int = 50) -> dict:
+    """The first status pushed that satisfies ``predicate``."""
+    for _ in range(limit):
+        status = websocket.receive_json()
+        if predicate(status):
+            return status
+    raise AssertionError(f"no matching status in {limit} messages")
+
+
+def test_live_status_pushes_the_status_then_its_changes(client):
+    with client.websocket_connect("/tobii/status/live") as live:
+        status = live.receive_json()
+        assert status["connected"]
+        assert status["device"]["model"] == "Synthetic"
+
+        with client.websocket_connect("/tobii/gaze") as gaze:
+            gaze.receive_json()
+            status = receive_until(live, lambda status: status["clients"] == 1)
+            assert status["capturing"]
+            # While capturing the rate is re-measured every interval.
+            status = receive_until(live, lambda status: status["sample_rate_hz"])
+            assert 450 < status["sample_rate_hz"] < 750
+
+        status = receive_until(live, lambda status: not status["clients"])
+        assert not status["capturing"]
+        assert status["sample_rate_hz"] == 0
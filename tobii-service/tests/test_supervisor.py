@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import supervisor as supervisor_module
+from app.services.gaze_stream import GazeHub
+from app.services.supervisor import TrackerSupervisor
+from app.services.tobii_service import TobiiService
+from app.services.trackers import (
+    EYETRACKER_GAZE_DATA,
+    EYETRACKER_NOTIFICATION_CONNECTION_LOST,
+    EYETRACKER_NOTIFICATION_CONNECTION_RESTORED,
+    make_gaze_data,
+)
+
+
+class FakeTracker:
+    """A tracker that only calls back when told to."""
+
+    device_name = serial_number = model = firmware_version = "Fake"
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def subscribe_to(self, stream, callback, as_dictionary=True):
+        self.callbacks[stream] = callback
+
+    def unsubscribe_from(self, stream, callback=None):
+        self.callbacks.pop(stream, None)
+
+    def send_gaze(self, timestamp: int) -> None:
+        data = make_gaze_data(0.5, 0.5, 0.5, 0.5, timestamp, timestamp)
+        self.callbacks[EYETRACKER_GAZE_DATA](data)
+
+    def notify(self, stream: str) -> None:
+        self.callbacks[stream]({"system_time_stamp": 0})
+
+
+class Discovery:
+    """Stands in for ``find_eyetracker``, returning queued trackers."""
+
+    def __init__(self):
+        self.trackers = []
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.trackers.pop(0) if self.trackers else None
+
+
+@pytest.fixture
+def discovery(monkeypatch):
+    discovery = Discovery()
+    monkeypatch.setattr(supervisor_module, "find_eyetracker", discovery)
+    return discovery
+
+
+def supervise(service, gaps=None, **kwargs):
+    on_gap = gaps.append if gaps is not None else None
+    return TrackerSupervisor(service, on_gap=on_gap, **kwargs)
+
+
+def test_search_backs_off_until_a_tracker_is_found(discovery):
+    service = TobiiService()
+    supervisor = supervise(service, min_backoff_s=1, max_backoff_s=4)
+
+    backoffs = []
+    for _ in range(5):
+        supervisor._next_search = 0.0  # As if the backoff had elapsed.
+        supervisor._check()
+        backoffs.append(round(supervisor._next_search - time.monotonic()))
+    assert backoffs == [1, 2, 4, 4, 4]
+
+    # Within the backoff, nothing is searched.
+    supervisor._check()
+    assert discovery.calls == 5
+
+    tracker = FakeTracker()
+    discovery.trackers.append(tracker)
+    supervisor._next_search = 0.0
+    supervisor._check()
+    assert service.eyetracker is tracker
+    assert supervisor._backoff == 1
+
+
+def test_connection_lost_while_idle_is_rediscovered(discovery):
+    service = TobiiService()
+    lost, found = FakeTracker(), FakeTracker()
+    service.attach_eyetracker(lost)
+    supervisor = supervise(service)
+
+    lost.notify(EYETRACKER_NOTIFICATION_CONNECTION_LOST)
+    assert not service.is_capturing
+    supervisor._check()
+    assert not service.is_connected()
+    assert not lost.callbacks
+
+    discovery.trackers.append(found)
+    supervisor._check()
+    assert service.eyetracker is found
+    assert not service.connection_lost
+    assert EYETRACKER_NOTIFICATION_CONNECTION_LOST in found.callbacks
+
+
+def test_restored_connection_keeps_the_tracker(discovery):
+    service = TobiiService()
+    tracker = FakeTracker()
+    service.attach_eyetracker(tracker)
+    supervisor = supervise(service)
+
+    tracker.notify(EYETRACKER_NOTIFICATION_CONNECTION_LOST)
+    tracker.notify(EYETRACKER_NOTIFICATION_CONNECTION_RESTORED)
+    supervisor._check()
+    assert service.eyetracker is tracker
+    assert discovery.calls == 0
+
+
+def test_stalled_stream_is_restarted_then_rediscovered(discovery):
+    service = TobiiService()
+    stalled, found = FakeTracker(), FakeTracker()
+    service.attach_eyetracker(stalled)
+    service.start_capture()
+    gaps = []
+    supervisor = supervise(service, gaps, stall_timeout_s=0)
+
+    stalled.send_gaze(1_000)
+    stalled.send_gaze(2_000)
+    supervisor._check()  # Data is flowing.
+    assert gaps == []
+
+    supervisor._check()  # Silent: subscribe again.
+    assert gaps == [2_000]
+    assert service.eyetracker is stalled
+    assert EYETRACKER_GAZE_DATA in stalled.callbacks
+
+    supervisor._check()  # Still silent: drop the tracker.
+    assert not service.is_connected()
+
+    discovery.trackers.append(found)
+    supervisor._check()
+    assert service.eyetracker is found
+    assert service.is_capturing
+    assert EYETRACKER_GAZE_DATA in found.callbacks
+    assert gaps == [2_000, 2_000]
+
+
+def test_gaps_reach_every_subscriber(discovery):
+    service = TobiiService()
+    tracker = FakeTracker()
+    service.attach_eyetracker(tracker)
+    hub = GazeHub(service)
+    supervisor = TrackerSupervisor(service, hub.report_gap, stall_timeout_s=0)
+
+    async def stall():
+        subscriptions = [hub.subscribe(), hub.subscribe()]
+        tracker.send_gaze(5_000)
+        supervisor._check()
+        # The supervisor runs on its own thread, and so reports from there.
+        thread = threading.Thread(target=supervisor._check)
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0)
+        return [subscription.gap_start for subscription in subscriptions]
+
+    assert asyncio.run(stall()) == [5_000, 5_000]
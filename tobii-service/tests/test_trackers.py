@@ -0,0 +1,132 @@
+import itertools
+import math
+import threading
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services.trackers import (
+    EYETRACKER_GAZE_DATA,
+    REPLAY_BACKEND,
+    SYNTHETIC_BACKEND,
+    ReplayEyeTracker,
+    SyntheticEyeTracker,
+    find_eyetracker,
+)
+
+
+def collect(tracker, count: int) -> list:
+    """Subscribe to ``tracker`` until ``count`` samples have arrived."""
+    samples = []
+    done = threading.Event()
+
+    def callback(gaze_data):
+        samples.append(gaze_data)
+        if len(samples) >= count:
+            done.set()
+
+    tracker.subscribe_to(EYETRACKER_GAZE_DATA, callback)
+    try:
+        assert done.wait(10)
+    finally:
+        tracker.unsubscribe_from(EYETRACKER_GAZE_DATA, callback)
+    return samples[:count]
+
+
+@pytest.fixture
+def recording(tmp_path):
+    # Uneven spacing, with a lost sample in the middle.
+    timestamp = np.array([1_000_000, 1_008_000, 1_016_000, 1_030_000])
+    x = np.array([0.1, 0.2, np.nan, 0.4])
+    path = str(tmp_path / "session.npz")
+    np.savez(path, x=x, y=1 - x, timestamp=timestamp)
+    return path, x, timestamp
+
+
+def test_synthetic_samples_at_its_rate():
+    tracker = SyntheticEyeTracker(600, seed=0)
+    samples = list(itertools.islice(tracker._samples(), 6000))
+    times = np.array([t for t, _ in samples])
+    np.testing.assert_allclose(np.diff(times), 1 / 600)
+
+    points = np.array([point for _, point in samples])
+    lost = np.isnan(points)
+    # Blinks lose both eyes together.
+    assert lost.any()
+    assert (lost.all(axis=1) == lost.any(axis=1)).all()
+    assert ((points[~lost] > -0.1) & (points[~lost] < 1.1)).all()
+
+
+def test_synthetic_seed_is_reproducible():
+    def points(seed):
+        samples = SyntheticEyeTracker(120, seed=seed)._samples()
+        return np.array([point for _, point in itertools.islice(samples, 500)])
+
+    np.testing.assert_array_equal(points(3), points(3))
+    assert not np.allclose(points(3), points(4), equal_nan=True)
+
+
+@pytest.mark.parametrize("rate_hz", [30, 2400])
+def test_synthetic_rejects_rates_out_of_range(rate_hz):
+    with pytest.raises(ValueError):
+        SyntheticEyeTracker(rate_hz)
+
+
+def test_synthetic_delivers_sdk_dictionaries():
+    samples = collect(SyntheticEyeTracker(1200, blink_rate_hz=0, seed=0), 50)
+    stamps = np.array([sample["system_time_stamp"] for sample in samples])
+    assert (np.diff(stamps) > 0).all()
+    for sample in samples:
+        assert sample["left_gaze_point_validity"] == 1
+        assert sample["right_gaze_point_validity"] == 1
+        assert len(sample["left_gaze_point_on_display_area"]) == 2
+
+
+@pytest.mark.parametrize("speed", [0, 50])
+def test_replay_keeps_recorded_spacing_across_loops(recording, speed):
+    path, x, timestamp = recording
+    samples = collect(ReplayEyeTracker(path, speed=speed, loop=True), 3 * len(x))
+
+    stamps = np.array([sample["device_time_stamp"] for sample in samples])
+    # Each pass starts one mean sample interval after the previous one ends.
+    span = (timestamp[-1] - timestamp[0]) * len(x) // (len(x) - 1)
+    expected = np.concatenate([timestamp - timestamp[0] + span * n for n in range(3)])
+    np.testing.assert_allclose(stamps, expected, atol=1)
+    system = np.array([sample["system_time_stamp"] for sample in samples])
+    np.testing.assert_array_equal(np.diff(system), np.diff(stamps))
+
+    replayed = [sample["left_gaze_point_on_display_area"][0] for sample in samples]
+    np.testing.assert_array_equal(replayed, np.tile(x, 3))
+    lost = [sample["left_gaze_point_validity"] for sample in samples]
+    assert lost == [1, 1, 0, 1] * 3
+
+
+def test_replay_without_loop_stops(recording):
+    path, x, _ = recording
+    tracker = ReplayEyeTracker(path, speed=0, loop=False)
+    assert len(list(tracker._samples())) == len(x)
+
+
+def test_replay_rejects_negative_speed(recording):
+    with pytest.raises(ValueError):
+        ReplayEyeTracker(recording[0], speed=-1)
+
+
+def test_find_eyetracker_builds_the_configured_backend(recording, monkeypatch):
+    monkeypatch.setattr(settings, "SYNTHETIC_RATE_HZ", 240.0)
+    tracker = find_eyetracker(SYNTHETIC_BACKEND)
+    assert isinstance(tracker, SyntheticEyeTracker)
+    assert tracker.rate_hz == 240
+
+    monkeypatch.setattr(settings, "REPLAY_PATH", "")
+    with pytest.raises(ValueError):
+        find_eyetracker(REPLAY_BACKEND)
+    monkeypatch.setattr(settings, "REPLAY_PATH", recording[0])
+    monkeypatch.setattr(settings, "TRACKER_BACKEND", REPLAY_BACKEND)
+    tracker = find_eyetracker()
+    assert isinstance(tracker, ReplayEyeTracker)
+    assert math.isnan(tracker.x[2])
+
+    with pytest.raises(ValueError):
+        find_eyetracker("webcam")